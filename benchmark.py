@@ -0,0 +1,530 @@
+# #####################################################################################################################################################################################################
+# Filename:     benchmark.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Benchmarks
+# ----------
+#   python3 benchmark.py importtime [--module mind] [--top 20] [--save]
+#   python3 benchmark.py sanitize [--paragraphs 2000] [--repeat 5] [--file main.html] [--save]
+#   python3 benchmark.py slug [--titles 50000] [--distinct 5000] [--save]
+#   python3 benchmark.py topics [--topics 1000] [--save]
+#   python3 benchmark.py pelican [--rows 20000] [--body 2000] [--workers N] [--save]
+#   python3 benchmark.py export [--rows 100000] [--body 20000] [--formats excel,excel-streaming,parquet,parquet-nobody,feather] [--save]
+#
+#   --save appends the result as one json line to benchmarks.jsonl so the numbers can be tracked over commits
+#
+# #####################################################################################################################################################################################################
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+import xml.etree.ElementTree as ET
+
+from datetime import datetime as dt
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+BENCHMARKS = os.path.join( FOLDER, 'benchmarks.jsonl' )
+
+# #####################################################################################################################################################################################################
+# SAVE
+# #####################################################################################################################################################################################################
+
+def _save( name, result ):
+    try:
+        commit = subprocess.run( ['git', 'rev-parse', '--short', 'HEAD'], cwd=FOLDER, capture_output=True, text=True ).stdout.strip()
+    except OSError:
+        commit = None
+
+    with open(BENCHMARKS, 'a', encoding='utf-8') as f:
+        f.write( json.dumps( { 'benchmark': name, 'date': dt.now().isoformat(timespec='seconds'), 'commit': commit, 'python': sys.version.split()[0], 'result': result } ) + '\n' )
+
+# #####################################################################################################################################################################################################
+# IMPORTTIME
+# #####################################################################################################################################################################################################
+# python -X importtime -c "import [module]" in a fresh interpreter
+# stderr lines: import time: self [us] | cumulative | imported package
+
+def importtime( module='mind', top=20 ):
+
+    run = subprocess.run( [ sys.executable, '-X', 'importtime', '-c', f'import {module}' ], cwd=FOLDER, capture_output=True, text=True )
+
+    imports = []
+    for line in run.stderr.splitlines():
+        match = re.match( r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)', line )
+        if match:
+            imports += [ { 'module': match.group(4), 'self_us': int(match.group(1)), 'cumulative_us': int(match.group(2)), 'depth': len(match.group(3)) // 2 } ]
+
+    # top level imports: the ones done by the module itself
+    top_level = [ imp for imp in imports if imp['depth'] <= 1 ]
+
+    return {
+        'module': module,
+        'ok': run.returncode == 0,
+        'error': run.stderr.strip().splitlines()[-1] if run.returncode != 0 and run.stderr.strip() else None,
+        'modules': len(imports),
+        'total_ms': round( sum( imp['self_us'] for imp in imports ) / 1000, 1 ),
+        'top': [ { 'module': imp['module'], 'cumulative_ms': round(imp['cumulative_us'] / 1000, 1) }
+                 for imp in sorted( top_level, key=lambda imp: imp['cumulative_us'], reverse=True )[:top] ],
+    }
+
+# #####################################################################################################################################################################################################
+# SANITIZE
+# #####################################################################################################################################################################################################
+# sanitize.sanitize against the clean loops it replaced (onenote._download_page, mytools.clean_html, itmz._download_itmz)
+# equivalent: both give the same html on the page, for each profile
+# throughput: clean step only (the page is parsed before), MB of html per second
+
+LEGACY = {
+    'onenote': ( ['style', 'lang', 'data-absolute-enabled', 'span', 'p',  'data-src-type', 'data-render-original-src', 'data-index', 'data-options', 'data-attachment', 'data-id', 'height', 'width'],
+                 ['href', 'alt'] ),
+    'itmz': ( ['span', 'p', 'link', 'style', 'script', 'meta', 'svg', 'nav', 'header', 'footer'] + ['style', 'lang', 'class', 'height', 'width'] + 
+              ['data-absolute-enabled', 'data-src-type', 'data-render-original-src', 'data-index', 'data-options', 'data-attachment', 'data-id'],
+              ['href', 'alt', 'src', 'title', 'data', 'target', 'type', 'content', 'mind'] ),
+}
+
+def _legacy_clean( soup, blacklist, whitelist ):
+    for tag in soup.find_all(True):
+        for attr in [attr for attr in tag.attrs if( attr in blacklist and attr not in whitelist)]:
+            del tag[attr]
+        if tag.name in blacklist and tag.name not in whitelist:
+            tag.unwrap()
+    return soup
+
+def onenote_page( paragraphs=2000 ):
+    # looks like a page returned by Graph: absolute divs, styled paragraphs and spans, images, tables, lists
+    body = []
+    for i in range(paragraphs):
+        body += [ f'<p id="p:{{{i:08x}-0000}}{{1}}" lang="en-US" style="margin-top:0pt;margin-bottom:0pt">'
+                  f'<span style="font-weight:bold" lang="fr-FR">Paragraph {i}</span> some text &amp; more '
+                  f'<a href="https://example.com/{i}" style="color:blue">link {i}</a></p>' ]
+        if i % 10 == 0:
+            body += [ f'<img alt="image {i}" width="843" height="218.5" src="images/{i}.png" data-src-type="image/png" '
+                      f'data-index="{i}" data-render-original-src="https://graph/{i}" />' ]
+        if i % 25 == 0:
+            body += [ f'<table style="border:1px solid;border-collapse:collapse"><tr><td style="padding:2pt"><p lang="en-US">cell {i}</p></td>'
+                      f'<td><span class="x">value</span></td></tr></table>' ]
+        if i % 40 == 0:
+            body += [ f'<ul><li><p style="margin:0"><span lang="en-US">item {i}</span></p></li></ul>'
+                      f'<object data-attachment="file{i}.pdf" type="application/pdf" data="attachments/file{i}.pdf" data-id="{i}" />' ]
+
+    return ( '<html lang="en-US"><head><title>Large page</title><meta name="created" content="2023-01-01T00:00:00.0000000" />'
+             '<style>p {margin:0}</style></head>'
+             '<body data-absolute-enabled="true" style="font-family:Calibri;font-size:11pt">'
+             '<div id="div:{0}" data-id="_default" style="position:absolute;left:48px;top:115px;width:624px">'
+             + ''.join( body ) + '</div></body></html>' )
+
+def sanitize( paragraphs=2000, repeat=5, file=None ):
+    from bs4 import BeautifulSoup
+    from sanitize import sanitize as compiled, PROFILES
+
+    if file:
+        with open(file, 'r', encoding='utf-8') as f:
+            html = f.read()
+    else:
+        html = onenote_page( paragraphs )
+
+    size = len( html.encode('utf-8') )
+    result = { 'bytes': size, 'repeat': repeat, 'profiles': {} }
+
+    for name in PROFILES:
+        legacy_html = str( _legacy_clean( BeautifulSoup( html, features="html.parser" ), *LEGACY[name] ) )
+        compiled_html = str( compiled( BeautifulSoup( html, features="html.parser" ), name ) )
+
+        timings = {}
+        for label, clean in [ ( 'legacy', lambda soup: _legacy_clean( soup, *LEGACY[name] ) ), ( 'compiled', lambda soup: compiled( soup, name ) ) ]:
+            best = None
+            for _ in range(repeat):
+                soup = BeautifulSoup( html, features="html.parser" )
+                start = time.perf_counter()
+                clean( soup )
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min( best, elapsed )
+            timings[label] = { 'seconds': round(best, 4), 'mb_per_s': round( size / best / 1024 / 1024, 2 ) }
+
+        result['profiles'][name] = { 'equivalent': legacy_html == compiled_html, 'speedup': round( timings['legacy']['seconds'] / timings['compiled']['seconds'], 2 ), **timings }
+
+    result['ok'] = all( profile['equivalent'] for profile in result['profiles'].values() )
+
+    return result
+
+# #####################################################################################################################################################################################################
+# SLUG
+# #####################################################################################################################################################################################################
+# the former mytools.slugify (inline patterns, no memo) against slug.slugify and slug.slugify_batch
+# titles repeat like they do across syncs and exports: [titles] values drawn from [distinct] ones
+
+def _legacy_slugify( value, isDir = False ):
+    if isDir: value = re.sub( r'[<>:"/\\|?*^%]', ' ', value, flags=re.IGNORECASE )
+    else: value = re.sub( r'[<>:"/\\|?*^%]', '-', value, flags=re.IGNORECASE )
+    if not isDir: value = re.sub( r'[^\w\s-]', '', value, flags=re.IGNORECASE )
+    if not isDir: value = re.sub( r'[\s]+', '-', value, flags=re.IGNORECASE )
+    if not isDir: value = value.lower()
+    value = re.sub( r'[\s]+', ' ', value, flags=re.IGNORECASE)
+    value = re.sub( r'[-]+', '-', value, flags=re.IGNORECASE)
+    return value.strip()
+
+def slug( titles=50000, distinct=5000 ):
+    import random
+    import slug as SLUG
+
+    rnd = random.Random( 0 )
+    words = [ 'Meeting', 'notes', 'Q3', 'Été', 'plan/review', 'A&B', '<draft>', 'v2.1', 'TODO:', 'réunion', '50%', 'client' ]
+    values = [ ' '.join( rnd.choice(words) for _ in range( rnd.randint(2, 8) ) ) + f' {n}' for n in range(distinct) ]
+    values = [ rnd.choice(values) for _ in range(titles) ]
+
+    result = { 'titles': titles, 'distinct': distinct }
+
+    start = time.perf_counter()
+    legacy = [ _legacy_slugify( value ) for value in values ]
+    result['legacy'] = round( time.perf_counter() - start, 4 )
+
+    SLUG.slugify.cache_clear()
+    start = time.perf_counter()
+    memo = [ SLUG.slugify( value ) for value in values ]
+    result['memoized'] = round( time.perf_counter() - start, 4 )
+
+    SLUG.slugify.cache_clear()
+    start = time.perf_counter()
+    batch = SLUG.slugify_batch( values )
+    result['batch'] = round( time.perf_counter() - start, 4 )
+
+    result['speedup'] = round( result['legacy'] / result['batch'], 2 )
+    result['ok'] = legacy == memo == batch
+
+    return result
+
+# #####################################################################################################################################################################################################
+# EXPORT
+# #####################################################################################################################################################################################################
+# element table saved with mypandas.save_excel (normal and constant_memory) and save_parquet (parquet, feather)
+# seconds, python memory peak (tracemalloc) and file size for each format, in a temporary folder
+
+def elements_frame( rows=100000, body=20000 ):
+    import random
+    import pandas as pd
+    from mypandas import ELEMENT_COLUMNS
+
+    rnd = random.Random( 0 )
+    paragraph = '<p style="margin-top:0pt;margin-bottom:0pt">Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>'
+    bodies = [ '<html><body>' + paragraph * ( rnd.randint( 1, 2 * body ) // len(paragraph) ) + '</body></html>' for _ in range(100) ]
+
+    return pd.DataFrame( {
+        'source': [ rnd.choice( ['onenote', 'itmz', 'notes'] ) for _ in range(rows) ],
+        'what': 'page',
+        'type': [ rnd.choice( ['page', 'post'] ) for _ in range(rows) ],
+        'id': [ f'{n:08x}!section!notebook' for n in range(rows) ],
+        'number': range(rows),
+        'title': [ f'Page {n}' for n in range(rows) ],
+        'created': pd.Timestamp( '2023-01-01' ),
+        'modified': pd.Timestamp( '2023-06-01' ),
+        'authors': [ rnd.choice( ['Laurent', 'Ana', 'Bob'] ) for _ in range(rows) ],
+        'slug': [ f'page-{n}' for n in range(rows) ],
+        'top': 'notebook',
+        'parent': [ f'section {n % 500}' for n in range(rows) ],
+        'childs': [ [] for _ in range(rows) ],
+        'publish': True,
+        'body': [ rnd.choice(bodies) for _ in range(rows) ],
+    }, columns=ELEMENT_COLUMNS )
+
+def export( rows=100000, body=20000, formats=( 'excel', 'excel-streaming', 'parquet', 'feather' ) ):
+    import glob
+    import tempfile
+    import tracemalloc
+    from mypandas import save_excel, save_parquet
+
+    elements = elements_frame( rows, body )
+
+    savers = {
+        'excel': lambda folder: save_excel( folder, elements, timestamp='benchmark', streaming=False ),
+        'excel-streaming': lambda folder: save_excel( folder, elements, timestamp='benchmark', streaming=True ),
+        'parquet': lambda folder: save_parquet( folder, elements, timestamp='benchmark' ),
+        'parquet-nobody': lambda folder: save_parquet( folder, elements, timestamp='benchmark', body=False ),
+        'feather': lambda folder: save_parquet( folder, elements, timestamp='benchmark', format='feather' ),
+    }
+
+    result = { 'rows': rows, 'body_bytes': int( elements['body'].str.len().mean() ), 'formats': {} }
+
+    for name in formats:
+        with tempfile.TemporaryDirectory() as folder:
+            tracemalloc.start()
+            start = time.perf_counter()
+            savers[name]( folder )
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            files = glob.glob( os.path.join( folder, 'jamstack_benchmark.*' ) )
+            result['formats'][name] = {
+                'seconds': round( elapsed, 2 ),
+                'peak_mb': round( peak / 1024 / 1024, 1 ),
+                'file_mb': round( os.path.getsize( files[0] ) / 1024 / 1024, 1 ) if files else None,
+            }
+
+    result['ok'] = all( format['file_mb'] is not None for format in result['formats'].values() )
+
+    return result
+
+# #####################################################################################################################################################################################################
+# TOPICS
+# #####################################################################################################################################################################################################
+# memory kept by a map conversion once the topics are rendered (tracemalloc, after gc) and time to compute the hierarchies
+#   legacy      xml tree kept alive, the attrib dict of each topic extended with source, object, file, title, html, body, hierarchy
+#               hierarchy from root.findall( './/topic[@uuid="..."]/..' ) for each parent
+#   topics      parent index + Topic records, tree released
+
+def mapdata( topics=1000, children=6 ):
+    import uuid as UUID
+    import random
+
+    rnd = random.Random( 0 )
+    xml = [ '<iThoughts><topics>' ]
+    stack = [ 0 ]
+
+    for n in range(topics):
+        text = f'Topic {n}\n' + 'Lorem ipsum dolor sit amet. ' * rnd.randint( 1, 40 )
+        xml += [ '<topic uuid="{}" text="{}" created="2023-01-01T00:00:00" modified="2023-06-01T00:00:00" position="{{0, 0}}" color="ff0000">'.format( UUID.UUID( int=rnd.getrandbits(128) ).hex.upper(), text.replace( '\n', '&#10;' ) ) ]
+        stack[-1] += 1
+        if len(stack) < 8 and rnd.random() < 0.5:
+            stack += [ 0 ]
+            continue
+        xml += [ '</topic>' ]
+        while len(stack) > 1 and stack[-1] >= rnd.randint( 1, children ):
+            stack.pop()
+            xml += [ '</topic>' ]
+
+    xml += [ '</topic>' ] * ( len(stack) - 1 )
+    xml += [ '</topics></iThoughts>' ]
+
+    return ''.join( xml ).encode('utf-8')
+
+def _render( attrib ):
+    return '<head></head><body><h1 id="{}">{}</h1></body>'.format( attrib['uuid'], attrib['text'].replace( '\n', '<br />' ) )
+
+def _legacy_topics( xmldata, file ):
+    elements = ET.fromstring( xmldata )
+    itmz = []
+    for element in elements.iter('topic'):
+        element.attrib['source'] = 'itmz'
+        element.attrib['object'] = 'topic'
+        element.attrib['file'] = file
+        element.attrib['title'] = element.attrib['text'].split('\n')[0]
+        element.attrib['html'] = _render( element.attrib )
+        element.attrib['body'] = element.attrib['html'][len('<head></head>'):]
+        itmz += [ element.attrib ]
+
+    start = time.perf_counter()
+    for element in itmz:
+        def get_parents_title( uuid ):
+            parents = elements.findall(f'.//topic[@uuid="{uuid}"]/..')
+            if (len(parents) > 0) and (parents[0].tag == 'topic'):
+                return get_parents_title( parents[0].attrib['uuid'] ) + [ parents[0].attrib['title' if 'title' in parents[0].attrib else 'uuid'] ]
+            else:
+                return []
+        element['hierarchy'] = get_parents_title( element['uuid'] )
+    elapsed = time.perf_counter() - start
+
+    return ( elements, itmz ), elapsed, { element['uuid']: element['hierarchy'] for element in itmz }
+
+def _compact_topics( xmldata, file ):
+    from topics import Topic, parent_index, hierarchies
+
+    elements = ET.fromstring( xmldata )
+    parents = parent_index( elements )
+    itmz = []
+    for element in elements.iter('topic'):
+        itmz += [ Topic( file, element.attrib['uuid'], parents.get( element.attrib['uuid'] ), element.attrib['text'].split('\n')[0], _render( element.attrib ) ) ]
+    element = elements = None
+
+    start = time.perf_counter()
+    topic_hierarchies = hierarchies( parents, { topic.uuid: topic.title for topic in itmz } )
+    for topic in itmz:
+        topic.hierarchy = topic_hierarchies.get( topic.uuid, [] )
+    elapsed = time.perf_counter() - start
+
+    return itmz, elapsed, { topic.uuid: topic.hierarchy for topic in itmz }
+
+def topics( topics=1000 ):
+    import gc
+    import tracemalloc
+
+    xmldata = mapdata( topics )
+    file = os.path.join( FOLDER, 'benchmark.itmz' )
+
+    result = { 'count': topics, 'xml_bytes': len(xmldata) }
+    hierarchy = {}
+
+    for name, build in [ ( 'legacy', _legacy_topics ), ( 'topics', _compact_topics ) ]:
+        gc.collect()
+        tracemalloc.start()
+        kept, elapsed, hierarchy[name] = build( xmldata, file )
+        gc.collect()
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        result[name] = { 'kept_mb': round( current / 1024 / 1024, 2 ), 'bytes_per_topic': current // topics, 'hierarchy_seconds': round( elapsed, 4 ) }
+        del kept
+
+    result['memory_saving'] = round( 1 - result['topics']['kept_mb'] / result['legacy']['kept_mb'], 2 )
+    result['ok'] = hierarchy['legacy'] == hierarchy['topics']
+
+    return result
+
+# #####################################################################################################################################################################################################
+# PELICAN
+# #####################################################################################################################################################################################################
+# pelican.write against the former row by row writer (DataFrame.apply, bs4 re-parse, makedirs per file), same files expected
+
+def _legacy_pelican_write( directory, elements ):
+    from bs4 import BeautifulSoup
+    from pelican import MAPPING
+
+    folder_site = os.path.join(directory, 'pelican')
+
+    def _write_element( element ):
+        text = '<head>\n'
+        if 'title' in element: text += '\t<title>{}</title>\n'.format(element['title'])
+        for key, val in MAPPING.items():
+            if val:
+                if val in elements: text += '\t<meta name="{}" content="{}" />\n'.format(key, element[val])
+                else: text += '\t<meta name="{}" content="{}" />\n'.format(key, val)
+        text += '</head>\n'
+
+        soup = BeautifulSoup(element['body'] if element['body'] == element['body'] else '<body></body>', features="html.parser")
+        text += str( soup )
+
+        element['pelican'] = element['id'].split('!')
+        element['pelican'].reverse()
+        element['pelican'] = os.path.join( folder_site, 'content', element['type']+'s', os.path.sep.join(element['pelican']), element['slug'] + '.html' )
+        out_dir = os.path.dirname(element['pelican'])
+        if not os.path.isdir(out_dir):
+            os.makedirs(out_dir)
+        with open(element['pelican'], 'w', encoding='utf-8') as fs:
+            fs.write(text)
+        return element
+
+    elements['pelican'] = None
+    cond = elements['publish'] & elements['type'].isin(['post', 'page'])
+    elements[cond] = elements[cond].apply(_write_element, axis='columns')
+    return elements
+
+def _tree( folder ):
+    # the manifest of the site sync (see sync.py) is not part of the site
+    from manifest import MANIFEST
+
+    files = {}
+    for root, subdirs, names in os.walk( folder ):
+        for name in names:
+            if name == MANIFEST and root == folder: continue
+            with open(os.path.join(root, name), 'rb') as f:
+                files[os.path.relpath( os.path.join(root, name), folder )] = f.read()
+    return files
+
+def pelican( rows=20000, body=2000, workers=None ):
+    import tempfile
+    import pelican as PELICAN
+
+    elements = elements_frame( rows, body )
+    elements['id'] = [ f'{n:08x}!section {n % 50}!notebook {n % 5}' for n in range(rows) ]
+
+    result = { 'rows': rows, 'workers': workers }
+
+    with tempfile.TemporaryDirectory() as legacy_folder, tempfile.TemporaryDirectory() as batch_folder:
+        start = time.perf_counter()
+        _legacy_pelican_write( legacy_folder, elements.copy() )
+        result['legacy'] = round( time.perf_counter() - start, 2 )
+
+        start = time.perf_counter()
+        PELICAN.write( batch_folder, elements.copy(), workers=workers )
+        result['batch'] = round( time.perf_counter() - start, 2 )
+
+        legacy_files = _tree( os.path.join( legacy_folder, 'pelican' ) )
+        batch_files = _tree( os.path.join( batch_folder, 'pelican' ) )
+
+    result['files'] = len(batch_files)
+    result['speedup'] = round( result['legacy'] / result['batch'], 2 )
+    result['ok'] = legacy_files == batch_files
+
+    return result
+
+# #####################################################################################################################################################################################################
+# MAIN
+# #####################################################################################################################################################################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="mind benchmarks.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        '--save', action='store_true', dest='save',
+        help=f'append the result to {os.path.basename(BENCHMARKS)}')
+
+    subparsers = parser.add_subparsers( dest='benchmark', required=True )
+
+    sub = subparsers.add_parser( 'importtime', help='import time of a module (python -X importtime)' )
+    sub.add_argument( '--module', default='mind', help='module to import' )
+    sub.add_argument( '--top', type=int, default=20, help='number of top level imports to show' )
+
+    sub = subparsers.add_parser( 'sanitize', help='html sanitizer throughput and equivalence with the former clean loops' )
+    sub.add_argument( '--paragraphs', type=int, default=2000, help='paragraphs of the generated OneNote page' )
+    sub.add_argument( '--repeat', type=int, default=5, help='runs, the best one is kept' )
+    sub.add_argument( '--file', default=None, help='html page to use instead of the generated one' )
+
+    sub = subparsers.add_parser( 'slug', help='slugify throughput and equivalence with the former mytools.slugify' )
+    sub.add_argument( '--titles', type=int, default=50000, help='titles to slugify' )
+    sub.add_argument( '--distinct', type=int, default=5000, help='distinct titles among them' )
+
+    sub = subparsers.add_parser( 'topics', help='memory kept per iThoughts topic and hierarchy time, Topic records against attrib dicts' )
+    sub.add_argument( '--topics', type=int, default=1000, help='topics of the generated map (the legacy hierarchy is quadratic)' )
+
+    sub = subparsers.add_parser( 'pelican', help='pelican.write against the former row by row writer' )
+    sub.add_argument( '--rows', type=int, default=20000, help='elements in the table' )
+    sub.add_argument( '--body', type=int, default=2000, help='mean html body size in bytes' )
+    sub.add_argument( '--workers', type=int, default=None, help='writer threads' )
+
+    sub = subparsers.add_parser( 'export', help='element table export: excel, excel constant_memory, parquet, feather' )
+    sub.add_argument( '--rows', type=int, default=100000, help='elements in the table' )
+    sub.add_argument( '--body', type=int, default=20000, help='mean html body size in bytes' )
+    sub.add_argument( '--formats', default='excel,excel-streaming,parquet,parquet-nobody,feather', help='comma separated formats' )
+
+    args = parser.parse_args()
+
+    if args.benchmark in ['importtime']:
+        result = importtime( args.module, args.top )
+
+    elif args.benchmark in ['sanitize']:
+        result = sanitize( args.paragraphs, args.repeat, args.file )
+
+    elif args.benchmark in ['slug']:
+        result = slug( args.titles, args.distinct )
+
+    elif args.benchmark in ['topics']:
+        result = topics( args.topics )
+
+    elif args.benchmark in ['pelican']:
+        result = pelican( args.rows, args.body, args.workers )
+
+    elif args.benchmark in ['export']:
+        result = export( args.rows, args.body, args.formats.split(',') )
+
+    print( json.dumps( result, indent=2 ) )
+
+    if args.save: _save( args.benchmark, result )
+
+    # equivalence checks fail the run
+    if result.get('ok') is False: sys.exit(1)
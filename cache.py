@@ -0,0 +1,120 @@
+# #####################################################################################################################################################################################################
+# Filename:     cache.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# In-process caches shared by the sources and the web server
+# -----------------------------------------------------------
+#   TTLCache    entries expire after ttl seconds
+#   LRUCache    least recently used entries are evicted once the cached values exceed max_bytes
+#               an entry can carry a validator (ex: file mtime and size) and is dropped when it no longer matches
+#
+#   CACHES      every cache created, for the hit / miss metrics (see metrics.py)
+#
+# #####################################################################################################################################################################################################
+
+import time
+import weakref
+import threading
+
+from collections import OrderedDict
+
+CACHES = weakref.WeakSet()
+
+# #####################################################################################################################################################################################################
+# TTLCACHE
+# #####################################################################################################################################################################################################
+
+class TTLCache:
+
+    def __init__( self, ttl=300, name='cache' ):
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        CACHES.add( self )
+
+    def get( self, key, default=None ):
+        with self._lock:
+            entry = self._entries.get( key )
+            if entry and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            if entry: del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set( self, key, value, ttl=None ):
+        with self._lock:
+            self._entries[key] = ( time.monotonic() + (self.ttl if ttl is None else ttl), value )
+
+    def invalidate( self, match=None ):
+        # match: None to clear all, or a callable( key ) returning True for the entries to drop
+        with self._lock:
+            if match is None:
+                self._entries.clear()
+            else:
+                for key in [ key for key in self._entries if match( key ) ]:
+                    del self._entries[key]
+
+    def __len__( self ):
+        return len(self._entries)
+
+# #####################################################################################################################################################################################################
+# LRUCACHE
+# #####################################################################################################################################################################################################
+
+class LRUCache:
+
+    def __init__( self, max_bytes=64*1024*1024, name='cache', sizeof=len ):
+        self.max_bytes = max_bytes
+        self.name = name
+        self.sizeof = sizeof
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        CACHES.add( self )
+
+    def get( self, key, validator=None, default=None ):
+        with self._lock:
+            entry = self._entries.get( key )
+            if entry and entry[0] == validator:
+                self._entries.move_to_end( key )
+                self.hits += 1
+                return entry[1]
+            if entry: self._drop( key )
+            self.misses += 1
+            return default
+
+    def set( self, key, value, validator=None ):
+        size = self.sizeof( value )
+        with self._lock:
+            if key in self._entries: self._drop( key )
+            # a value larger than the whole cache is not kept
+            if size > self.max_bytes: return
+            self._entries[key] = ( validator, value, size )
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop( next(iter(self._entries)) )
+
+    def invalidate( self, key ):
+        with self._lock:
+            if key in self._entries: self._drop( key )
+
+    def clear( self ):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _drop( self, key ):
+        self.bytes -= self._entries.pop( key )[2]
+
+    def __len__( self ):
+        return len(self._entries)
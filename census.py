@@ -0,0 +1,151 @@
+# #####################################################################################################################################################################################################
+# Filename:     census.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Tags and attributes census
+# --------------------------
+#   computed once when a note is converted and stored with the note metadata in main.html
+#       <meta mind="census" content='{"tag": ["attribute", ...], ...}'>
+#
+#   /stats/tags aggregates the census of all notes
+#
+#   rebuild the census of an existing output tree:
+#       python3 census.py [output] [--processes N]
+#   the rewritten main.html get their new hash in [output]/.manifest.json (ETags, site sync)
+#
+# #####################################################################################################################################################################################################
+
+import os
+import sys
+import json
+import argparse
+
+from multiprocessing import Pool
+
+from manifest import get_manifest, hash_bytes
+
+# #####################################################################################################################################################################################################
+# TAG_CENSUS
+# #####################################################################################################################################################################################################
+# census = { tag: [attributes] } in order of appearance
+
+def tag_census( soup ):
+    census = {}
+    for tag in soup.find_all():
+        attrs = census.setdefault( tag.name, {} )
+        for attr in tag.attrs:
+            attrs[attr] = None
+    return { name: list(attrs) for name, attrs in census.items() }
+
+# #####################################################################################################################################################################################################
+# ADD / READ CENSUS
+# #####################################################################################################################################################################################################
+
+def add_census( soup ):
+    # remove previous census so it does not count itself
+    for tag in soup.find_all("meta", {"mind":"census"}):
+        tag.decompose()
+
+    census = tag_census( soup )
+
+    if soup.head:
+        metatag = soup.new_tag('meta')
+        metatag.attrs['content'] = json.dumps( census, separators=(',', ':') )
+        metatag.attrs['mind'] = 'census'
+        soup.head.append(metatag)
+
+    return census
+
+def read_census( soup ):
+    tag = soup.find("meta", {"mind":"census"})
+    return parse_census( tag["content"] if tag else None )
+
+def parse_census( content ):
+    try:
+        return json.loads( content ) if content else None
+    except ValueError:
+        return None
+
+# #####################################################################################################################################################################################################
+# MERGE
+# #####################################################################################################################################################################################################
+
+def merge( total, census ):
+    for name, attrs in (census or {}).items():
+        known = total.setdefault( name, [] )
+        known += [ attr for attr in attrs if attr not in known ]
+    return total
+
+# #####################################################################################################################################################################################################
+# REBUILD
+# #####################################################################################################################################################################################################
+# the worker processes rewrite the files and send their hash back, the parent keeps the manifest (as convert --jobs)
+
+def _rebuild_file( file ):
+    from bs4 import BeautifulSoup
+
+    try:
+        with open(file, 'r', encoding='utf-8') as f:
+            soup = BeautifulSoup( f.read(), features="html.parser" )
+
+        census = add_census( soup )
+
+        data = str(soup).encode('utf-8')
+        with open(file, 'wb') as f:
+            f.write( data )
+
+        return file, census, hash_bytes( data ), None
+
+    except:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        return file, None, None, "{} - {}".format(exc_type, exc_obj)
+
+def rebuild( directory, processes=None ):
+
+    files = [ os.path.join(root, 'main.html') for root, subdirs, filenames in os.walk(directory) if 'main.html' in filenames ]
+
+    total = {}
+    errors = []
+    manifest = get_manifest( directory )
+
+    with Pool( processes=processes ) as pool:
+        for file, census, digest, error in pool.imap_unordered( _rebuild_file, files, chunksize=16 ):
+            if error: errors += [ f'{file}: {error}' ]
+            else:
+                merge( total, census )
+                manifest.record( os.path.abspath(file), digest )
+
+    manifest.save()
+
+    return { 'files': len(files), 'errors': errors, 'census': total }
+
+# #####################################################################################################################################################################################################
+# MAIN
+# #####################################################################################################################################################################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Rebuild the tags and attributes census of converted notes.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        'output', nargs='?', default=os.path.join( os.path.dirname(os.path.abspath(__file__)), 'output'),
+        help='output folder')
+
+    parser.add_argument(
+        '--processes', type=int, default=None, dest='processes',
+        help='worker processes (default: one per cpu)')
+
+    args = parser.parse_args()
+
+    result = rebuild( args.output, processes=args.processes )
+
+    print( json.dumps( result, indent=2 ) )
+
+    sys.exit( 1 if len(result['errors']) > 0 else 0 )
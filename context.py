@@ -0,0 +1,137 @@
+# #####################################################################################################################################################################################################
+# Filename:     context.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Conversion context
+# ------------------
+#   everything a conversion needs, passed along the pipeline instead of module globals
+#   a context is created per web request or per command line run and handed over to the job it starts,
+#   so concurrent requests and jobs never share mutable state
+#
+#   output_root     output/ folder, each source writes below [output_root]/[source]
+#   itmz_source     folder scanned for .itmz maps
+#   job             jobs.Job reporting progress, None when nobody follows the conversion
+#   stats           counters of the conversion, also sent to the job
+#   recorder        timed spans of the conversion stages (see instrument.py)
+#   trace           Chrome trace of the spans: json file, or folder for one file per run (MIND_TRACE by default)
+#   http            requests.Session reused for the Graph calls of the conversion (created when first used)
+#   notesapp        macnotesapp.NotesApp (created when first used, macOS only)
+#
+# #####################################################################################################################################################################################################
+
+import os
+
+from datetime import datetime as dt
+
+import output as OUTPUT
+
+import instrument
+
+from instrument import Recorder, print_report
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+ITMZ_SOURCE = os.path.join( os.sep, 'Users', 'lburais', 'Library', 'Mobile Documents', 'iCloud~com~toketaware~ios~ithoughts', 'Documents' )
+
+# #####################################################################################################################################################################################################
+# CONTEXT
+# #####################################################################################################################################################################################################
+
+class Context:
+
+    def __init__( self, output_root=None, itmz_source=None, job=None, trace=None ):
+        self.output_root = os.path.abspath( output_root or OUTPUT.OUTPUT_ROOT )
+        self.itmz_source = itmz_source or ITMZ_SOURCE
+        self.job = job
+        self.trace = trace or instrument.TRACE
+        self.stats = {}
+        self.recorder = Recorder( trace=bool(self.trace) )
+        self._http = None
+        self._notesapp = None
+
+    def folder( self, source ):
+        return os.path.join( self.output_root, source )
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # CLIENTS
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+    @property
+    def http( self ):
+        if self._http is None:
+            import requests
+            self._http = requests.Session()
+        return self._http
+
+    @property
+    def notesapp( self ):
+        if self._notesapp is None:
+            from macnotesapp import NotesApp
+            self._notesapp = NotesApp()
+        return self._notesapp
+
+    def close( self ):
+        if self._http is not None: self._http.close()
+        self._http = None
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # OUTPUT
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+    def write( self, path, data ):
+        return OUTPUT.write_file( path, data, root=self.output_root )
+
+    def save_manifest( self ):
+        OUTPUT.save_manifest( root=self.output_root )
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # STATS
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # same calls as jobs.Job, kept in stats and forwarded to the job when there is one
+
+    def count( self, counter, n=1 ):
+        self.stats[counter] = self.stats.get(counter, 0) + n
+        if self.job: self.job.count( counter, n )
+
+    def set( self, counter, value ):
+        self.stats[counter] = value
+        if self.job: self.job.set( counter, value )
+
+    def error( self, message ):
+        self.stats.setdefault( 'errors', [] ).append( message )
+        if self.job: self.job.error( message )
+
+    def add_total( self, n ):
+        if self.job: self.job.add_total( n )
+
+    def progress( self, item, n=1 ):
+        if self.job: self.job.progress( item, n )
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # SPANS
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+    def span( self, name, **args ):
+        return self.recorder.span( name, **args )
+
+    def report( self, title='TIMINGS' ):
+        # print the span report of the run, keep it with the job and save the trace
+        report = self.recorder.report()
+        print_report( report, title )
+        if self.job: self.job.report = report
+        self.export_trace()
+        return report
+
+    def export_trace( self ):
+        if not self.trace: return None
+        file = self.trace
+        if not file.endswith('.json'):
+            name = f'job-{self.job.id}' if self.job else f'run-{os.getpid()}'
+            file = os.path.join( file, f'{name}-{dt.now().strftime("%Y%m%d_%H%M%S")}.trace.json' )
+        return self.recorder.export_trace( file )
@@ -0,0 +1,268 @@
+# #####################################################################################################################################################################################################
+# Filename:     convert.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Headless batch conversion
+# -------------------------
+#   python3 -m mind convert itmz    [--only <glob>] [--jobs N] [--incremental] [--output <folder>] [--profile <file>] [--parquet [parquet|feather]]
+#   python3 -m mind convert onenote [--only <notebook/section/page glob>] [--incremental] [--output <folder>] [--profile <file>] [--parquet [parquet|feather]]
+#
+#   --only          itmz: maps whose name or path matches the glob
+#                   onenote: notebook[/section group][/section][/page] globs, as the select of the web page
+#   --jobs          itmz maps converted by N processes in parallel (onenote pages are fetched one by one)
+#   --incremental   only convert what changed since the last conversion
+#   --output        output folder instead of output/
+#   --profile       run under cProfile, stats dumped to the file and top functions printed
+#   --tracemalloc   trace memory allocations, peak and top allocations printed
+#   --trace         Chrome trace of every stage (fetch, topic, write, throttling waits...) saved in the json file, for Perfetto
+#                   MIND_PROFILE=cpu|memory|all does the same without the options (see instrument.py)
+#   --parquet       element table of the converted source (one row per note, see ir.py) saved as [output]/jamstack_[source]_[timestamp].parquet
+#                   --parquet feather saves it as arrow ipc instead (see mypandas.save_parquet)
+#
+#   a json summary with the timing of each map or page and the stage spans (count, total, p50, p99) is printed on stdout
+#   everything else the converters print goes to stderr, stdout only carries the summary: python3 -m mind convert itmz | jq .
+#   exit code is 1 when something failed (onenote: also when there is no token)
+#
+#   onenote needs a token: sign in once on the web page with MIND_TOKEN_CACHE set, or reuse ~/.mind/token_cache.json
+#
+# #####################################################################################################################################################################################################
+
+import os
+import sys
+import json
+import time
+
+from contextlib import redirect_stdout
+
+from fnmatch import fnmatch
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from datetime import datetime as dt
+
+from jobs import Job, RUNNING, DONE, FAILED
+
+from context import Context
+
+from manifest import get_manifest
+
+from instrument import profiling
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+SOURCES = [ 'itmz', 'onenote' ]
+
+# #####################################################################################################################################################################################################
+# ARGUMENTS
+# #####################################################################################################################################################################################################
+
+def add_arguments( parser ):
+
+    parser.add_argument(
+        'source', choices=SOURCES,
+        help='source to convert')
+
+    parser.add_argument(
+        '--only', dest='only', default=None,
+        help='glob of the maps (itmz) or notebook/section/page (onenote) to convert')
+
+    parser.add_argument(
+        '--jobs', type=int, dest='jobs', default=1,
+        help='parallel processes (itmz)')
+
+    parser.add_argument(
+        '--incremental', action='store_true', dest='incremental',
+        help='only convert what changed since the last conversion')
+
+    parser.add_argument(
+        '--output', dest='output', default=None,
+        help='output folder (default: output/)')
+
+    parser.add_argument(
+        '--profile', dest='profile', default=None,
+        help='cProfile stats file')
+
+    parser.add_argument(
+        '--trace', dest='trace', default=None,
+        help='Chrome trace json file')
+
+    parser.add_argument(
+        '--tracemalloc', action='store_true', dest='tracemalloc',
+        help='trace memory allocations')
+
+    parser.add_argument(
+        '--parquet', nargs='?', const='parquet', choices=['parquet', 'feather'], dest='parquet', default=None,
+        help='save the element table of the source as parquet (or feather)')
+
+# #####################################################################################################################################################################################################
+# RUN
+# #####################################################################################################################################################################################################
+# return the exit code
+
+def run( args ):
+
+    start = time.monotonic()
+
+    # no option: MIND_PROFILE decides
+    mode = ','.join( [ mode for mode, on in [ ('cpu', args.profile), ('memory', args.tracemalloc) ] if on ] ) or None
+
+    # the converters print their progress, stdout is kept for the summary
+    with redirect_stdout( sys.stderr ):
+        with profiling( f'convert-{args.source}', mode=mode, file=args.profile ):
+            summary = _convert( args )
+
+    summary['seconds'] = round( time.monotonic() - start, 3 )
+
+    print( json.dumps( summary, indent=2 ) )
+
+    return 1 if summary['errors'] else 0
+
+def _convert( args ):
+    context = Context( output_root=args.output, trace=args.trace )
+    if args.source in ['itmz']:
+        summary = convert_itmz( context, only=args.only, jobs=args.jobs, incremental=args.incremental )
+    else:
+        summary = convert_onenote( context, only=args.only, incremental=args.incremental )
+    if args.parquet: summary['table'] = save_table( context, args.source, args.parquet )
+    summary['trace'] = context.export_trace()
+    return summary
+
+# #####################################################################################################################################################################################################
+# TABLE
+# #####################################################################################################################################################################################################
+# element table of the notes of a source (see ir.py, parsed notes are cached) saved with mypandas.save_parquet
+# return the file saved, None when nothing was saved
+
+def save_table( context, source, format='parquet' ):
+    import pandas as pd
+    from ir import notes
+    from mypandas import save_parquet
+
+    elements = pd.DataFrame( [ { **note.element(), 'body': note.body } for note in notes( context.output_root, source ) ] )
+    if len(elements) == 0: return None
+
+    timestamp = save_parquet( context.output_root, elements, source, format=format )
+
+    file = os.path.join( context.output_root, 'jamstack_{}_{}.{}'.format( source, timestamp, format ) )
+    return file if os.path.isfile( file ) else None
+
+# #####################################################################################################################################################################################################
+# ITMZ
+# #####################################################################################################################################################################################################
+
+def convert_itmz( context, only=None, jobs=1, incremental=False ):
+    import itmz
+
+    maps = [ m['file'] for m in itmz.list_maps( context.itmz_source ) ]
+    if only:
+        maps = [ file for file in maps if fnmatch( os.path.basename(file), only ) or fnmatch( os.path.splitext(os.path.basename(file))[0], only ) or fnmatch( file, only ) ]
+
+    print( f'Converting {len(maps)} maps with {jobs} process{"es" if jobs > 1 else ""}.', file=sys.stderr )
+
+    items = []
+    manifest = get_manifest( context.output_root )
+
+    if jobs > 1:
+        # each process writes its own maps, the parent keeps the manifest
+        with ProcessPoolExecutor( max_workers=jobs ) as executor:
+            futures = [ executor.submit( _convert_itmz, file, context.output_root, not incremental, context.recorder.trace ) for file in maps ]
+            for future in as_completed( futures ):
+                item, entries, recorder = future.result()
+                manifest.merge( entries )
+                context.recorder.merge( *recorder )
+                items += [ item ]
+    else:
+        for file in maps:
+            item, entries, recorder = _convert_itmz( file, context.output_root, not incremental, context.recorder.trace )
+            context.recorder.merge( *recorder )
+            items += [ item ]
+
+    context.save_manifest()
+
+    items.sort( key=lambda item: item['item'] )
+
+    return _summary( context, 'itmz', items )
+
+def _convert_itmz( file, root, force, trace=False ):
+    # runs in a worker process: it gets its own context, its spans are sent back to the parent
+    with redirect_stdout( sys.stderr ):
+        return _convert_map( file, root, force, trace )
+
+def _convert_map( file, root, force, trace=False ):
+    import itmz
+
+    job = Job( f'itmz:{file}' )
+    job.set_status( RUNNING )
+
+    context = Context( output_root=root, job=job )
+    context.recorder.trace = trace
+
+    start = time.monotonic()
+    itmz._download_itmz( context, file, force=force )
+    seconds = time.monotonic() - start
+
+    job.set_status( FAILED if job.errors else DONE )
+
+    out_dir = os.path.join( context.folder('itmz'), '[itmz] ' + os.path.splitext(os.path.basename(file))[0] )
+    entries = get_manifest( root ).entries_below( out_dir ) if os.path.isdir( out_dir ) else {}
+
+    return { 'item': file, 'seconds': round(seconds, 3), 'status': 'skipped' if job.counters.get('files_skipped') else job.status,
+             'topics': job.counters.get('topics', 0), 'bytes': job.counters.get('bytes', 0), 'errors': list(job.errors) }, entries, ( context.recorder.samples, context.recorder.events, context.recorder.threads )
+
+# #####################################################################################################################################################################################################
+# ONENOTE
+# #####################################################################################################################################################################################################
+
+def convert_onenote( context, only=None, incremental=False ):
+    import onenote
+
+    job = Job( 'onenote:cli' )
+    job.set_status( RUNNING )
+
+    select = [ part for part in only.split('/') if part ] if only else None
+
+    # without a token every Graph request is skipped: the run would end with nothing converted and no error
+    if _has_token( onenote ):
+        onenote._download_notebooks( context, select=select, force=not incremental, job=job )
+    else:
+        job.error( f'Not logged in: no token in {onenote.TOKEN_CACHE_FILE}, sign in once on the web page with MIND_TOKEN_CACHE set.' )
+
+    job.set_status( FAILED if job.errors else DONE )
+
+    items = [ { 'item': item, 'seconds': seconds } for item, seconds in job.timings ]
+
+    summary = _summary( context, 'onenote', items )
+    summary['counters'] = dict(job.counters)
+    summary['errors'] = list(job.errors)
+
+    return summary
+
+def _has_token( onenote ):
+    import microsoft_config
+    try:
+        return bool( onenote._get_token_from_cache( microsoft_config.SCOPE ) )
+    except:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        print( "Something went wrong [{} - {}] reading the token from {}.".format(exc_type, exc_obj, onenote.TOKEN_CACHE_FILE) )
+        return False
+
+# #####################################################################################################################################################################################################
+# SUMMARY
+# #####################################################################################################################################################################################################
+
+def _summary( context, source, items ):
+    return {
+        'source': source,
+        'date': dt.now().isoformat(timespec='seconds'),
+        'output': context.output_root,
+        'items': items,
+        'spans': context.recorder.report(),
+        'converted': len( [ item for item in items if item.get('status', DONE) in [DONE] ] ),
+        'skipped': len( [ item for item in items if item.get('status') in ['skipped'] ] ),
+        'errors': [ error for item in items for error in item.get('errors', []) ],
+    }
@@ -0,0 +1,63 @@
+# ###################################################################################################################################################
+# Filename:     hugo.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# ###################################################################################################################################################
+# Hugo structure
+# --------------
+#   content
+#   ├── [source]
+#   |   ├── [note 1] == branch bundle
+#   |   |   ├── _index.html == note 1 page (front matter + body)
+#   |   |   ├── images
+#   |   |   |   └── [image 1] --> images/[image 1]
+#   |   |   ├── attachments
+#   |   |   |   └── [attachment 1] --> attachments/[attachment 1]
+#   |   |   └── [note 1.1] --> branch bundle of a child note
+#   |   |       └── _index.html
+#   |   └── [note 2]
+#   |       └── _index.html
+#   └── config.toml
+#
+#   a note keeps its folder and its resources keep their relative references, no link to rewrite
+# ###################################################################################################################################################
+
+import os
+import json
+
+# front matter name: element column
+MAPPING = {
+    'title': 'title',
+    'slug': 'slug',
+    'date': 'created',
+    'lastmod': 'modified',
+    'author': 'authors',
+    'type': 'type',
+}
+
+# ###################################################################################################################################################
+# FRONT MATTER
+# ###################################################################################################################################################
+# yaml front matter, values as json strings (valid yaml scalars)
+
+def front_matter( element ):
+    text = '---\n'
+    for key, val in MAPPING.items():
+        if element.get(val): text += '{}: {}\n'.format( key, json.dumps( str(element[val]), ensure_ascii=False ) )
+    text += '---\n'
+    return text
+
+# ###################################################################################################################################################
+# EMIT
+# ###################################################################################################################################################
+# note IR (see ir.py) -> content/[source]/[hierarchy]/[note]/_index.html, the note resources next to it
+
+def emit( note ):
+    folder = os.path.join( 'content', note.source, *note.hierarchy, os.path.basename( note.folder ) )
+
+    text = front_matter( note.element() ) + note.body
+
+    return { os.path.join( folder, '_index.html' ): text }, { os.path.join( folder, ref ): path for ref, path in note.resource_files().items() }
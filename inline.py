@@ -0,0 +1,112 @@
+# #####################################################################################################################################################################################################
+# Filename:     inline.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Inline images
+# -------------
+#   data_uri( path )    "data:[mime];base64,[data]" for an image file
+#                       cached by path and validated by size and mtime, in an LRU bounded by the encoded bytes
+#                       the mime type is sniffed from the first chunk (python-magic, else the file extension)
+#                       the file is encoded chunk by chunk, never read whole
+#
+#   inline_images( soup, folder )
+#                       <img src="images/x.png"> below folder become data uris
+#                       images larger than INLINE_MAX_BYTES are linked (file:// uri) or left as they are
+#
+#   MIND_INLINE_MAX     max image size in bytes to inline (default 2 MB)
+#
+# #####################################################################################################################################################################################################
+
+import os
+import base64
+import pathlib
+import mimetypes
+
+from cache import LRUCache
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+INLINE_MAX_BYTES = int( os.environ.get( 'MIND_INLINE_MAX', 2 * 1024 * 1024 ) )
+INLINE_CACHE_BYTES = 64 * 1024 * 1024
+INLINE_CHUNK = 3 * 64 * 1024      # multiple of 3: chunks encode without padding and can be joined
+
+inline_cache = LRUCache( max_bytes=INLINE_CACHE_BYTES, name='inline', sizeof=len )
+
+_magic = None
+
+def _sniff( path, head ):
+    global _magic
+
+    if _magic is None:
+        try:
+            import magic  # python-magic
+            _magic = magic
+        except ImportError:
+            _magic = False
+
+    if _magic and head:
+        try:
+            return _magic.from_buffer( head, mime=True )
+        except Exception:
+            pass
+
+    return mimetypes.guess_type( path )[0] or 'application/octet-stream'
+
+# #####################################################################################################################################################################################################
+# DATA_URI
+# #####################################################################################################################################################################################################
+# return None when the file is missing or larger than max_bytes
+
+def data_uri( path, max_bytes=None ):
+    max_bytes = INLINE_MAX_BYTES if max_bytes is None else max_bytes
+
+    try:
+        stat = os.stat( path )
+    except OSError:
+        return None
+
+    if stat.st_size > max_bytes: return None
+
+    validator = ( stat.st_size, stat.st_mtime_ns )
+
+    uri = inline_cache.get( path, validator )
+    if uri is None:
+        parts = []
+        with open(path, 'rb') as f:
+            head = f.read( INLINE_CHUNK )
+            mime = _sniff( path, head )
+            chunk = head
+            while chunk:
+                parts += [ base64.b64encode( chunk ).decode('ascii') ]
+                chunk = f.read( INLINE_CHUNK )
+        uri = f'data:{mime};base64,' + ''.join( parts )
+        inline_cache.set( path, uri, validator )
+
+    return uri
+
+# #####################################################################################################################################################################################################
+# INLINE_IMAGES
+# #####################################################################################################################################################################################################
+# oversize: 'link' = file:// uri to the image, 'skip' = src left as it is
+
+def inline_images( soup, folder, max_bytes=None, oversize='link' ):
+    for img in soup.find_all('img'):
+        src = img.attrs.get('src')
+        if not src or src.startswith('data:') or '://' in src: continue
+
+        img_path = os.path.join( folder, src )
+        if not os.path.isfile( img_path ): continue
+
+        uri = data_uri( img_path, max_bytes )
+        if uri:
+            img.attrs['src'] = uri
+        elif oversize in ['link']:
+            img.attrs['src'] = pathlib.Path( os.path.abspath(img_path) ).as_uri()
+
+    return soup
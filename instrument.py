@@ -0,0 +1,198 @@
+# #####################################################################################################################################################################################################
+# Filename:     instrument.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Instrumentation
+# ---------------
+#   Recorder    named spans timed around the conversion stages, one recorder per run (context.recorder)
+#                   with context.span( 'itmz.markdown' ):
+#                       ...
+#               report() aggregates them: { name: { count, total, p50, p99 } } in seconds
+#
+#               with trace=True every span is also kept as a Chrome trace event (process and thread ids, arguments)
+#               export_trace( file ) writes them as Trace Event JSON, to open in https://ui.perfetto.dev or chrome://tracing
+#                   MIND_TRACE=<folder>     traces of the web server jobs are written there
+#                   python3 -m mind convert ... --trace <file>
+#
+#   profiling   opt-in cProfile and / or tracemalloc around a run
+#                   MIND_PROFILE=cpu|memory|all     for the jobs of the web server and the command line
+#                   python3 -m mind convert ... --profile <file> --tracemalloc
+#               cpu stats are dumped to MIND_PROFILE_DIR/[name].prof (or the given file) and the top functions printed
+#               memory prints the top allocations and the peak
+#
+# #####################################################################################################################################################################################################
+
+import os
+import sys
+import json
+import time
+import threading
+
+from contextlib import contextmanager
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+TRACE = os.environ.get( 'MIND_TRACE' ) or None
+
+PROFILE = os.environ.get( 'MIND_PROFILE', '' ).lower()
+PROFILE_DIR = os.environ.get( 'MIND_PROFILE_DIR', '.' )
+PROFILE_TOP = 20
+
+# cProfile and tracemalloc are process wide: one profiled run at a time
+_profile_lock = threading.Lock()
+
+# #####################################################################################################################################################################################################
+# RECORDER
+# #####################################################################################################################################################################################################
+
+class Recorder:
+
+    def __init__( self, trace=False ):
+        self.trace = trace
+        self.samples = {}
+        self.events = []
+        self.threads = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span( self, name, **args ):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record( name, start, **args )
+
+    def record( self, name, start, end=None, **args ):
+        # span from start (time.perf_counter) to end or now, for code that cannot be wrapped in span()
+        end = time.perf_counter() if end is None else end
+        self.add( name, end - start )
+        if self.trace: self._event( name, start, end, args )
+
+    def add( self, name, seconds ):
+        with self._lock:
+            self.samples.setdefault( name, [] ).append( seconds )
+
+    def merge( self, samples, events=None, threads=None ):
+        # samples (and trace events) of another recorder (ex: convert --jobs workers)
+        with self._lock:
+            for name, values in (samples or {}).items():
+                self.samples.setdefault( name, [] ).extend( values )
+            self.events += events or []
+            self.threads.update( threads or {} )
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # TRACE
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # complete events ('X'), timestamps in microseconds of time.perf_counter (same clock for all processes of the host)
+
+    def _event( self, name, start, end, args ):
+        pid = os.getpid()
+        tid = threading.get_ident()
+        event = { 'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+                  'ts': round( start * 1e6, 1 ), 'dur': round( (end - start) * 1e6, 1 ) }
+        if args: event['args'] = { key: str(value) for key, value in args.items() }
+        with self._lock:
+            self.events.append( event )
+            if (pid, tid) not in self.threads: self.threads[(pid, tid)] = threading.current_thread().name
+
+    def export_trace( self, file ):
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+
+        metadata = [ { 'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': { 'name': f'mind [{pid}]' } } for pid in sorted( set( pid for pid, tid in threads ) ) ]
+        metadata += [ { 'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': { 'name': name } } for (pid, tid), name in threads.items() ]
+
+        os.makedirs( os.path.dirname( os.path.abspath(file) ), exist_ok=True )
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump( { 'traceEvents': metadata + sorted( events, key=lambda event: event['ts'] ), 'displayTimeUnit': 'ms' }, f )
+
+        print( f'{len(events)} trace events saved in {file}' )
+        return file
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # REPORT
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+    def report( self ):
+        with self._lock:
+            samples = { name: sorted(values) for name, values in self.samples.items() }
+
+        return { name: { 'count': len(values),
+                         'total': round( sum(values), 6 ),
+                         'p50': round( percentile( values, 50 ), 6 ),
+                         'p99': round( percentile( values, 99 ), 6 ) }
+                 for name, values in sorted( samples.items() ) }
+
+def percentile( values, q ):
+    # values sorted, nearest rank
+    if len(values) == 0: return 0.0
+    rank = max( 1, -(-q * len(values) // 100) )
+    return values[ int(rank) - 1 ]
+
+def print_report( report, title='TIMINGS' ):
+    if not report: return
+    width = max( len(name) for name in report )
+    print( f'{title} {"-"*(80-1-len(title))}' )
+    print( f'{"span":<{width}} {"count":>8} {"total s":>10} {"p50 ms":>10} {"p99 ms":>10}' )
+    for name, span in sorted( report.items(), key=lambda item: item[1]['total'], reverse=True ):
+        print( f'{name:<{width}} {span["count"]:>8} {span["total"]:>10.3f} {span["p50"]*1000:>10.2f} {span["p99"]*1000:>10.2f}' )
+
+# #####################################################################################################################################################################################################
+# PROFILING
+# #####################################################################################################################################################################################################
+# mode: 'cpu', 'memory', 'all' (or 'cpu,memory'), '' for none
+
+@contextmanager
+def profiling( name='mind', mode=None, file=None ):
+    mode = PROFILE if mode is None else (mode or '').lower()
+    cpu = any( m in mode for m in ['cpu', 'all', '1'] )
+    memory = any( m in mode for m in ['memory', 'all', '1'] )
+
+    if not cpu and not memory:
+        yield
+        return
+
+    if not _profile_lock.acquire( blocking=False ):
+        print( f'{name}: not profiled, another run is being profiled', file=sys.stderr )
+        yield
+        return
+
+    if cpu:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    if memory:
+        import tracemalloc
+        tracemalloc.start()
+
+    try:
+        yield
+
+    finally:
+        try:
+            if cpu:
+                import pstats
+                profiler.disable()
+                file = file or os.path.join( PROFILE_DIR, f'{name.replace(os.sep, "_").replace(":", "_")}.prof' )
+                profiler.dump_stats( file )
+                print( f'cpu profile saved in {file}', file=sys.stderr )
+                pstats.Stats( profiler, stream=sys.stderr ).sort_stats( 'cumulative' ).print_stats( PROFILE_TOP )
+
+            if memory:
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print( f'memory: current {current/1024/1024:.1f} MB, peak {peak/1024/1024:.1f} MB', file=sys.stderr )
+                for stat in snapshot.statistics( 'lineno' )[:PROFILE_TOP]:
+                    print( f'  {stat}', file=sys.stderr )
+
+        finally:
+            _profile_lock.release()
@@ -0,0 +1,325 @@
+# #####################################################################################################################################################################################################
+# Filename:     ir.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Note IR
+# -------
+#   the sources (itmz, onenote, notes) write one main.html per note, the static site generators are fed from them
+#   a main.html is parsed once into a Note: metadata, hierarchy, cleaned body and resources
+#   the parsed part is cached on disk by content hash (see manifest.py), an unchanged note is never parsed again
+#
+#       [output]/.ir/[sha256 of main.html].json     { "meta": {...}, "body": "...", "resources": [...] }
+#
+#   emitters turn a Note into files, all of them in the same pass over the notes
+#       main        [site]/main/[source]/[hierarchy]/[note]/main.html
+#       pelican     [site]/pelican/content/[type]s/[hierarchy]/[slug].html       (pelican.emit)
+#       nikola      [site]/nikola/[type]s/[source]/[hierarchy]/[slug].html + files/objects   (nikola.emit)
+#       hugo        [site]/hugo/content/[hierarchy]/[note]/_index.html            (hugo.emit)
+#
+#   an emitter returns ( { relative path: text }, { relative path: resource file to copy } )
+#   the site folders are synced, not rebuilt: only changed files are written, orphans are deleted (see sync.py)
+#
+#   python3 ir.py [output] --site [site] --to pelican,nikola,hugo [--source itmz]
+#
+# #####################################################################################################################################################################################################
+
+import os
+import sys
+import json
+import argparse
+
+from manifest import get_manifest
+
+import slug as SLUG
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+IR_FOLDER = '.ir'
+IR_VERSION = 1      # bump when parse() changes, older cache files are parsed again
+
+EMITTERS = {
+    'main': 'ir',
+    'pelican': 'pelican',
+    'nikola': 'nikola',
+    'hugo': 'hugo',
+}
+
+# tags and attributes pointing to the note resources (images/, attachments/)
+RESOURCE_ATTRS = { 'img': 'src', 'object': 'data', 'embed': 'src', 'source': 'src', 'a': 'href' }
+
+# <meta mind> names of the sources -> note fields
+META_ID = [ 'uuid', 'id' ]
+META_CREATED = [ 'created', 'createdDateTime' ]
+META_MODIFIED = [ 'modified', 'lastModifiedDateTime' ]
+META_AUTHORS = [ 'author', 'authors' ]
+
+def _first( meta, names ):
+    return next( ( meta[name] for name in names if meta.get(name) ), None )
+
+# #####################################################################################################################################################################################################
+# NOTE
+# #####################################################################################################################################################################################################
+
+class Note:
+
+    __slots__ = ( 'source', 'file', 'folder', 'hierarchy', 'meta', 'body', 'resources' )
+
+    def __init__( self, source, file, hierarchy, meta, body, resources ):
+        self.source = source
+        self.file = file
+        self.folder = os.path.dirname( file )
+        self.hierarchy = hierarchy
+        self.meta = meta
+        self.body = body
+        self.resources = resources
+
+    @property
+    def id( self ):
+        return _first( self.meta, META_ID )
+
+    @property
+    def title( self ):
+        return self.meta.get('title') or os.path.basename( self.folder )
+
+    @property
+    def slug( self ):
+        return self.meta.get('slug') or SLUG.slugify( self.title )
+
+    @property
+    def type( self ):
+        return self.meta.get('type') or 'page'
+
+    def element( self ):
+        # same columns as the element table (mypandas.ELEMENT_COLUMNS) for the exporters MAPPING
+        return {
+            'source': self.source,
+            'id': self.id,
+            'type': self.type,
+            'title': self.title,
+            'slug': self.slug,
+            'created': _first( self.meta, META_CREATED ),
+            'modified': _first( self.meta, META_MODIFIED ),
+            'authors': _first( self.meta, META_AUTHORS ),
+            'parent': self.hierarchy[-1] if self.hierarchy else None,
+        }
+
+    def resource_files( self ):
+        # { reference in the body: file } of the resources found below the note folder
+        from urllib.parse import unquote
+        files = {}
+        for ref in self.resources:
+            path = os.path.normpath( os.path.join( self.folder, unquote( ref ) ) )
+            if path.startswith( self.folder + os.sep ) and os.path.isfile( path ): files[ref] = path
+        return files
+
+    def __repr__( self ):
+        return f'Note({self.source!r}, {self.title!r})'
+
+# #####################################################################################################################################################################################################
+# PARSE
+# #####################################################################################################################################################################################################
+# the only parse of a main.html: <meta mind> tags, body content, relative references of the body
+
+def parse( html ):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup( html, features="html.parser" )
+
+    meta = {}
+    for tag in ( soup.head or soup ).find_all( 'meta', attrs={ 'mind': True } ):
+        meta[tag.attrs['mind']] = tag.attrs.get('content')
+
+    if not meta.get('title') and soup.title and soup.title.string: meta['title'] = soup.title.string
+
+    body = soup.body if soup.body else soup
+
+    resources = {}
+    for tag in body.find_all( list( RESOURCE_ATTRS ) ):
+        ref = tag.attrs.get( RESOURCE_ATTRS[tag.name] )
+        if ref and not ref.startswith( ( '#', '/', 'data:', 'mailto:' ) ) and '://' not in ref and ':' not in ref.split('/')[0]:
+            resources[ref] = None
+
+    return { 'version': IR_VERSION, 'meta': meta, 'body': body.decode_contents(), 'resources': list(resources) }
+
+# #####################################################################################################################################################################################################
+# LOAD
+# #####################################################################################################################################################################################################
+# root: output folder holding the manifest and the .ir cache
+
+def load( file, root ):
+    root = os.path.abspath( root )
+    file = os.path.abspath( file )
+
+    digest = get_manifest( root ).digest( file )
+    cached = os.path.join( root, IR_FOLDER, digest[:2], digest + '.json' )
+
+    ir = None
+    try:
+        with open(cached, 'r', encoding='utf-8') as f:
+            ir = json.load(f)
+        if ir.get('version') != IR_VERSION: ir = None
+    except (OSError, ValueError):
+        ir = None
+
+    if ir is None:
+        with open(file, 'rb') as f:
+            ir = parse( f.read() )
+        os.makedirs( os.path.dirname(cached), exist_ok=True )
+        tmp = cached + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump( ir, f, separators=(',', ':') )
+        os.replace( tmp, cached )
+
+    relative = os.path.relpath( os.path.dirname(file), start=root ).split( os.sep )
+
+    return Note( relative[0], file, relative[1:-1], ir['meta'], ir['body'], ir['resources'] )
+
+# #####################################################################################################################################################################################################
+# NOTES
+# #####################################################################################################################################################################################################
+# one Note at a time, in folder order, for every main.html below [root]/[source] (all sources when None)
+# failed: list the folders of the notes that could not be loaded are added to
+
+def notes( root, source=None, failed=None ):
+    root = os.path.abspath( root )
+    top = os.path.join( root, source ) if source else root
+
+    for folder, subdirs, files in os.walk( top ):
+        subdirs[:] = sorted( subdir for subdir in subdirs if not subdir.startswith('.') )
+        if 'main.html' in files and folder != root:
+            try:
+                yield load( os.path.join( folder, 'main.html' ), root )
+            except:
+                exc_type, exc_obj, exc_tb = sys.exc_info()
+                fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+                print( "Something went wrong [{} - {}] at line {} in {} [{}].".format(exc_type, exc_obj, exc_tb.tb_lineno, fname, folder) )
+                if failed is not None: failed += [ folder ]
+
+# #####################################################################################################################################################################################################
+# HEAD
+# #####################################################################################################################################################################################################
+# <head> of the exporters from their MAPPING { meta name: element column | None }
+# a column missing from the element gives its name as content (same as the former pelican/nikola writers)
+# a missing value (None, NaN) gives no tag, title and contents are html escaped
+
+def missing( value ):
+    return value is None or value != value
+
+def head( element, mapping, columns=None ):
+    from html import escape
+
+    columns = element if columns is None else columns
+
+    text = '<head>\n'
+
+    if 'title' in element and not missing( element['title'] ): text += '\t<title>{}</title>\n'.format( escape( str(element['title']), quote=False ) )
+
+    for key, val in mapping.items():
+        if val:
+            if val not in columns: text += '\t<meta name="{}" content="{}" />\n'.format( key, escape( val ) )
+            elif not missing( element[val] ): text += '\t<meta name="{}" content="{}" />\n'.format( key, escape( str(element[val]) ) )
+
+    text += '</head>\n'
+
+    return text
+
+# #####################################################################################################################################################################################################
+# RELINK
+# #####################################################################################################################################################################################################
+# body with its resource references replaced: { old reference: new reference }, attribute values only
+
+def relink( body, links ):
+    from html import escape
+    for old, new in links.items():
+        if old != new:
+            body = body.replace( '="{}"'.format( escape( old, quote=False ) ), '="{}"'.format( escape( new, quote=False ) ) )
+    return body
+
+# #####################################################################################################################################################################################################
+# EMIT (main.html)
+# #####################################################################################################################################################################################################
+
+def emit( note ):
+    from html import escape
+
+    folder = os.path.join( note.source, *note.hierarchy, os.path.basename( note.folder ) )
+
+    text = '<html><head><meta content="text/html; charset=utf-8" http-equiv="Content-Type"/>'
+    text += ''.join( '<meta content="{}" mind="{}"/>'.format( escape( value or '' ), escape( name ) ) for name, value in note.meta.items() )
+    text += '</head><body>' + note.body + '</body></html>'
+
+    return { os.path.join( folder, 'main.html' ): text }, { os.path.join( folder, ref ): path for ref, path in note.resource_files().items() }
+
+# #####################################################################################################################################################################################################
+# PUBLISH
+# #####################################################################################################################################################################################################
+# one pass over the notes, every target emitted from the same Note
+# each [site]/[target] folder is kept in sync (see sync.py): unchanged files are not rewritten,
+# orphans are deleted after a complete publish (source None) without errors, each target only prunes the files it published (owner 'ir.publish')
+# return { target: { 'notes': n, 'written': n, 'unchanged': n, 'copied': n, 'deleted': n, 'errors': n, 'collisions': n } }
+
+def _emitter( target ):
+    import importlib
+    return importlib.import_module( EMITTERS[target] ).emit
+
+def publish( root, site, targets, source=None, incremental=True ):
+    from sync import SiteSync
+
+    emitters = [ ( target, _emitter( target ), SiteSync( os.path.join( site, target ), incremental, owner='ir.publish' ) ) for target in targets ]
+    count = { target: 0 for target in targets }
+    failed = []
+
+    for note in notes( root, source, failed ):
+        for target, emitter, sync in emitters:
+            try:
+                files, copies = emitter( note )
+
+                for path, text in files.items():
+                    sync.write( os.path.join( sync.folder, path ), text )
+
+                for path, resource in copies.items():
+                    sync.copy( os.path.join( sync.folder, path ), resource )
+
+                count[target] += 1
+
+            except:
+                exc_type, exc_obj, exc_tb = sys.exc_info()
+                fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+                print( "Something went wrong [{} - {}] at line {} in {} [{} {}].".format(exc_type, exc_obj, exc_tb.tb_lineno, fname, target, note.file) )
+                sync.error()
+
+    get_manifest( os.path.abspath(root) ).save()
+
+    stats = {}
+    for target, emitter, sync in emitters:
+        if not source and not failed: sync.prune()
+        stats[target] = { 'notes': count[target], **sync.save() }
+
+    return stats
+
+# #####################################################################################################################################################################################################
+# MAIN
+# #####################################################################################################################################################################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Publish the notes of an output folder to static site generators.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument( 'output', nargs='?', default=os.path.join( os.path.dirname(os.path.abspath(__file__)), 'output' ), help='output folder of the sources' )
+    parser.add_argument( '--site', default=os.path.join( os.path.dirname(os.path.abspath(__file__)), 'site' ), help='site folder, one sub folder per target' )
+    parser.add_argument( '--to', default='pelican,nikola,hugo', help=f'comma separated targets among {", ".join(EMITTERS)}' )
+    parser.add_argument( '--source', default=None, help='itmz, onenote or notes (all when omitted)' )
+    parser.add_argument( '--full', action='store_true', help='write every file, even the unchanged ones' )
+
+    args = parser.parse_args()
+
+    print( json.dumps( publish( args.output, args.site, args.to.split(','), args.source, incremental=not args.full ), indent=2 ) )
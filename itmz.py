@@ -60,12 +60,13 @@
 import re
 import os
 import sys
+import time
 import pathlib
 import shutil
 
 from datetime import datetime as dt
 
-from bs4 import BeautifulSoup   
+# bs4, markdown and tabulate are imported when first used
 
 from flask import request
 
@@ -73,10 +74,18 @@ from flask import request
 
 import xml.etree.ElementTree as ET
 import zipfile
-import markdown
-from tabulate import tabulate
 from urllib.parse import urlparse
 
+from jobs import JOBS
+from census import add_census, parse_census
+from metadata import read_meta
+from context import Context
+
+import metrics
+
+from sanitize import sanitize
+from topics import Topic, parent_index, hierarchies
+
 # #####################################################################################################################################################################################################
 # INTERNALS
 # #####################################################################################################################################################################################################
@@ -85,8 +94,7 @@ ALL_MAPS = 'All Maps'
 
 itmz = None
 
-output_directory = os.path.join( os.path.dirname(__file__), 'output', 'itmz' )
-itmz_source = os.path.join( os.sep, 'Users', 'lburais', 'Library', 'Mobile Documents', 'iCloud~com~toketaware~ios~ithoughts', 'Documents' )
+# output folder and .itmz source folder come from the context (see context.py)
 
 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 # GET_OBJECT_DATE
@@ -118,7 +126,9 @@ def _get_file_date( file ):
 # PROCESS_URL
 # #####################################################################################################################################################################################################
 
-def process_url():
+def process_url( context=None ):
+
+    context = context or Context()
 
     try:
                     
@@ -137,11 +147,7 @@ def process_url():
 
         if action in ['parse', 'catalog', 'itmz']:
 
-            if os.path.isdir( itmz_source ):
-                for root, dirs, filenames in os.walk( itmz_source, topdown=True ):
-                    for file in filenames:
-                        if os.path.splitext(file)[1] == '.itmz': 
-                            catalog += [ { 'source': 'itmz', 'object': 'file', 'name': os.path.splitext(file)[0], 'file': os.path.join(root, file), 'url': f'file={os.path.join(root, file)}' } ]
+            catalog += list_maps( context.itmz_source )
 
             # add command to parse all notebooks        
             if len(catalog) > 0:
@@ -153,7 +159,11 @@ def process_url():
         # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
         # parse file aka. create local structure
 
-        if action in ['parse', 'itmz']:
+        # the conversion runs as a background job, the request only gets the job back
+
+        job = None
+
+        if action in ['parse', 'itmz'] and request.args.get('file'):
 
             itmz_files = request.args.get('file')
 
@@ -165,9 +175,13 @@ def process_url():
                 itmz_files = []
                 for cat in catalog:
                     if 'file' in cat: itmz_files += [ cat['file'] ]
-            
-            for itmz_file in itmz_files:
-                _download_itmz( itmz_file )
+
+            # one itmz job at a time: All Maps and a single map write the same output folders
+            # the job only gets the context, the session is not reachable (nor saved) from the job thread
+            job, created = JOBS.submit( 'itmz', _download_itmz_files, context, itmz_files, 
+                                        name='itmz {}'.format( request.args.get('file') ) )
+            if not created:
+                comments = f'itmz conversion already running as job {job.id} ({job.name}), {request.args.get("file")} not started'
 
         # ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
         # ITMZ
@@ -179,7 +193,8 @@ def process_url():
 
             identifier = request.args.get('id')
 
-            elements = list_notes( output_directory, identifier )
+            # a single note is rendered from its main.html, no need to parse its body here
+            elements = list_notes( context.folder('itmz'), identifier, body=not identifier )
 
             if identifier:
                 if len(elements) == 1:
@@ -203,6 +218,7 @@ def process_url():
         if len(elements) > 0: result['elements'] = elements
         if len(note) > 0: result['note'] = note
         if len(comments) > 0: result['comment'] = comments
+        if job: result['job'] = job.to_dict()
 
         return result
 
@@ -213,11 +229,26 @@ def process_url():
         print ( f'ERROR: {error}')
         return { 'comments': error }
 
+# #####################################################################################################################################################################################################
+# LIST_MAPS
+# #####################################################################################################################################################################################################
+
+def list_maps( source ):
+    maps = []
+    if os.path.isdir( source ):
+        for root, dirs, filenames in os.walk( source, topdown=True ):
+            for file in filenames:
+                if os.path.splitext(file)[1] == '.itmz': 
+                    maps += [ { 'source': 'itmz', 'object': 'file', 'name': os.path.splitext(file)[0], 'file': os.path.join(root, file), 'url': f'file={os.path.join(root, file)}' } ]
+    return maps
+
 # #####################################################################################################################################################################################################
 # LIST_NOTES
 # #####################################################################################################################################################################################################
 
-def list_notes( dir, identifier ):
+# body=False only lists the metadata (no html, no body), read from the <head> of main.html
+
+def list_notes( dir, identifier, body=True ):
     try:
 
         elements = []
@@ -235,13 +266,27 @@ def list_notes( dir, identifier ):
                         'folder': root,
                         'file': os.path.join(root, 'main.html'),
                         'indent': len(os.path.normpath(root).split(os.sep)) - base,
-                        'hierarchy': os.path.relpath(root, start=output_directory).split(os.sep),
+                        'hierarchy': os.path.relpath(root, start=dir).split(os.sep),
                     }
                     element['hierarchy'].pop()
                     element['hierarchy'].insert(0, 'itmz')
 
                     element['url'] = pathlib.Path(element['file']).as_uri()
 
+                    meta = read_meta( element['file'] )
+
+                    element['name'] = meta.get('title')
+                    element['date'] = meta.get('modified')
+                    element['id'] = meta.get('uuid')
+                    element['census'] = parse_census( meta.get('census') )
+
+                    if not element['id'] or (identifier and element['id'] != identifier):
+                        continue
+
+                    if not body:
+                        elements += [ element ]
+                        continue
+
                     with open(element['file'], 'rb') as f:
                         f_content = f.read()
 
@@ -250,22 +295,12 @@ def list_notes( dir, identifier ):
                     # <meta mind="" content="">
                     # mind = ['id': 'uuid', 'name': 'title', 'date': 'modified']
                     
+                    from bs4 import BeautifulSoup
                     soup = BeautifulSoup( f_content, features="html.parser" )
 
-                    tag = soup.find("meta", {"mind":"title"})
-                    element['name'] = tag["content"] if tag else None
-
-                    tag = soup.find("meta", {"mind":"modified"})
-                    element['date'] = tag["content"] if tag else None
-
-                    tag = soup.find("meta", {"mind":"uuid"})
-                    element['id'] = tag["content"] if tag else None
-
                     element['body'] = soup.body.prettify()
 
-                    if element['id'] and (not identifier or element['id'] == identifier) and ('main.html' in files):
-
-                        elements += [ element ]
+                    elements += [ element ]
 
         return elements  
 
@@ -287,10 +322,15 @@ def list_notes( dir, identifier ):
 
 def get_note( element ):
     try:
+        if 'html' not in element:
+            with open(element['file'], 'rb') as f:
+                element['html'] = f.read()
+
         note = {
             'name': element['name'],
             'hierarchy': element['hierarchy'],
             'folder': element['folder'],
+            'file': element['file'],
             'url': element['url'],
             'html': element['html'],
             'attachments': [],
@@ -312,12 +352,36 @@ def get_note( element ):
         print ( "Something went wrong [{} - {}] at line {} in {}.".format(exc_type, exc_obj, exc_tb.tb_lineno, fname) )
         return {}
 
+# #####################################################################################################################################################################################################
+# DOWNLOAD_ITMZ_FILES
+# #####################################################################################################################################################################################################
+# job entry point: job counters are files, topics and bytes (written)
+
+def _download_itmz_files(context, itmz_files, job=None):
+
+    if job: context.job = job
+
+    context.set( 'files_total', len(itmz_files) )
+
+    # progress is counted in topics, each map adds its topics to the total once parsed
+
+    for itmz_file in itmz_files:
+        _download_itmz( context, itmz_file )
+        context.count( 'files' )
+
+    context.save_manifest()
+
+    context.report( 'ITMZ TIMINGS' )
+
 # #####################################################################################################################################################################################################
 # DOWNLOAD_ITMZ
 # #####################################################################################################################################################################################################
 
-def _download_itmz(itmz_file, force=True):
-    global output_directory
+def _download_itmz(context, itmz_file, force=True):
+
+    from bs4 import BeautifulSoup
+    from tabulate import tabulate
+    import markdown
 
     try:
         print( f'PARSE {itmz_file.upper()} FILE' )
@@ -327,38 +391,47 @@ def _download_itmz(itmz_file, force=True):
         # ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
         if os.path.exists( itmz_file ):
-            ithoughts = zipfile.ZipFile( itmz_file, 'r')
-            xmldata = ithoughts.read('mapdata.xml')
-            elements = ET.fromstring(xmldata)
+            with context.span( 'itmz.xml', file=itmz_file ):
+                with zipfile.ZipFile( itmz_file, 'r') as ithoughts:
+                    elements = ET.fromstring( ithoughts.read('mapdata.xml') )
+                parents = parent_index( elements )
         else:
             print( f'INVALID FILE {itmz_file.upper()}')
+            context.error( f'invalid file {itmz_file}' )
             return
 
         # ---------------------------------------------------------------------------------------------------------------------------------------
         # set structure
         # ---------------------------------------------------------------------------------------------------------------------------------------
 
-        out_dir = os.path.join(output_directory, '[itmz] ' + os.path.splitext(os.path.basename(itmz_file))[0])
-        if force: shutil.rmtree( out_dir, ignore_errors=True )
+        out_dir = os.path.join(context.folder('itmz'), '[itmz] ' + os.path.splitext(os.path.basename(itmz_file))[0])
+
+        # not forced: maps converted after their last change are kept as is
+        out_time = _get_file_date( out_dir )
+        if not force and out_time and out_time > _get_file_date( itmz_file ):
+            print( 'Skipping {} [{} > {}]'.format( itmz_file, out_time.strftime("%Y-%m-%d %H:%M:%S"), _get_file_date( itmz_file ).strftime("%Y-%m-%d %H:%M:%S")))
+            context.count( 'files_skipped' )
+            return
+
+        shutil.rmtree( out_dir, ignore_errors=True )
         os.makedirs( out_dir, exist_ok=True )
 
         # ---------------------------------------------------------------------------------------------------------------------------------------
         # parse elements
         # ---------------------------------------------------------------------------------------------------------------------------------------
+        # the xml attributes are only used to render the topic, a Topic record keeps what is written afterwards
 
         itmz = []
 
         for element in elements.iter('topic'):
             if 'text' in element.attrib: 
 
+                topic_start = time.perf_counter()
+
                 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
                 # set mind specific
                 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
-                element.attrib['source'] = 'itmz'
-                element.attrib['object'] = 'topic'
-                element.attrib['file'] = itmz_file
-
                 element.attrib['title'] = element.attrib['uuid']
                 
                 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -381,18 +454,18 @@ def _download_itmz(itmz_file, force=True):
                 md = re.sub( r'^(?P<line>.*)', '\g<line> {#' + element.attrib['uuid'] + '}', md, count = 1 )
 
                 # convert body to html
-                element.attrib['html'] += markdown.markdown( md, extensions=['extra', 'nl2br'] )
-
-                print( element.attrib['html'][:132] )
+                with context.span( 'itmz.markdown' ):
+                    element.attrib['html'] += markdown.markdown( md, extensions=['extra', 'nl2br'] )
 
                 # shift headers by level in body
                 #for h in range (6, 0, -1):
                 #    element.attrib['body'] = re.sub( r'h' + str(h) + r'>', 'h{}>'.format(h+level+1), element.attrib['body'], flags = re.MULTILINE )
 
                 # retrieve title
-                soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
-                if soup.h1:
-                    element.attrib['title'] = soup.h1.text
+                with context.span( 'itmz.soup.title' ):
+                    soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
+                    if soup.h1:
+                        element.attrib['title'] = soup.h1.text
 
                 element.attrib['html'] += '</body>'
 
@@ -402,32 +475,33 @@ def _download_itmz(itmz_file, force=True):
 
                 if 'att-id' in element.attrib:
 
-                    soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
+                    with context.span( 'itmz.soup.attachment' ):
+                        soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
 
-                    att_split = os.path.splitext( os.path.basename( element.attrib['att-name'] ))
+                        att_split = os.path.splitext( os.path.basename( element.attrib['att-name'] ))
 
-                    element.attrib['att-asset'] = os.path.join( "assets", element.attrib['att-id'], element.attrib['att-name'] )
+                        element.attrib['att-asset'] = os.path.join( "assets", element.attrib['att-id'], element.attrib['att-name'] )
 
-                    if len(att_split) > 1 and att_split[1].lower() in ['.jpg', '.jpeg', '.gif', '.png']:
-                        tag = soup.new_tag('img')
-                        element.attrib['att-relative'] = os.path.join( 'images', element.attrib['att-name'] )
-                        tag.attrs['src'] = element.attrib['att-relative']
-                        tag.attrs['title'] = att_split[0]
-                    else:
-                        tag = soup.new_tag('object')
-                        element.attrib['att-relative'] = os.path.join( 'attachments', element.attrib['att-name'] )
-                        tag.attrs['data'] = element.attrib['att-relative']
-                        #tag.attrs['data'] = element.attrib['att-asset']
-                        #tag.attrs['data-attachment'] = element.attrib['att-relative']
-                        tag.attrs['type'] = "application/{}".format( att_split[1].lower()[1:] if len(att_split) > 1 else 'pdf' )
-                        #tag.attrs['target'] = "_blank"
+                        if len(att_split) > 1 and att_split[1].lower() in ['.jpg', '.jpeg', '.gif', '.png']:
+                            tag = soup.new_tag('img')
+                            element.attrib['att-relative'] = os.path.join( 'images', element.attrib['att-name'] )
+                            tag.attrs['src'] = element.attrib['att-relative']
+                            tag.attrs['title'] = att_split[0]
+                        else:
+                            tag = soup.new_tag('object')
+                            element.attrib['att-relative'] = os.path.join( 'attachments', element.attrib['att-name'] )
+                            tag.attrs['data'] = element.attrib['att-relative']
+                            #tag.attrs['data'] = element.attrib['att-asset']
+                            #tag.attrs['data-attachment'] = element.attrib['att-relative']
+                            tag.attrs['type'] = "application/{}".format( att_split[1].lower()[1:] if len(att_split) > 1 else 'pdf' )
+                            #tag.attrs['target'] = "_blank"
 
-                    soup.body.append(soup.new_tag('br'))
-                    soup.body.append(tag)
+                        soup.body.append(soup.new_tag('br'))
+                        soup.body.append(tag)
 
-                    element.attrib['html'] = str(soup)
+                        element.attrib['html'] = str(soup)
 
-                    element.attrib['html'] = element.attrib['html'].replace( element.attrib['att-asset'], element.attrib['att-relative'] )
+                        element.attrib['html'] = element.attrib['html'].replace( element.attrib['att-asset'], element.attrib['att-relative'] )
 
                 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
                 # link
@@ -435,23 +509,24 @@ def _download_itmz(itmz_file, force=True):
 
                 if 'link' in element.attrib:
 
-                    soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
+                    with context.span( 'itmz.soup.link' ):
+                        soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
 
-                    tag = soup.new_tag('a')
-                    tag.attrs['target'] = "_blank"
+                        tag = soup.new_tag('a')
+                        tag.attrs['target'] = "_blank"
 
-                    target = urlparse( element.attrib['link'] )
-                    # scheme://netloc/path;parameters?query#fragment
-                    if target.scheme in ['ithoughts']:
-                        # MAY NEED TO REWORK WHEN SCHEME IS ITHOUGHTS 
-                        pass
+                        target = urlparse( element.attrib['link'] )
+                        # scheme://netloc/path;parameters?query#fragment
+                        if target.scheme in ['ithoughts']:
+                            # MAY NEED TO REWORK WHEN SCHEME IS ITHOUGHTS 
+                            pass
                     
-                    tag.attrs['href'] = element.attrib['link']
+                        tag.attrs['href'] = element.attrib['link']
 
-                    soup.body.append(soup.new_tag('br'))
-                    soup.body.append(tag)
+                        soup.body.append(soup.new_tag('br'))
+                        soup.body.append(tag)
 
-                    element.attrib['html'] = str(soup)
+                        element.attrib['html'] = str(soup)
 
                 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
                 # task information
@@ -461,129 +536,127 @@ def _download_itmz(itmz_file, force=True):
                 # table by row
                 # header
 
-                soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
+                with context.span( 'itmz.soup.task' ):
+                    soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
 
-                task_table = {}
-                task = { 'task-start': 'Start', 'task-due': 'Due', 'cost': 'Cost', 'task-effort': 'Effort', 
-                        'task-priority': 'Priority', 'task-progress': 'Progress', 'resources': 'Resource(s)' }
+                    task_table = {}
+                    task = { 'task-start': 'Start', 'task-due': 'Due', 'cost': 'Cost', 'task-effort': 'Effort', 
+                            'task-priority': 'Priority', 'task-progress': 'Progress', 'resources': 'Resource(s)' }
 
-                for key, value in task.items():
-                    if key in element and element.attrib[key] and (element.attrib[key] == element.attrib[key]):
-                        if key == 'task-progress':
-                            if element.attrib[key][-1] != "%": 
-                                if int(element.attrib[key]) > 100: continue
-                                element.attrib[key] += '%'
-                        if key == 'task-effort' and element.attrib[key][0] == '-': continue
-                        task_table[value] = [ element.attrib[key] ]
+                    for key, value in task.items():
+                        if key in element and element.attrib[key] and (element.attrib[key] == element.attrib[key]):
+                            if key == 'task-progress':
+                                if element.attrib[key][-1] != "%": 
+                                    if int(element.attrib[key]) > 100: continue
+                                    element.attrib[key] += '%'
+                            if key == 'task-effort' and element.attrib[key][0] == '-': continue
+                            task_table[value] = [ element.attrib[key] ]
 
-                if len(task_table) > 0: 
-                    soup.body.append(soup.new_tag('br'))
-                    soup.body.append(soup.new_tag('br'))
-                    soup.body.append( BeautifulSoup( tabulate( task_table, headers="keys", tablefmt="html" ), features="html.parser" ))
+                    if len(task_table) > 0: 
+                        soup.body.append(soup.new_tag('br'))
+                        soup.body.append(soup.new_tag('br'))
+                        soup.body.append( BeautifulSoup( tabulate( task_table, headers="keys", tablefmt="html" ), features="html.parser" ))
 
-                    print( soup.prettify() )
-                    element.attrib['html'] = str(soup)
+                        element.attrib['html'] = str(soup)
 
                 # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
                 # clean tags
                 # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
-                soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
-
-                blacklist = ['span', 'p', 'link', 'style', 'script', 'meta', 'svg', 'nav', 'header', 'footer']
-                blacklist += ['style', 'lang', 'class', 'height', 'width']
-                blacklist += ['data-absolute-enabled', 'data-src-type', 'data-render-original-src', 'data-index', 'data-options', 'data-attachment', 'data-id']
-                whitelist=['href', 'alt', 'src', 'title', 'data', 'target', 'type', 'content', 'mind']
+                with context.span( 'itmz.soup.clean' ):
+                    soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
 
-                for tag in soup.findAll(True):
-                    for attr in [attr for attr in tag.attrs if( attr in blacklist and attr not in whitelist)]:
-                        del tag[attr]
-                    if tag.name in blacklist and tag.name not in whitelist:
-                        tag.unwrap()
+                    sanitize( soup, 'itmz' )
 
-                element.attrib['html'] = str(soup)
-                element.attrib['body'] = str(soup.body)
+                    element.attrib['html'] = str(soup)
 
                 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
                 # mind meta tags
                 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
                 # <meta mind="[source, object, id, folder, createdDateTime, lastModifiedDateTime, url]" content="">
 
-                soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
+                with context.span( 'itmz.soup.meta' ):
+                    soup = BeautifulSoup( element.attrib['html'], features="html.parser" )
+
+                    metatag = soup.new_tag('meta')
+                    metatag.attrs['content'] = "text/html; charset=utf-8"
+                    metatag.attrs['http-equiv'] = "Content-Type"
+                    soup.head.insert( 0, metatag )
 
-                metatag = soup.new_tag('meta')
-                metatag.attrs['content'] = "text/html; charset=utf-8"
-                metatag.attrs['http-equiv'] = "Content-Type"
-                soup.head.insert( 0, metatag )
+                    meta_list = [{ 'tag': 'source', 'content': 'itmz'}]
+                    for tag in ['uuid', 'title', 'author', 'created', 'modified']:
+                        if tag in element.attrib: meta_list += [{ 'tag': tag, 'content':element.attrib[tag]}]
+                    #meta_list += [{ 'tag': 'folder', 'content': element.attrib['folder']}]
 
-                meta_list = [{ 'tag': 'source', 'content': 'itmz'}]
-                for tag in ['uuid', 'title', 'author', 'created', 'modified']:
-                    if tag in element.attrib: meta_list += [{ 'tag': tag, 'content':element.attrib[tag]}]
-                #meta_list += [{ 'tag': 'folder', 'content': element.attrib['folder']}]
+                    for meta in meta_list:
+                        metatag = soup.new_tag('meta')
+                        metatag.attrs['content'] = meta['content']
+                        metatag.attrs['mind'] = meta['tag']
+                        soup.head.append(metatag)
 
-                for meta in meta_list:
-                    metatag = soup.new_tag('meta')
-                    metatag.attrs['content'] = meta['content']
-                    metatag.attrs['mind'] = meta['tag']
-                    soup.head.append(metatag)
+                    add_census( soup )
 
-                element.attrib['html'] = str(soup)
+                    element.attrib['html'] = str(soup)
 
                 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
                 # done
                 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
-                itmz += [ element.attrib ]
+                itmz += [ Topic( itmz_file, element.attrib['uuid'], parents.get( element.attrib['uuid'] ), element.attrib['title'], element.attrib['html'],
+                                 element.attrib.get('att-asset'), element.attrib.get('att-relative') ) ]
+
+                context.recorder.record( 'itmz.topic', topic_start, topic=element.attrib['title'] )
+
+        # the xml tree is not needed anymore
+        element = elements = None
 
         # print( 'ELEMENTS: {}'.format("\n".join( [ d["folder"] for d in itmz ] )))
 
+        context.add_total( len(itmz) )
+
         # ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
         # set hierarchy and folder
         # ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
-        # need to have title set first
+        # need to have title set first, topics without text are named by their uuid
 
-        for element in itmz:
+        topic_hierarchies = hierarchies( parents, { topic.uuid: topic.title for topic in itmz } )
 
-            element['folder'] = ''
-
-            def get_parents_title( uuid ):
-                parents = elements.findall(f'.//topic[@uuid="{uuid}"]...')
-                if (len(parents) > 0) and (parents[0].tag == 'topic'):
-                    return get_parents_title( parents[0].attrib['uuid'] ) + [ parents[0].attrib['title' if 'title' in parents[0].attrib else 'uuid'] ]
-                else:
-                    return []
+        for topic in itmz:
 
-            element['hierarchy'] = get_parents_title( element['uuid'] )
+            topic.hierarchy = topic_hierarchies.get( topic.uuid, [] )
 
-            element['folder'] = os.path.join( out_dir, os.sep.join( element['hierarchy'] ), element['title'] )
+            topic.folder = os.path.join( out_dir, os.sep.join( topic.hierarchy ), topic.title )
 
-            while os.path.exists( element['folder'] ):
-                element['hierarchy'] += [ 'sub' ] 
-                element['folder'] = os.path.join( out_dir, os.sep.join( element['hierarchy'] ), element['title'] )
+            while os.path.exists( topic.folder ):
+                topic.hierarchy += [ 'sub' ] 
+                topic.folder = os.path.join( out_dir, os.sep.join( topic.hierarchy ), topic.title )
 
-            # print( f'HIERARCHY\n\t{element["hierarchy"]}\n\t{element["title"]}\n\t{element["folder"]}')
+            # print( f'HIERARCHY\n\t{topic.hierarchy}\n\t{topic.title}\n\t{topic.folder}')
 
             # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
             # write attachment
             # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
-            if 'att-id' in element:
+            if topic.att_asset:
 
                 try:
-                    out_file = os.path.join(element['folder'], element['att-relative'])
+                    out_file = os.path.join(topic.folder, topic.att_relative)
 
                     os.makedirs( os.path.dirname(out_file), exist_ok=True )
 
-                    ithoughts = zipfile.ZipFile( itmz_file, 'r')
-                    data = ithoughts.read(element['att-asset'])
+                    with context.span( 'itmz.attachment', file=topic.att_relative ):
+                        with zipfile.ZipFile( itmz_file, 'r') as ithoughts:
+                            data = ithoughts.read(topic.att_asset)
 
-                    with open(out_file, 'wb') as fs: 
-                        fs.write(data) 
+                        size = context.write( out_file, data )
+
+                    context.count( 'bytes', size )
                 except:
                     exc_type, exc_obj, exc_tb = sys.exc_info()
                     fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
                     print("Something went wrong [{} - {}]".format(exc_type, exc_obj))
-                    print( f'ERROR\n\t{element["hierarchy"]}\n\t{element["folder"]}\n\t{element["att-relative"]}\n\t{element["att-asset"]}' )
+                    context.error( "{}: {} [{}]".format( topic.att_relative, exc_obj, itmz_file ) )
+                    print( f'ERROR\n\t{topic.hierarchy}\n\t{topic.folder}\n\t{topic.att_relative}\n\t{topic.att_asset}' )
 
                 if not os.path.isfile(out_file): print( f'missing {out_file} file ...')
                 # else: print( '{}: {} bytes'.format( out_file, os.path.getsize(out_file) ) )
@@ -592,40 +665,48 @@ def _download_itmz(itmz_file, force=True):
             # write html
             # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
-            if 'html' in element:
+            if topic.html:
 
                 try:
-                    out_html = os.path.join( element['folder'], 'main.html')
-                    os.makedirs( element['folder'], exist_ok=True )
+                    out_html = os.path.join( topic.folder, 'main.html')
+                    os.makedirs( topic.folder, exist_ok=True )
+
+                    with context.span( 'itmz.write', topic=topic.title ):
+                        size = context.write( out_html, topic.html )
 
-                    with open(out_html, "w", encoding='utf-8') as f:
-                        f.write(element['html'])
+                    context.count( 'topics' )
+                    context.count( 'bytes', size )
+                    metrics.TOPICS.inc()
                 except:
                     exc_type, exc_obj, exc_tb = sys.exc_info()
                     fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
                     print("Something went wrong [{} - {}]".format(exc_type, exc_obj))
-                    print( f'ERROR\n\t{element["hierarchy"]}\n\t{element["folder"]}' )
+                    context.error( "{}: {} [{}]".format( topic.title, exc_obj, itmz_file ) )
+                    print( f'ERROR\n\t{topic.hierarchy}\n\t{topic.folder}' )
 
                 if not os.path.isfile(out_html): print( f'missing {out_html} file ...')
+
+                context.progress( topic.title )
                 # else: print( '{}: {} bytes'.format( out_html, os.path.getsize(out_html) ) )
 
-            # print( f'\nELEMENT: {element}')
+            # print( f'\nTOPIC: {topic}')
 
         # ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
         # check duplicates
         # ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
-        itmz = sorted(itmz, key=lambda d: d['folder']) 
+        itmz = sorted(itmz, key=lambda d: d.folder) 
 
-        # print( 'FOLDERS: {}\n'.format("\n".join( [ d["folder"] for d in itmz ] )))
+        # print( 'FOLDERS: {}\n'.format("\n".join( [ d.folder for d in itmz ] )))
 
         folders = []
-        for element in itmz:
-            folders += [ element['folder'] ]
-            if folders.count( element['folder'] ) > 1:
-                print( f'DUPLICATED : {element["folder"]}')
+        for topic in itmz:
+            folders += [ topic.folder ]
+            if folders.count( topic.folder ) > 1:
+                print( f'DUPLICATED : {topic.folder}')
 
     except:
         exc_type, exc_obj, exc_tb = sys.exc_info()
         fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
         print("Something went wrong [{} - {}] at line {} in {}.".format(exc_type, exc_obj, exc_tb.tb_lineno, fname))
+        context.error( "Something went wrong [{} - {}] at line {} in {} [{}].".format(exc_type, exc_obj, exc_tb.tb_lineno, fname, itmz_file) )
@@ -0,0 +1,244 @@
+# #####################################################################################################################################################################################################
+# Filename:     jobs.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Background jobs
+# ---------------
+#   long conversions (itmz maps, onenote notebooks) are queued to a pool of worker threads
+#   the web request gets the job id back immediately and follows it on /jobs/<id>
+#
+#   job key     identifies the source being converted (ex: 'itmz', 'onenote:[user]'), not the map or notebook:
+#               conversions of the same source share their output folders and must not run side by side
+#               a job submitted while another one with the same key is queued or running is coalesced into it
+#
+#   events      each job publishes numbered events streamed on /jobs/<id>/events (server-sent events)
+#                   status      queued | running | done | failed
+#                   progress    current item, done, total, rate (items/s), eta (s)
+#                   error       error message
+#
+# #####################################################################################################################################################################################################
+
+import os
+import sys
+import time
+import uuid
+import threading
+
+from collections import deque
+
+from instrument import profiling
+
+from concurrent.futures import ThreadPoolExecutor
+
+from datetime import datetime as dt
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+JOB_WORKERS = 2
+JOB_HISTORY = 100     # finished jobs kept for /jobs
+JOB_EVENTS = 1000     # events kept per job for late or reconnecting listeners
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# #####################################################################################################################################################################################################
+# JOB
+# #####################################################################################################################################################################################################
+
+class Job:
+
+    def __init__( self, key, name=None ):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.name = name or key
+        self.status = QUEUED
+        self.counters = {}
+        self.errors = []
+        self.created = dt.now()
+        self.started = None
+        self.finished = None
+        self.item = None
+        self.done = 0
+        self.total = 0
+        self.timings = []     # (item, seconds) for each progress step
+        self.report = None    # span report of the run, see instrument.py
+        self._start = None
+        self._last = None
+        self._seq = 0
+        self._events = deque( maxlen=JOB_EVENTS )
+        self._lock = threading.Condition()
+
+    @property
+    def active( self ):
+        return self.status in [QUEUED, RUNNING]
+
+    def count( self, counter, n=1 ):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def set( self, counter, value ):
+        with self._lock:
+            self.counters[counter] = value
+
+    def error( self, message ):
+        with self._lock:
+            self.errors += [ message ]
+            self._publish( 'error', { 'item': self.item, 'error': message } )
+
+    def set_status( self, status ):
+        with self._lock:
+            self.status = status
+            if status in [RUNNING]:
+                self.started = dt.now()
+                self._start = time.monotonic()
+                self._last = self._start
+            elif status in [DONE, FAILED]:
+                self.finished = dt.now()
+            self._publish( 'status', self._to_dict() )
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # PROGRESS
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # add_total:    more work discovered (ex: topics of the next map)
+    # progress:     n more units done, item is what was just processed
+
+    def add_total( self, n ):
+        with self._lock:
+            self.total += n
+
+    def progress( self, item, n=1 ):
+        with self._lock:
+            now = time.monotonic()
+            if self._last is not None: self.timings += [ ( item, round(now - self._last, 4) ) ]
+            self._last = now
+            self.item = item
+            self.done += n
+            self._publish( 'progress', self._progress() )
+
+    def _progress( self ):
+        elapsed = time.monotonic() - self._start if self._start else 0
+        rate = self.done / elapsed if elapsed > 0 else None
+        eta = (self.total - self.done) / rate if rate and self.total > self.done else None
+        return { 'item': self.item, 'done': self.done, 'total': self.total, 
+                 'rate': round(rate, 2) if rate else None, 'eta': round(eta) if eta is not None else None,
+                 'errors': len(self.errors) }
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # EVENTS
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # events( last_id ) yields (id, event, data) after last_id, None every timeout seconds without news
+    # and stops once the job is over and all its events were sent
+
+    def _publish( self, event, data ):
+        self._seq += 1
+        self._events.append( ( self._seq, event, data ) )
+        self._lock.notify_all()
+
+    def events( self, last_id=0, timeout=15 ):
+        while True:
+            with self._lock:
+                pending = [ event for event in self._events if event[0] > last_id ]
+                if len(pending) == 0:
+                    if not self.active: return
+                    self._lock.wait( timeout )
+                    pending = [ event for event in self._events if event[0] > last_id ]
+
+            if len(pending) == 0:
+                yield None
+
+            for event in pending:
+                last_id = event[0]
+                yield event
+
+    def to_dict( self ):
+        with self._lock:
+            return self._to_dict()
+
+    def _to_dict( self ):
+        return {
+            'id': self.id,
+            'key': self.key,
+            'name': self.name,
+            'status': self.status,
+            'counters': dict(self.counters),
+            'progress': self._progress(),
+            'errors': list(self.errors),
+            'report': self.report,
+            'created': self.created.isoformat(),
+            'started': self.started.isoformat() if self.started else None,
+            'finished': self.finished.isoformat() if self.finished else None,
+        }
+
+# #####################################################################################################################################################################################################
+# JOB_MANAGER
+# #####################################################################################################################################################################################################
+
+class JobManager:
+
+    def __init__( self, workers=JOB_WORKERS ):
+        self._executor = ThreadPoolExecutor( max_workers=workers, thread_name_prefix='mind-job' )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # SUBMIT
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # fn is called as fn( *args, job=job, **kwargs )
+    # return (job, True) for a new job, (job, False) when coalesced into an active job with the same key
+
+    def submit( self, key, fn, *args, name=None, **kwargs ):
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.active:
+                    return job, False
+
+            job = Job( key, name )
+            self._jobs[job.id] = job
+            self._prune()
+
+        self._executor.submit( self._run, job, fn, args, kwargs )
+
+        return job, True
+
+    def _run( self, job, fn, args, kwargs ):
+        job.set_status( RUNNING )
+        try:
+            # MIND_PROFILE=cpu|memory|all profiles the job
+            with profiling( f'job-{job.id}' ):
+                fn( *args, job=job, **kwargs )
+            job.set_status( DONE )
+        except:
+            exc_type, exc_obj, exc_tb = sys.exc_info()
+            fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+            job.error( "Something went wrong [{} - {}] at line {} in {}.".format(exc_type, exc_obj, exc_tb.tb_lineno, fname) )
+            job.set_status( FAILED )
+
+    def _prune( self ):
+        finished = [ job for job in self._jobs.values() if not job.active ]
+        for job in sorted( finished, key=lambda job: job.created )[:max(0, len(finished) - JOB_HISTORY)]:
+            del self._jobs[job.id]
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # QUERY
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+    def get( self, id ):
+        return self._jobs.get( id )
+
+    def list( self ):
+        with self._lock:
+            return sorted( self._jobs.values(), key=lambda job: job.created, reverse=True )
+
+# #####################################################################################################################################################################################################
+# DEFAULT MANAGER
+# #####################################################################################################################################################################################################
+
+JOBS = JobManager()
@@ -0,0 +1,149 @@
+# #####################################################################################################################################################################################################
+# Filename:     manifest.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Manifest
+# --------
+#   content hash of the files written under a root folder, kept in [root]/.manifest.json
+#       { "relative/path": { "sha256": "...", "size": 123, "mtime": 1700000000000000000 }, ... }
+#
+#   an entry is only trusted while the file keeps the recorded size and mtime
+#   an entry may name the owner that wrote the file (ex: "owner": "nikola.export", see sync.py)
+#
+# #####################################################################################################################################################################################################
+
+import os
+import json
+import hashlib
+import threading
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+MANIFEST = '.manifest.json'
+
+_manifests = {}
+_lock = threading.Lock()
+
+# #####################################################################################################################################################################################################
+# MANIFEST
+# #####################################################################################################################################################################################################
+
+class Manifest:
+
+    def __init__( self, root ):
+        self.root = root
+        self.file = os.path.join( root, MANIFEST )
+        self.entries = {}
+        self.changed = False
+        self._lock = threading.Lock()
+
+        try:
+            with open(self.file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _key( self, path ):
+        return os.path.relpath( path, start=self.root )
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # RECORD / LOOKUP
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+    def record( self, path, digest, stat=None, owner=None ):
+        stat = stat or os.stat( path )
+        entry = { 'sha256': digest, 'size': stat.st_size, 'mtime': stat.st_mtime_ns }
+        if owner: entry['owner'] = owner
+        with self._lock:
+            self.entries[self._key(path)] = entry
+            self.changed = True
+
+    def lookup( self, path, stat=None ):
+        stat = stat or os.stat( path )
+        with self._lock:
+            entry = self.entries.get( self._key(path) )
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            return entry['sha256']
+        return None
+
+    def digest( self, path ):
+        # recorded hash, or hash the file now and record it
+        stat = os.stat( path )
+        digest = self.lookup( path, stat )
+        if not digest:
+            digest = hash_file( path )
+            self.record( path, digest, stat )
+        return digest
+
+    def entries_below( self, folder ):
+        # entries of the files under folder, as { relative path: entry }
+        prefix = self._key( folder ) + os.sep
+        with self._lock:
+            return { key: dict(entry) for key, entry in self.entries.items() if key.startswith( prefix ) }
+
+    def merge( self, entries ):
+        # entries recorded by another process (ex: convert --jobs workers)
+        if not entries: return
+        with self._lock:
+            self.entries.update( entries )
+            self.changed = True
+
+    def owner( self, path ):
+        with self._lock:
+            entry = self.entries.get( self._key(path) )
+        return entry.get('owner') if entry else None
+
+    def owned( self, owner ):
+        # relative paths of the entries recorded by owner
+        with self._lock:
+            return [ key for key, entry in self.entries.items() if entry.get('owner') == owner ]
+
+    def forget( self, path ):
+        with self._lock:
+            if self.entries.pop( self._key(path), None ) is not None: self.changed = True
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # SAVE
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # entries of deleted files are dropped
+
+    def save( self ):
+        with self._lock:
+            if not self.changed: return
+            self.entries = { key: entry for key, entry in self.entries.items() if os.path.isfile( os.path.join(self.root, key) ) }
+            os.makedirs( self.root, exist_ok=True )
+            tmp = self.file + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump( self.entries, f, separators=(',', ':') )
+            os.replace( tmp, self.file )
+            self.changed = False
+
+# #####################################################################################################################################################################################################
+# GET_MANIFEST
+# #####################################################################################################################################################################################################
+
+def get_manifest( root ):
+    root = os.path.abspath( root )
+    with _lock:
+        if root not in _manifests: _manifests[root] = Manifest( root )
+        return _manifests[root]
+
+# #####################################################################################################################################################################################################
+# HASH
+# #####################################################################################################################################################################################################
+
+def hash_bytes( data ):
+    return hashlib.sha256( data ).hexdigest()
+
+def hash_file( path, chunk=1024*1024 ):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter( lambda: f.read(chunk), b'' ):
+            sha.update( block )
+    return sha.hexdigest()
@@ -0,0 +1,68 @@
+# #####################################################################################################################################################################################################
+# Filename:     metadata.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Note metadata
+# -------------
+#   the <meta mind="[name]" content="[value]"> tags written in the <head> of each main.html
+#   read_meta only parses the <head> and remembers the result until the file changes (mtime, size)
+#
+# #####################################################################################################################################################################################################
+
+import os
+import threading
+
+from html.parser import HTMLParser
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+_cache = {}
+_lock = threading.Lock()
+
+class _MetaParser(HTMLParser):
+
+    def __init__( self ):
+        super().__init__( convert_charrefs=True )
+        self.meta = {}
+
+    def handle_starttag( self, tag, attrs ):
+        if tag == 'meta':
+            attrs = dict(attrs)
+            if 'mind' in attrs:
+                self.meta[attrs['mind']] = attrs.get('content')
+
+    handle_startendtag = handle_starttag
+
+# #####################################################################################################################################################################################################
+# READ_META
+# #####################################################################################################################################################################################################
+
+def read_meta( file ):
+    stat = os.stat( file )
+    stamp = ( stat.st_mtime_ns, stat.st_size )
+
+    with _lock:
+        cached = _cache.get( file )
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with open(file, 'rb') as f:
+        content = f.read()
+
+    end = content.find(b'</head>')
+    if end >= 0: content = content[:end]
+
+    parser = _MetaParser()
+    parser.feed( content.decode('utf-8', errors='replace') )
+    parser.close()
+
+    with _lock:
+        _cache[file] = ( stamp, parser.meta )
+
+    return parser.meta
@@ -0,0 +1,171 @@
+# #####################################################################################################################################################################################################
+# Filename:     metrics.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Metrics
+# -------
+#   in-process registry of counters and histograms, served on /metrics in Prometheus text format
+#       https://prometheus.io/docs/instrumenting/exposition_formats/
+#
+#   the sources update them on their hot paths: an inc / observe is a dict update under a lock
+#   cache hits and misses are read from the cache.py counters when /metrics is scraped
+#
+# #####################################################################################################################################################################################################
+
+import bisect
+import threading
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+BUCKETS = ( 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0 )
+
+_registry = []
+_lock = threading.Lock()
+
+def _labels( names, values ):
+    if not names: return ''
+    return '{' + ','.join( '{}="{}"'.format( name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') ) for name, value in zip(names, values) ) + '}'
+
+def _number( value ):
+    if value == float('inf'): return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# #####################################################################################################################################################################################################
+# COUNTER
+# #####################################################################################################################################################################################################
+
+class Counter:
+
+    type = 'counter'
+
+    def __init__( self, name, help, labels=() ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        register( self )
+
+    def inc( self, n=1, **labels ):
+        key = tuple( labels.get(name, '') for name in self.labels )
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + n
+
+    def value( self, **labels ):
+        return self._values.get( tuple( labels.get(name, '') for name in self.labels ), 0 )
+
+    def samples( self ):
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.labels: values = { (): 0 }
+        return [ ( self.name, _labels( self.labels, key ), value ) for key, value in sorted( values.items() ) ]
+
+# #####################################################################################################################################################################################################
+# HISTOGRAM
+# #####################################################################################################################################################################################################
+
+class Histogram:
+
+    type = 'histogram'
+
+    def __init__( self, name, help, labels=(), buckets=BUCKETS ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}     # labels: [ count per bucket + inf, sum ]
+        self._lock = threading.Lock()
+        register( self )
+
+    def observe( self, value, **labels ):
+        key = tuple( labels.get(name, '') for name in self.labels )
+        index = bisect.bisect_left( self.buckets, value )
+        with self._lock:
+            entry = self._values.get( key )
+            if entry is None: entry = self._values[key] = [ [0] * (len(self.buckets) + 1), 0.0 ]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples( self ):
+        with self._lock:
+            values = { key: ( list(entry[0]), entry[1] ) for key, entry in self._values.items() }
+
+        samples = []
+        for key, ( counts, total ) in sorted( values.items() ):
+            cumulative = 0
+            for bound, count in zip( self.buckets + (float('inf'),), counts ):
+                cumulative += count
+                samples += [ ( self.name + '_bucket', _labels( self.labels + ('le',), key + (_number(bound),) ), cumulative ) ]
+            samples += [ ( self.name + '_sum', _labels( self.labels, key ), total ) ]
+            samples += [ ( self.name + '_count', _labels( self.labels, key ), cumulative ) ]
+        return samples
+
+# #####################################################################################################################################################################################################
+# COLLECTOR
+# #####################################################################################################################################################################################################
+# values computed when scraped, fn() returns [ ( labels values tuple, value ) ]
+
+class Collector:
+
+    def __init__( self, name, help, type, labels, fn ):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.labels = tuple(labels)
+        self.fn = fn
+        register( self )
+
+    def samples( self ):
+        return [ ( self.name, _labels( self.labels, key ), value ) for key, value in self.fn() ]
+
+# #####################################################################################################################################################################################################
+# REGISTRY
+# #####################################################################################################################################################################################################
+
+def register( metric ):
+    with _lock:
+        _registry.append( metric )
+    return metric
+
+def exposition():
+    with _lock:
+        metrics = list(_registry)
+
+    lines = []
+    for metric in metrics:
+        lines += [ f'# HELP {metric.name} {metric.help}', f'# TYPE {metric.name} {metric.type}' ]
+        lines += [ f'{name}{labels} {_number(value)}' for name, labels, value in metric.samples() ]
+
+    return '\n'.join( lines ) + '\n'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# #####################################################################################################################################################################################################
+# MIND METRICS
+# #####################################################################################################################################################################################################
+
+PAGES = Counter( 'mind_onenote_pages_total', 'OneNote pages synchronized', ['status'] )
+TOPICS = Counter( 'mind_itmz_topics_total', 'iThoughts topics converted' )
+EXPORTED = Counter( 'mind_exported_files_total', 'files written by the static site exporters', ['exporter'] )
+
+GRAPH_REQUESTS = Counter( 'mind_graph_requests_total', 'Microsoft Graph requests by status code', ['status'] )
+GRAPH_THROTTLE = Counter( 'mind_graph_throttle_seconds_total', 'seconds waited after Microsoft Graph 429 answers' )
+
+BYTES_DOWNLOADED = Counter( 'mind_downloaded_bytes_total', 'bytes downloaded from the sources', ['source'] )
+BYTES_WRITTEN = Counter( 'mind_written_bytes_total', 'bytes written below the output folder' )
+
+REQUEST_SECONDS = Histogram( 'mind_http_request_duration_seconds', 'web request latency by route', ['route', 'method'] )
+
+def _caches( value ):
+    from cache import CACHES
+    return [ ( (cache.name,), value(cache) ) for cache in sorted( list(CACHES), key=lambda cache: cache.name ) ]
+
+Collector( 'mind_cache_hits_total', 'cache hits', 'counter', ['cache'], lambda: _caches( lambda cache: cache.hits ) )
+Collector( 'mind_cache_misses_total', 'cache misses', 'counter', ['cache'], lambda: _caches( lambda cache: cache.misses ) )
+Collector( 'mind_cache_entries', 'cached entries', 'gauge', ['cache'], lambda: _caches( len ) )
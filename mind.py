@@ -17,6 +17,10 @@ Run:
   source venv/bin/activate
   python3 mind.py
 
+Convert without the web server:
+  python3 -m mind convert itmz --jobs 4 --incremental
+  python3 -m mind convert onenote --only "Notebook/Section*"
+
 Graph Explorer:
   https://developer.microsoft.com/fr-fr/graph/graph-explorer
 #######################################################################################################################################################################################################
@@ -24,38 +28,68 @@ Graph Explorer:
 
 import argparse
 import os
+import json
+import time
+import importlib
 
-from mytools import *
-
-from flask import Flask, render_template, request, redirect, url_for, send_file
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify, abort, copy_current_request_context, g
 from flask_session import Session
 
-from bs4 import BeautifulSoup
-
 import platform
 
+from concurrent.futures import ThreadPoolExecutor, wait
+
 #import glob
 
 # #####################################################################################################################################################################################################
 # INTERNALS
 # #####################################################################################################################################################################################################
+# source adapters are only imported when first used, see get_source()
 
 # MICROSOFT ONENOTE -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
 import microsoft_config
 
-import onenote as ONENOTE
-
 # APPLE NOTES -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
-import notes as NOTES
-
 # ITHOUGHSX -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
-import itmz as ITMZ
-
 # WORDPRESS -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
+# JOBS ------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+from jobs import JOBS
+
+import census
+
+import output as OUTPUT
+
+import metrics
+
+# CONTEXT ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+# one context per request, handed over to the jobs it starts (see context.py)
+
+from context import Context
+
+# SOURCES ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+SOURCES = { 'onenote': 'onenote', 'notes': 'notes', 'itmz': 'itmz' }
+
+def get_source( name ):
+    return importlib.import_module( SOURCES[name] )
+
+SOURCE_TIMEOUT = 10     # seconds a source has to answer the /catalog fan-out
+
+SOURCE_POOL = ThreadPoolExecutor( max_workers=2 * len(SOURCES), thread_name_prefix='mind-source' )
+
+# RENDER CACHE ----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+from cache import LRUCache
+
+RENDER_CACHE_BYTES = 64 * 1024 * 1024
+
+RENDER_CACHE = LRUCache( max_bytes=RENDER_CACHE_BYTES, name='render', sizeof=lambda html: len(html.encode('utf-8')) )
+
 # #####################################################################################################################################################################################################
 # MAIN
 # #####################################################################################################################################################################################################
@@ -75,8 +109,21 @@ if __name__ == "__main__":
         '--https', action='store_true', dest='https',
         help='HTTPS server')
 
+    # python3 mind.py [serve] runs the web server, python3 -m mind convert ... converts without it (see convert.py)
+    subparsers = parser.add_subparsers( dest='command' )
+
+    sub = subparsers.add_parser( 'serve', help='web server (default)' )
+    sub.add_argument( '--https', action='store_true', dest='https', help='HTTPS server' )
+
+    import convert
+
+    convert.add_arguments( subparsers.add_parser( 'convert', help='convert a source without the web server', formatter_class=argparse.ArgumentDefaultsHelpFormatter ) )
+
     args = parser.parse_args()
 
+    if args.command in ['convert']:
+        raise SystemExit( convert.run( args ) )
+
     # ##############################################################################################################################################
     # Variable
     # ##############################################################################################################################################
@@ -93,12 +140,36 @@ if __name__ == "__main__":
     # Flask
     # ##############################################################################################################################################
 
-    app = Flask(__name__, static_url_path='/output')
+    # output/ is served by output.send_output (ETag, conditional GET, Range), still as url_for('static', ...)
+    app = Flask(__name__, static_folder=None)
 
     app.config.from_object(microsoft_config)
+    app.config['USE_X_SENDFILE'] = os.environ.get('MIND_X_SENDFILE', '') not in ['', '0']
     Session(app)
     app.debug = True
 
+    app.add_url_rule( '/output/<path:filename>', endpoint='static', view_func=OUTPUT.send_output )
+
+    # ##############################################################################################################################################
+    # METRICS
+    # ##############################################################################################################################################
+    # latency by route (the url rule, not the url, to keep the number of series bounded)
+
+    @app.before_request
+    def request_start():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def request_end(response):
+        if 'request_start' in g:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.REQUEST_SECONDS.observe( time.perf_counter() - g.request_start, route=route, method=request.method )
+        return response
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        return Response( metrics.exposition(), mimetype=metrics.CONTENT_TYPE )
+
     # ##############################################################################################################################################
     # ROOT 
     # ##############################################################################################################################################
@@ -113,22 +184,25 @@ if __name__ == "__main__":
     # ACTIONS 
     # ##############################################################################################################################################
 
+    # one level of output/ at a time: /files/?path=[folder]&page=[n]&size=[n], same as json on /files/api
+
     @app.route('/files/')
     def files():
-        filenames = []
-        for root, subdirs, files in os.walk(FOLDER_OUTPUT):
-            for file in files:
-                filenames += [ os.path.join( os.path.relpath(root, start=FOLDER_OUTPUT), file) ]
-        return render_template('files.html', files=filenames)
+        listing = OUTPUT.list_directory( request.args.get('path', ''), request.args.get('page', 0, type=int), request.args.get('size', OUTPUT.LISTING_PAGE_SIZE, type=int) )
+        if listing is None: abort(404)
+        return render_template('files.html', listing=listing)
+
+    @app.route('/files/api')
+    def files_api():
+        listing = OUTPUT.list_directory( request.args.get('path', ''), request.args.get('page', 0, type=int), request.args.get('size', OUTPUT.LISTING_PAGE_SIZE, type=int) )
+        if listing is None: abort(404)
+        return jsonify( listing )
 
     @app.route('/files/<path:filename>')
     def log(filename):
-        print( f'filename: {filename}')
-        x=1/0
-        return send_file( filename )
+        return OUTPUT.send_output( filename )
 
     @app.route("/catalog")
-    @app.route("/content")
     @app.route("/onenote")
     @app.route("/notes")
     @app.route("/itmz")
@@ -139,18 +213,35 @@ if __name__ == "__main__":
 
         results = {}
 
-        for source in [ 'onenote', 'itmz' ]: #[ 'onenote', 'notes']:
+        # PROCESS URL 
+        # a single source (/onenote, /itmz, /notes) answers in the request thread, as long as it takes
+        # the catalog queries the sources concurrently, each one within SOURCE_TIMEOUT seconds:
+        # a source answering late is cancelled if not started yet, reported and left out, the others are still rendered
+
+        sources = [ action ] if action in SOURCES else [ 'onenote', 'itmz' ] #[ 'onenote', 'notes']:
+
+        if len(sources) == 1:
+            responses = { sources[0]: get_source(sources[0]).process_url( Context() ) }
+
+        else:
+            futures = { source: SOURCE_POOL.submit( copy_current_request_context( get_source(source).process_url ), Context() ) for source in sources }
+            done, pending = wait( futures.values(), timeout=SOURCE_TIMEOUT )
 
-            # PROCESS URL 
+            responses = {}
+            for source, future in futures.items():
+                if future in done:
+                    responses[source] = future.result()
+                elif future.cancel():
+                    print( f'.. TIMEOUT [{source.upper()}] cancelled')
+                    responses[source] = { 'comment': f'{source} did not start within {SOURCE_TIMEOUT}s' }
+                else:
+                    print( f'.. TIMEOUT [{source.upper()}] still running')
+                    future.add_done_callback( lambda future, source=source: print( f'.. LATE [{source.upper()}] answered after {SOURCE_TIMEOUT}s, dropped' ) )
+                    responses[source] = { 'comment': f'{source} did not answer within {SOURCE_TIMEOUT}s' }
 
-            if source in ['onenote']:
-                response = ONENOTE.process_url()
-            elif source in ['notes']:
-                response = NOTES.process_url()
-            elif source in ['itmz']:
-                response = ITMZ.process_url()
-            else:
-                response = {}
+        for source in sources:
+
+            response = responses[source]
 
             # PROCESS RESPONSE 
 
@@ -164,31 +255,37 @@ if __name__ == "__main__":
                 if 'elements' not in results: results['elements'] = []
                 results['elements'] += response['elements']
 
-                all_attr = {}
-                for element in response['elements']:
-                    if 'html' in element:
-                        for tag in BeautifulSoup(element['html'], 'html.parser').find_all():
-                            if tag.name in all_attr:
-                                all_attr[tag.name] += tag.attrs.keys()
-                            else:
-                                all_attr[tag.name] = tag.attrs.keys()
-                            all_attr[tag.name] = list(dict.fromkeys( all_attr[tag.name] ))
-                print( f'TAGS and ATTRIBUTES: {all_attr}')
-
             if 'comments' in response:
                 print( f'.. ELEMENTS [{len(response["comments"])}]')
                 results['comments'] = response['comments']
 
+            if 'job' in response:
+                print( f'.. JOB [{response["job"]["id"]}]')
+                if 'jobs' not in results: results['jobs'] = []
+                results['jobs'] += [ response['job'] ]
+
+            if 'comment' in response:
+                results['comment'] = results['comment'] + '\n' + response['comment'] if 'comment' in results else response['comment']
+
             if 'note' in response:
                 print( '.. NOTE')
                 note = response['note']
 
                 if 'html' in note:
                     print( '.. BODY')
+
+                    # rendered notes are cached until their main.html changes
+                    stat = os.stat( note['file'] )
+                    validator = ( stat.st_mtime_ns, stat.st_size )
+                    rendered = RENDER_CACHE.get( note['file'], validator )
+                    if rendered is not None:
+                        return rendered
+
                     # ADD {{ url_for('static', filename = 'subfolder/some_image.jpg') }} FOR FLASK / IMAGES AND ATTACHMENTS
                     # <img src="images/some_image.jpg" --> <img src=url_for('static', filename = 'subfolder/images/some_image.jpg')
                     # <object data="attachments/some_attachment.pdf" --> <object data=url_for('static', filename = 'attachments/some_attachment.pdf')
                     rel_folder = os.path.relpath(note['folder'], start=FOLDER_OUTPUT)
+                    from bs4 import BeautifulSoup
                     soup = BeautifulSoup( note['html'], features="html.parser" )
 
                     for image in soup.findAll("img"):
@@ -205,42 +302,158 @@ if __name__ == "__main__":
                     href.string = ">> " + href.attrs['href'] + " <<"
                     soup.body.insert(1, href)
 
-                    return str(soup)
+                    rendered = str(soup)
+                    RENDER_CACHE.set( note['file'], rendered, validator )
+
+                    return rendered
 
             # WRITE ONENOTE TO NOTES
              
             if source in ['onenote'] and command in ['write'] and 'note' in response:
                 print( f'name {response["note"]["name"]} folder {response["note"]["folder"]}')
-                response['comment'] = NOTES.write( response['note']['name'], response['note']['body'], response['note']['folder'], response['note']['hierarchy'], response['note']['attachments'] )
+                response['comment'] = get_source('notes').write( Context(), response['note']['name'], response['note']['body'], response['note']['folder'], response['note']['hierarchy'], response['note']['attachments'] )
 
         return render_template('base.html', result=results)
 
+    # ##############################################################################################################################################
+    # CONTENT
+    # ##############################################################################################################################################
+    # the content table is filled page by page through /content/data (DataTables server-side processing)
+    # a note body is only fetched from /content/body when its card is expanded
+
+    CONTENT_SOURCES = [ 'onenote', 'itmz' ]
+    CONTENT_COLUMNS = [ 'name', 'date' ]
+    CONTENT_PAGE_MAX = 100
+
+    @app.route("/content")
+    def content():
+        return render_template('base.html', result={ 'content': True })
+
+    # metadata of the notes of all the sources, walked once and kept until a conversion writes notes (see output.note_index)
+    def content_index():
+        context = Context()
+        return OUTPUT.note_index( 'content', lambda: [ element for name in CONTENT_SOURCES for element in get_source(name).list_notes( context.folder(name), None, body=False ) ], context.output_root )
+
+    @app.route("/content/data")
+    def content_data():
+        index = content_index()
+
+        total = len(index.elements)
+
+        # sort (once per column, see output.NoteIndex)
+        column = request.args.get('order[0][column]', '0')
+        column = CONTENT_COLUMNS[int(column)] if column.isdigit() and int(column) < len(CONTENT_COLUMNS) else CONTENT_COLUMNS[0]
+        elements = index.ordered( column, reverse=request.args.get('order[0][dir]') == 'desc' )
+
+        # search
+        search = request.args.get('search[value]', '').strip().lower()
+        if search:
+            elements = [ element for element in elements if search in (element['name'] or '').lower() ]
+
+        # page
+        start = max( 0, request.args.get('start', 0, type=int) )
+        length = request.args.get('length', 10, type=int)
+        length = CONTENT_PAGE_MAX if length < 0 else min( length, CONTENT_PAGE_MAX )
+
+        return jsonify( {
+            'draw': request.args.get('draw', 0, type=int),
+            'recordsTotal': total,
+            'recordsFiltered': len(elements),
+            'data': [ { 'name': element['name'], 'date': element['date'], 'source': element['source'], 'id': element['id'] } for element in elements[start:start+length] ],
+        } )
+
+    @app.route("/content/body")
+    def content_body():
+        from bs4 import BeautifulSoup
+
+        if request.args.get('source') not in CONTENT_SOURCES or not request.args.get('id'): abort(404)
+
+        # id -> main.html from the index, no walk
+        element = content_index().get( request.args.get('source'), request.args.get('id') )
+        if not element or not os.path.isfile( element['file'] ): abort(404)
+
+        with open(element['file'], 'rb') as f:
+            soup = BeautifulSoup( f.read(), features="html.parser" )
+
+        return Response( soup.body.prettify() if soup.body else '', mimetype='text/plain' )
+
+    # ##############################################################################################################################################
+    # STATS
+    # ##############################################################################################################################################
+    # census stored at conversion time, notes converted before have none until: python3 census.py output
+
+    @app.route("/stats/tags")
+    def stats_tags():
+        total = {}
+        notes = 0
+        missing = 0
+
+        for element in content_index().elements:
+            notes += 1
+            if element.get('census') is None: missing += 1
+            census.merge( total, element.get('census') )
+
+        return jsonify( { 'notes': notes, 'without_census': missing, 'census': total } )
+
+    # ##############################################################################################################################################
+    # JOBS
+    # ##############################################################################################################################################
+
+    @app.route("/jobs")
+    def jobs():
+        return jsonify( [ job.to_dict() for job in JOBS.list() ] )
+
+    @app.route("/jobs/<id>")
+    def job(id):
+        job = JOBS.get( id )
+        if not job: abort(404)
+        return jsonify( job.to_dict() )
+
+    @app.route("/jobs/<id>/events")
+    def job_events(id):
+        job = JOBS.get( id )
+        if not job: abort(404)
+
+        last_id = request.headers.get('Last-Event-ID', '0')
+        last_id = int(last_id) if last_id.isdigit() else 0
+
+        def stream():
+            for event in job.events( last_id ):
+                if event is None:
+                    yield ': keep-alive\n\n'
+                else:
+                    yield 'id: {}\nevent: {}\ndata: {}\n\n'.format( event[0], event[1], json.dumps(event[2]) )
+
+        return Response( stream(), mimetype='text/event-stream', headers={ 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no' } )
+
     # ##############################################################################################################################################
     # MICROSOFT LOGIN 
     # ##############################################################################################################################################
 
     @app.route("/getAToken")
     def microsoft_token():
-        return redirect( ONENOTE.process_url() )
+        return redirect( get_source('onenote').process_url() )
 
     @app.route("/login")
     def microsoft_login():
-        auth_url = ONENOTE.process_url()
+        auth_url = get_source('onenote').process_url()
         #return "<a href='%s'>Login with Microsoft Identity</a>" % auth_url
         return render_template( 'login.html', auth_url=auth_url )
 
     @app.route("/logout")
     def microsoft_logout():
-        return redirect( ONENOTE.process_url() )
+        return redirect( get_source('onenote').process_url() )
 
     # ##############################################################################################################################################
     # SERVE
     # ##############################################################################################################################################
 
+    # no module state is changed by requests or jobs anymore: requests are served by concurrent threads
+
     if platform.system() == 'Darwin':
         if args.https:
-            app.run(ssl_context='adhoc', host='0.0.0.0', port=8888)
+            app.run(ssl_context='adhoc', host='0.0.0.0', port=8888, threaded=True)
         else:
-            app.run(host='0.0.0.0')
+            app.run(host='0.0.0.0', threaded=True)
     else:
-        app.run(ssl_context='adhoc', host='0.0.0.0', port=8888)
+        app.run(ssl_context='adhoc', host='0.0.0.0', port=8888, threaded=True)
@@ -0,0 +1,179 @@
+import os
+import sys
+import glob
+
+from datetime import datetime as dt
+
+# pip3 install pandas
+import pandas as pd
+
+from tabulate import tabulate
+
+from mytools import *
+
+# #################################################################################################################################
+# ELEMENT
+# #################################################################################################################################
+
+ELEMENT_COLUMNS=[
+    'source',       # onenote | itmz | notes
+    'what',
+    'type',
+    'id',           # unique identifier
+    'number',
+    'title',
+    'created',
+    'modified',
+    'authors',
+    'slug',
+    'top',
+    'parent',
+    'childs',
+    'publish',      # should be published: True | False
+    'body'
+]
+
+def empty_elements():
+    return pd.DataFrame( columns = ELEMENT_COLUMNS )
+
+# ===============================================================================================================================================
+# print_frame
+# ===============================================================================================================================================
+
+def print_frame( content, na=True ):
+    tmp = content.copy()
+    if not na: tmp.dropna( axis='columns', how='all', inplace=True)
+    print( tabulate( tmp, headers='keys', tablefmt="fancy_grid", showindex="never" ) )
+    del tmp
+
+# ===============================================================================================================================================
+# _out_file
+# ===============================================================================================================================================
+# jamstack[_type]_[timestamp].[ext] in directory, files of a previous save with the same timestamp are removed
+
+def _out_file( directory, type, timestamp, ext ):
+    for out_file in glob.glob(os.path.join( directory, 'jamstack_*_{}.{}'.format( timestamp, ext ))):
+        myprint( "removing {}".format(out_file) )
+        os.remove( out_file )
+
+    out_file = os.path.join( directory, 'jamstack{}_{}.{}'.format( ('_' + type) if type else '', timestamp, ext) )
+    out_dir = os.path.dirname(out_file)
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+
+    return out_file
+
+# ===============================================================================================================================================
+# save_excel
+# ===============================================================================================================================================
+# files saved together share the same timestamp: pass the one returned by the first call to the next ones
+# streaming: xlsxwriter constant_memory mode, rows are written one by one and flushed, memory stays flat whatever the number of rows
+#            None = streaming above EXCEL_STREAM_ROWS rows
+# body: False leaves the body column out
+# cells are cut at EXCEL_MAX_CELL characters (Excel limit), html bodies often go over it
+
+EXCEL_MAX_CELL = 32767
+EXCEL_STREAM_ROWS = 10000
+
+def _excel_cell( value ):
+    if value is None or value != value: return ''
+    if isinstance( value, ( list, tuple, set, dict ) ): value = str( value )
+    if isinstance( value, str ) and len( value ) > EXCEL_MAX_CELL: value = value[:EXCEL_MAX_CELL]
+    return value
+
+def save_excel( directory, elements, type=None, timestamp=None, streaming=None, body=True ):
+
+    myprint( '', line=True, title='SAVE EXCEL{}'.format( (' ' + type.upper()) if type else ''))
+
+    out_file = None
+
+    try:
+        if not timestamp: timestamp = dt.now().strftime("%d_%b_%Y_%H_%M_%S")
+
+        out_file = _out_file( directory, type, timestamp, 'xlsx' )
+
+        if not body: elements = elements.drop( columns=['body'], errors='ignore' )
+
+        if streaming is None: streaming = len(elements) > EXCEL_STREAM_ROWS
+
+        if streaming:
+            import xlsxwriter
+
+            workbook = xlsxwriter.Workbook( out_file, { 'constant_memory': True, 'strings_to_urls': False, 'strings_to_formulas': False, 'default_date_format': 'yyyy-mm-dd hh:mm:ss', 'remove_timezone': True } )
+            worksheet = workbook.add_worksheet( 'Elements' )
+            header = workbook.add_format( { 'bold': True } )
+
+            worksheet.write_row( 0, 0, [ str(column) for column in elements.columns ], header )
+            for row, values in enumerate( elements.itertuples( index=False, name=None ), start=1 ):
+                worksheet.write_row( row, 0, [ _excel_cell( value ) for value in values ] )
+
+            workbook.close()
+
+        else:
+            elements = elements.apply( lambda column: column.map( _excel_cell ) if column.dtype == object else column )
+
+            writer = pd.ExcelWriter(out_file, engine='xlsxwriter')
+            elements.to_excel( writer, sheet_name='Elements', index=False, na_rep='')
+            writer.close()
+
+        myprint( "{} rows saved in file {}.".format(len(elements), out_file), prefix="..." )
+
+    except:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        myprint( "Something went wrong [{} - {}] at line {} in {} with file {}.".format(exc_type, exc_obj, exc_tb.tb_lineno, 'save_excel', out_file), prefix="..." )
+
+    return timestamp
+
+# ===============================================================================================================================================
+# save_parquet
+# ===============================================================================================================================================
+# element table for analysis: parquet (default) or feather (arrow ipc), much faster and smaller than excel, no cell size limit
+# string columns with few distinct values (source, what, type, parent, authors...) are stored dictionary encoded (pandas category)
+# columns mixing strings with other values (lists, dates) are stored as strings
+# body: False leaves the body column out, it is most of the size
+# pip3 install pyarrow
+
+PARQUET_CATEGORY_RATIO = 0.5      # distinct values / rows under which a string column is dictionary encoded
+
+def _arrow_frame( elements, body=True ):
+    frame = elements.drop( columns=['body'], errors='ignore' ) if not body else elements.copy()
+
+    for column in frame.columns:
+        if frame[column].dtype != object: continue
+
+        values = frame[column]
+        if not values.map( lambda value: value is None or value != value or isinstance( value, str ) ).all():
+            values = values.map( lambda value: None if value is None or value != value else str( value ) )
+
+        if column != 'body' and len(values) and values.nunique() <= PARQUET_CATEGORY_RATIO * len(values):
+            values = values.astype( 'category' )
+
+        frame[column] = values
+
+    return frame
+
+def save_parquet( directory, elements, type=None, timestamp=None, body=True, format='parquet' ):
+
+    myprint( '', line=True, title='SAVE {}{}'.format( format.upper(), (' ' + type.upper()) if type else ''))
+
+    out_file = None
+
+    try:
+        if not timestamp: timestamp = dt.now().strftime("%d_%b_%Y_%H_%M_%S")
+
+        out_file = _out_file( directory, type, timestamp, format )
+
+        frame = _arrow_frame( elements, body )
+
+        if format in ['feather']:
+            frame.reset_index( drop=True ).to_feather( out_file, compression='zstd' )
+        else:
+            frame.to_parquet( out_file, engine='pyarrow', index=False, compression='zstd' )
+
+        myprint( "{} rows saved in file {}.".format(len(frame), out_file), prefix="..." )
+
+    except:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        myprint( "Something went wrong [{} - {}] at line {} in {} with file {}.".format(exc_type, exc_obj, exc_tb.tb_lineno, 'save_parquet', out_file), prefix="..." )
+
+    return timestamp
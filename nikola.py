@@ -10,13 +10,13 @@
 # -----------------
 #   content
 #   ├── pages
-#   |   ├── [filename1].html
+#   |   ├── [hierarchy]/[filename1].html
 #   |   |       external --> url
 #   |   |       internal in --> {filename}#[uuid]
 #   |   |       internal out --> {filename}[filename].html#[ref]
 #   |   └── [filename2].html --> {filename}[filename2].html
 #   ├── posts
-#   |   ├── [filename3].html
+#   |   ├── [hierarchy]/[filename3].html
 #   |   |       external --> url
 #   |   |       internal in --> {filename}#[uuid]
 #   |   |       internal out --> {filename}[filenamex].html#[ref]
@@ -32,18 +32,25 @@
 #           PAGE_PATHS = ['pages']
 #           ARTICLE_PATHS = ['articles']
 #           STATIC_PATHS = ['attachments']
+#
+#   write( directory, elements )        element table, rendered and written chunk by chunk
+#   export( output, directory )         notes of an output folder (see ir.py), streamed chunk by chunk with their resources
+#   both are incremental: a file whose content did not change is not rewritten (hashes in [directory]/nikola/.manifest.json)
+#   and the files they produced before and not anymore are deleted, each one its own files (see sync.py)
 # ###################################################################################################################################################
 
 import os
 import sys
 import shutil
 
-from bs4 import BeautifulSoup
+from mypandas import *
+
+import metrics
 
-# pip3 install pandas
-import pandas as pd
+from sync import SiteSync
 
-from mytools import *
+from slug import slug_column
+from ir import head, relink
 
 MAPPING = {
     'title': None,
@@ -72,74 +79,98 @@ MAPPING = {
 }
 
 # ###################################################################################################################################################
-# WRITE
+# FILES
 # ###################################################################################################################################################
+# element (element table columns) + html body -> ( { relative path: text }, { relative path: resource file } )
+#   posts go to posts/[hierarchy]/[slug].html, everything else to pages/[hierarchy]/[slug].html
+#   resources { reference in the body: file } are copied to files/objects/[hierarchy]/[slug]/ and served as /objects/[hierarchy]/[slug]/
+#   used: paths already given in this run, a slug taken in the same folder gets a -2, -3... suffix (with a warning)
 
-def write( directory, elements=empty_elements() ):
+NIKOLA_CHUNK = 500
 
-    elements['nikola'] = nan
-
-    folder_site = os.path.join(directory, 'nikola')
+def files( element, body, resources=None, hierarchy=(), used=None ):
+    folder = 'posts' if element['type'] == 'post' else 'pages'
+    slug = element['slug']
 
-    def _write_element( element ):
-        nonlocal folder_site
+    if used is not None:
+        n = 1
+        while os.path.join( folder, *hierarchy, slug ) in used:
+            n += 1
+            slug = '{}-{}'.format( element['slug'], n )
+        if n > 1: print( 'Nikola slug {} already used in {}, saved as {}.'.format( element['slug'], os.path.join( folder, *hierarchy ), slug ) )
+        used.add( os.path.join( folder, *hierarchy, slug ) )
 
-        try:
+    resources = resources or {}
+    links = { ref: '/' + '/'.join( [ 'objects', *hierarchy, slug, ref ] ) for ref in resources }
 
-            # -------------------------------------------------------------------------------------------------------------------------------------------
-            # header
-            # -------------------------------------------------------------------------------------------------------------------------------------------
+    text = head( element, MAPPING ) + ( relink( body, links ) if links else body )
 
-            text = '<head>\n'
+    return { os.path.join( folder, *hierarchy, slug + '.html' ): text }, { os.path.join( 'files', *links[ref][1:].split('/') ): path for ref, path in resources.items() }
 
-            if 'title' in element: text += '\t<title>{}</title>\n'.format(element['title'])
-
-            # metadata
-            for key, val in MAPPING.items():
-                if val:
-                    if val in elements: text += '\t<meta name="{}" content="{}" />\n'.format(key, element[val])
-                    else: text += '\t<meta name="{}" content="{}" />\n'.format(key, val)
+# ###################################################################################################################################################
+# EMIT
+# ###################################################################################################################################################
+# note IR (see ir.py) -> [type]s/[source]/[hierarchy]/[slug].html, resources in files/objects/[source]/[hierarchy]/[slug]/
 
-            text += '</head>\n'
+def emit( note, used=None ):
+    return files( note.element(), '<body>' + note.body + '</body>', note.resource_files(), [ note.source, *note.hierarchy ], used )
 
-            # -------------------------------------------------------------------------------------------------------------------------------------------
-            # body
-            # -------------------------------------------------------------------------------------------------------------------------------------------
+# ###################################################################################################################################################
+# WRITE_CHUNK
+# ###################################################################################################################################################
+# files of a chunk written through the site sync (see sync.py): unchanged files are not rewritten, resources not copied again
+# return the paths of the html files in place (None on error)
 
-            soup = BeautifulSoup(element['body'] if element['body'] else '<body></body>', features="html.parser")
+def _write_chunk( sync, folder_site, items, pool ):
 
-            text += str( soup )
+    html = [ ( os.path.join( folder_site, path ), text ) for texts, copies in items for path, text in texts.items() ]
+    resources = [ ( os.path.join( folder_site, path ), resource ) for texts, copies in items for path, resource in copies.items() ]
 
-            # -------------------------------------------------------------------------------------------------------------------------------------------
-            # write html
-            # -------------------------------------------------------------------------------------------------------------------------------------------
+    written = list( pool.map( lambda args: sync.write( *args ), html ) )
+    list( pool.map( lambda args: sync.copy( *args ), resources ) )
 
-            element['nikola'] = os.path.join( folder_site, element['type']+'s', element['slug'] + '.html' )
-            out_dir = os.path.dirname(element['nikola'])
+    return [ path if ok else None for ( path, text ), ok in zip( html, written ) ]
 
-            myprint('> ' + element['nikola'])
+# ###################################################################################################################################################
+# WRITE
+# ###################################################################################################################################################
+# element table -> pages/[id parts reversed]/ and posts/[id parts reversed]/ (as pelican.write), chunksize rows rendered and written at a time
+# incremental: only the files whose content changed are written, the files of elements gone or not published anymore are deleted
 
-            if not os.path.isdir(out_dir):
-                os.makedirs(out_dir)
+def write( directory, elements=empty_elements(), chunksize=NIKOLA_CHUNK, incremental=True ):
+    from concurrent.futures import ThreadPoolExecutor
 
-            with open(element['nikola'], 'w', encoding='utf-8') as fs:
-                fs.write(text) 
+    elements['nikola'] = None
 
-        except:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-            myprint("write error [{} - {}] at line {} in {}.".format(exc_type, exc_obj, exc_tb.tb_lineno, fname), prefix='...') 
+    slug_column( elements )
 
-        return element
+    folder_site = os.path.join(directory, 'nikola')
 
     myprint( '', line=True, title='NIKOLA')
 
     try:
 
-        cond = elements['publish']
+        cond = elements['publish'].fillna(False).astype(bool)
         cond &= ~elements['body'].isna()
-        myprint( 'Processing {} elements to Nikola'.format(len(elements[cond])))
-        #elements[cond] = elements[cond].apply(_write_element, axis='columns')
+        rows = elements.index[cond]
+        myprint( 'Processing {} elements to Nikola'.format(len(rows)))
+
+        sync = SiteSync( folder_site, incremental, owner='nikola.write' )
+        used = set()
+
+        with ThreadPoolExecutor() as pool:
+            for start in range( 0, len(rows), chunksize ):
+                chunk = elements.loc[ rows[start:start+chunksize] ]
+                items = [ files( element, element['body'], hierarchy=list( reversed( element['id'].split('!') ) ), used=used ) for element in chunk.to_dict('records') ]
+
+                elements.loc[ chunk.index, 'nikola' ] = _write_chunk( sync, folder_site, items, pool )
+
+        sync.prune()
+        stats = sync.save()
+
+        metrics.EXPORTED.inc( stats['written'], exporter='nikola' )
+
+        myprint( '{} files written, {} unchanged, {} deleted in {}'.format( stats['written'], stats['unchanged'], stats['deleted'], folder_site ), prefix='>' )
 
     except:
         exc_type, exc_obj, exc_tb = sys.exc_info()
@@ -148,17 +179,70 @@ def write( directory, elements=empty_elements() ):
 
     return elements   
 
+# ###################################################################################################################################################
+# EXPORT
+# ###################################################################################################################################################
+# notes of an output folder (see ir.py) -> pages/, posts/ and files/objects/, streamed chunksize notes at a time
+# orphans are only deleted after a complete export (source None) where every note loaded and emitted
+# write() and export() (and ir.publish) share the site folder, each one only prunes the files it produced (see sync.py)
+# return { 'notes': n, 'written': n, 'unchanged': n, 'copied': n, 'deleted': n, 'errors': n, 'collisions': n }
+
+def export( output, directory, source=None, chunksize=NIKOLA_CHUNK, incremental=True ):
+    from itertools import islice
+    from concurrent.futures import ThreadPoolExecutor
+    from ir import notes
+
+    folder_site = os.path.join(directory, 'nikola')
+
+    myprint( '', line=True, title='NIKOLA EXPORT')
+
+    sync = SiteSync( folder_site, incremental, owner='nikola.export' )
+    used = set()
+    failed = []
+    count = 0
+
+    with ThreadPoolExecutor() as pool:
+        stream = notes( output, source, failed )
+        while True:
+            chunk = list( islice( stream, chunksize ) )
+            if not chunk: break
+
+            items = []
+            for note in chunk:
+                try:
+                    items += [ emit( note, used ) ]
+                except:
+                    exc_type, exc_obj, exc_tb = sys.exc_info()
+                    myprint( "Something went wrong [{} - {}] at line {} in {} [{}].".format(exc_type, exc_obj, exc_tb.tb_lineno, 'nikola.emit', note.file), prefix='...' )
+                    sync.error()
+
+            _write_chunk( sync, folder_site, items, pool )
+            count += len(chunk)
+
+            myprint( '{} notes, {} files written'.format( count, sync.stats['written'] ), prefix='>' )
+
+    if not source and not failed: sync.prune()
+    stats = sync.save()
+
+    metrics.EXPORTED.inc( stats['written'], exporter='nikola' )
+
+    return { 'notes': count, **stats }
+
 # ###################################################################################################################################################
 # CLEAR
 # ###################################################################################################################################################
+# write and export keep the site folder in sync (see sync.py), full=True still removes the whole folder
 
-def clear( directory ): 
+def clear( directory, full=False ): 
 
     myprint( '', line=True, title='CLEAR NIKOLA FILES')
 
     _directory = os.path.join( directory, 'nikola' )
 
+    if not full:
+        myprint( 'Keeping {}: unchanged files are not rewritten and orphans are deleted by write()'.format(_directory), prefix='>' )
+        return
+
     if os.path.isdir(_directory):
         myprint( 'Removing {}...'.format(_directory), prefix='>' )
         shutil.rmtree(_directory)
-        os.makedirs(_directory)
\ No newline at end of file
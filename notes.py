@@ -12,53 +12,39 @@
 #
 # #####################################################################################################################################################################################################
 
-import json
-import requests
-import re
 import os
 import sys
-import shutil
-import string
-import time
 
 from datetime import datetime as dt
-import pytz
 
-from flask import Flask, render_template, session, request, redirect, url_for
-from flask_session import Session
+from flask import request
 
-from bs4 import BeautifulSoup
+from mytools import clean_html
 
-from mytools import *
+from context import Context
 
-from macnotesapp import NotesApp
-
-# #####################################################################################################################################################################################################
-# INTERNALS
-# #####################################################################################################################################################################################################
-
-notesapp = None
-
-output_directory = os.path.join( os.path.dirname(__file__), 'output', 'notes' )
+# macnotesapp is imported when first used (macOS only), the NotesApp handle lives in the context
 
 # #####################################################################################################################################################################################################
 # INIT
 # #####################################################################################################################################################################################################
+# output: output root, notes are read from [output]/notes
 
 def init( output=None ):
-    global notesapp, output_directory
 
-    notesapp = NotesApp()
+    context = Context( output_root=output )
+    context.notesapp
 
-    if output:
-        output = output_directory
+    return context
 
 # #####################################################################################################################################################################################################
 # PROCESS_URL
 # #####################################################################################################################################################################################################
 
-def process_url():
-    global notesapp, output_directory
+def process_url( context=None ):
+
+    context = context or Context()
+    output_directory = context.folder('notes')
 
     try:
     
@@ -86,9 +72,7 @@ def process_url():
 
             if command in ['parse', 'catalog']:
 
-                if not notesapp: notesapp = NotesApp()
-
-                accounts = notesapp.accounts
+                accounts = context.notesapp.accounts
 
                 print( f'accounts: {accounts}')
 
@@ -207,14 +191,11 @@ def process_url():
 # WRITE
 # #####################################################################################################################################################################################################
 
-def write( name, body, folder=None, hierarchy=[], attachments=[] ):
-    global notesapp
+def write( context, name, body, folder=None, hierarchy=[], attachments=[] ):
 
-    if not notesapp: notesapp = NotesApp()
-                    
     body = clean_html( body, folder )
 
-    account = notesapp.account()
+    account = context.notesapp.account()
     new_note = account.make_note( name=name, 
                                   body=body, 
                                   folder=None)
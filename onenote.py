@@ -14,8 +14,6 @@
 #
 # #####################################################################################################################################################################################################
 
-import json
-import requests
 import re
 import os
 import sys
@@ -26,24 +24,27 @@ import time
 import pathlib
 
 from datetime import datetime as dt
-import pytz
-from unidecode import unidecode
 
 from xml.etree import ElementTree
-from pathvalidate import sanitize_filename
 from html.parser import HTMLParser
 from fnmatch import fnmatch
 
-from bs4 import BeautifulSoup   
+# bs4, msal and requests are imported when first used
 
-from mytools import *
+from flask import session, request, redirect, url_for, copy_current_request_context, has_request_context
 
-from flask import Flask, render_template, session, request, redirect, url_for
-from flask_session import Session
+import uuid
 
-import msal
+from cache import TTLCache
+from jobs import JOBS
+from census import add_census, parse_census
+from metadata import read_meta
+from context import Context
 
-import uuid
+import metrics
+
+from sanitize import sanitize
+from slug import folder_name, page_name_batch
 
 # #####################################################################################################################################################################################################
 # INTERNALS
@@ -54,10 +55,17 @@ import microsoft_config
 MICROSOFT_GRAPH_URL = 'https://graph.microsoft.com/v1.0'
 ALL_NOTEBOOKS = 'All Notebooks'
 
-#onenote = None
+CATALOG_TTL = 300     # seconds a notebook / section / section group listing is reused
 
-output_directory = os.path.join( os.path.dirname(__file__), 'output', 'onenote' )
+# outside of a web request (command line), the msal token cache is kept in this file
+# the web login also saves its cache there when MIND_TOKEN_CACHE is set, so a browser login can be reused by the command line
+TOKEN_CACHE_FILE = os.environ.get( 'MIND_TOKEN_CACHE', os.path.join( os.path.expanduser('~'), '.mind', 'token_cache.json' ) )
 
+catalog_cache = TTLCache( ttl=CATALOG_TTL, name='onenote_catalog' )
+
+#onenote = None
+
+# output folder and Graph http session come from the context (see context.py)
 
 # -----------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 # GET_OBJECT_DATE
@@ -71,7 +79,7 @@ def _get_object_date( obj ):
         except:
             obj_date = dt.strptime(obj_date, '%Y-%m-%dT%H:%M:%SZ')
     except:
-        obj_date = dt.now(dt.timezone.utc)
+        obj_date = dt.utcnow()
 
     return obj_date
 
@@ -89,7 +97,9 @@ def _get_file_date( file ):
 # PROCESS_URL
 # #####################################################################################################################################################################################################
 
-def process_url():
+def process_url( context=None ):
+
+    context = context or Context()
 
     try:
                     
@@ -101,6 +111,7 @@ def process_url():
         elements = []
         note = {}
         comments = ''
+        job = None
 
         # ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
         # GETATOKEN
@@ -136,6 +147,7 @@ def process_url():
         # ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
         elif action in ['logout']:
+            invalidate_catalog()
             session.clear()  
             return "https://login.microsoftonline.com/common/oauth2/v2.0/logout?post_logout_redirect_uri=" + url_for("microsoft_login", _external=True)
 
@@ -146,7 +158,7 @@ def process_url():
 
         if action in ['parse', 'catalog']:
 
-            notebooks = _get_json(f'{MICROSOFT_GRAPH_URL}/me/onenote/notebooks')
+            notebooks = _get_catalog(f'{MICROSOFT_GRAPH_URL}/me/onenote/notebooks')
 
             print(f'Got {len(notebooks)} notebooks : {", ".join( [ nb["displayName"] for nb in notebooks ] )}.')
 
@@ -161,6 +173,8 @@ def process_url():
         # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
         # ONENOTE
         #   ?NOTEBOOK=
+        #   &PRIORITY=notebook,notebook     notebooks to crawl first
+        #   &ORDER=recent|order             recent pages first (default) or OneNote order
         # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
         # requires to be online
 
@@ -170,8 +184,20 @@ def process_url():
 
             if notebook:
 
+                name = notebook
                 if notebook in [ALL_NOTEBOOKS]: notebook = None
-                _download_notebooks( output_directory, select= [notebook] if notebook else None )
+                priority = [ nb.strip() for nb in request.args.get('priority', '').split(',') if nb.strip() ]
+
+                # the job thread keeps the request context to read the session token cache
+                # the response is sent before the job ends: a token refreshed by the job is not saved in the session cookie
+                download = copy_current_request_context( _download_notebooks )
+
+                # one onenote job per user: All Notebooks and a single notebook write the same output folders
+                job, created = JOBS.submit( f'onenote:{_user_key()}', download, context, 
+                                            select= [notebook] if notebook else None, priority=priority, order=request.args.get('order', 'recent'),
+                                            name=f'onenote {name}' )
+                if not created:
+                    comments = f'onenote synchronization already running as job {job.id} ({job.name}), {name} not started'
 
         # ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
         # ONENOTE
@@ -182,7 +208,8 @@ def process_url():
 
             identifier = request.args.get('id')
 
-            elements = list_notes( output_directory, identifier )
+            # a single note is rendered from its main.html, no need to parse its body here
+            elements = list_notes( context.folder('onenote'), identifier, body=not identifier )
 
             if identifier:
                 if len(elements) == 1:
@@ -208,6 +235,7 @@ def process_url():
         if len(elements) > 0: result['elements'] = elements
         if len(note) > 0: result['note'] = note
         if len(comments) > 0: result['comment'] = comments
+        if job: result['job'] = job.to_dict()
 
         return result
 
@@ -222,7 +250,9 @@ def process_url():
 # LIST_NOTES
 # #####################################################################################################################################################################################################
 
-def list_notes( dir, identifier ):
+# body=False only lists the metadata (no html, no body), read from the <head> of main.html
+
+def list_notes( dir, identifier, body=True ):
     try:
 
         elements = []
@@ -240,13 +270,27 @@ def list_notes( dir, identifier ):
                         'folder': root,
                         'file': os.path.join(root, 'main.html'),
                         'indent': len(os.path.normpath(root).split(os.sep)) - base,
-                        'hierarchy': os.path.relpath(root, start=output_directory).split(os.sep),
+                        'hierarchy': os.path.relpath(root, start=dir).split(os.sep),
                     }
                     element['hierarchy'].pop()
                     element['hierarchy'].insert(0, 'onenote')
 
                     element['url'] = pathlib.Path(element['file']).as_uri()
 
+                    meta = read_meta( element['file'] )
+
+                    element['name'] = meta.get('title')
+                    element['date'] = meta.get('lastModifiedDateTime')
+                    element['id'] = meta.get('id')
+                    element['census'] = parse_census( meta.get('census') )
+
+                    if not element['id'] or (identifier and element['id'] != identifier):
+                        continue
+
+                    if not body:
+                        elements += [ element ]
+                        continue
+
                     with open(element['file'], 'rb') as f:
                         f_content = f.read()
 
@@ -255,22 +299,12 @@ def list_notes( dir, identifier ):
                     # <meta mind="" content="">
                     # mind = ['id', 'self', 'title', 'contentUrl', 'level', 'order', 'createdDateTime', 'lastModifiedDateTime']
                     
+                    from bs4 import BeautifulSoup
                     soup = BeautifulSoup( f_content, features="html.parser" )
 
-                    tag = soup.find("meta", {"mind":"title"})
-                    element['name'] = tag["content"] if tag else None
-
-                    tag = soup.find("meta", {"mind":"lastModifiedDateTime"})
-                    element['date'] = tag["content"] if tag else None
-
-                    tag = soup.find("meta", {"mind":"id"})
-                    element['id'] = tag["content"] if tag else None
-
                     element['body'] = soup.body.prettify()
 
-                    if element['id'] and (not identifier or element['id'] == identifier) and ('main.html' in files):
-
-                        elements += [ element ]
+                    elements += [ element ]
 
         return elements  
 
@@ -292,10 +326,15 @@ def list_notes( dir, identifier ):
 
 def get_note( element ):
     try:
+        if 'html' not in element:
+            with open(element['file'], 'rb') as f:
+                element['html'] = f.read()
+
         note = {
             'name': element['name'],
             'hierarchy': element['hierarchy'],
             'folder': element['folder'],
+            'file': element['file'],
             'url': element['url'],
             'html': element['html'],
             'attachments': [],
@@ -322,16 +361,28 @@ def get_note( element ):
 # #####################################################################################################################################################################################################
 
 def _load_cache():
+    import msal
     cache = msal.SerializableTokenCache()
-    if session.get("token_cache"):
-        cache.deserialize(session["token_cache"])
+    if has_request_context():
+        if session.get("token_cache"):
+            cache.deserialize(session["token_cache"])
+    elif os.path.exists(TOKEN_CACHE_FILE):
+        with open(TOKEN_CACHE_FILE, 'r') as f:
+            cache.deserialize(f.read())
     return cache
 
 def _save_cache(cache):
     if cache.has_state_changed:
-        session["token_cache"] = cache.serialize()
+        if has_request_context():
+            session["token_cache"] = cache.serialize()
+        if not has_request_context() or 'MIND_TOKEN_CACHE' in os.environ:
+            os.makedirs( os.path.dirname(TOKEN_CACHE_FILE), exist_ok=True )
+            with open(TOKEN_CACHE_FILE, 'w') as f:
+                f.write(cache.serialize())
+            os.chmod( TOKEN_CACHE_FILE, 0o600 )
 
 def _build_msal_app(cache=None, authority=None):
+    import msal
     return msal.ConfidentialClientApplication(
         microsoft_config.CLIENT_ID, authority=authority or microsoft_config.AUTHORITY,
         client_credential=microsoft_config.SECRET_VALUE, token_cache=cache)
@@ -349,11 +400,11 @@ def _get_token_from_cache(scope=None):
 # GET_JSON
 # #####################################################################################################################################################################################################
 
-def _get_json(url, force=False):
+def _get_json(url, context=None):
     values = []
     next_page = url
     while next_page:
-        resp = _get(next_page)
+        resp = _get(next_page, context)
         if resp:
             if resp.headers['content-type'].split(';')[0] == 'application/json':
                 resp = resp.json()
@@ -363,23 +414,63 @@ def _get_json(url, force=False):
                 next_page = resp.get('@odata.nextLink')
             else:
                 print( f'not a json: {resp.headers["content-type"].split(";")[0]}' )
+                next_page = None
+        else:
+            # failed request: stop instead of asking the same page forever
+            next_page = None
+
+    return values
 
+# #####################################################################################################################################################################################################
+# GET_CATALOG
+# #####################################################################################################################################################################################################
+# notebooks, sections and section groups listings are cached per signed-in user for CATALOG_TTL seconds
+# a sync run invalidates the listings of its user once done
+
+def _user_key():
+    if not has_request_context(): return 'cli'
+    user = session.get('user') or {}
+    return user.get('oid') or user.get('preferred_username') or 'anonymous'
+
+def _get_catalog(url, context=None):
+    key = ( _user_key(), url )
+    values = catalog_cache.get( key )
+    if values is None:
+        values = _get_json( url, context )
+        # do not remember a failed or logged out listing
+        if len(values) > 0: catalog_cache.set( key, values )
     return values
 
+def invalidate_catalog(user=None):
+    user = user or _user_key()
+    catalog_cache.invalidate( lambda key: key[0] == user )
+
 # #####################################################################################################################################################################################################
 # GET
 # #####################################################################################################################################################################################################
 
-def _get(url):
+# context.http keeps the connections to Graph open during a conversion
+
+def _get(url, context=None):
+    import requests
+
+    http = context.http if context else requests
+
     try:
         sec = 0
 
         token = _get_token_from_cache(microsoft_config.SCOPE)
         if not token:
+            if not has_request_context():
+                print( f'Not logged in: no token in {TOKEN_CACHE_FILE}.' )
+                return None
             return redirect(url_for("login"))
 
         while True:
-            resp = requests.get( url, headers={'Authorization': 'Bearer ' + token['access_token']} )
+            start = time.perf_counter()
+            resp = http.get( url, headers={'Authorization': 'Bearer ' + token['access_token']} )
+            metrics.GRAPH_REQUESTS.inc( status=resp.status_code )
+            if context: context.recorder.record( 'graph.get', start, url=url, status=resp.status_code )
 
             if resp.status_code == 429:
                 # We are being throttled due to too many requests.
@@ -387,7 +478,10 @@ def _get(url):
                 sec = min( [ sec + 20, 60 ] )
                 
                 print(f'Too many requests, waiting {sec}s and trying again.')
+                start = time.perf_counter()
                 time.sleep(sec)
+                metrics.GRAPH_THROTTLE.inc( sec )
+                if context: context.recorder.record( 'graph.throttle', start, url=url, seconds=sec )
             
             elif resp.status_code == 500:
                 # In my case, one specific note page consistently gave this status
@@ -403,6 +497,7 @@ def _get(url):
             
             else:
                 resp.raise_for_status()
+                metrics.BYTES_DOWNLOADED.inc( len(resp.content), source='onenote' )
                 return resp
     except:
         return None
@@ -411,7 +506,7 @@ def _get(url):
 # DOWNLOAD_ATTACHMENTS
 # #####################################################################################################################################################################################################
 
-def _download_attachments(content, out_dir):
+def _download_attachments(context, content, out_dir):
     image_dir = os.path.join( out_dir, 'images' )
     attachment_dir = os.path.join( out_dir, 'attachments' )
 
@@ -439,16 +534,19 @@ def _download_attachments(content, out_dir):
             if os.path.exists( out_image ): 
                 print(f'Image {out_image} already downloaded; skipping.')
             else:
-                req = _get(image_url)
+                with context.span( 'onenote.image', url=image_url ):
+                    req = _get(image_url, context)
             
                 if req is None:
+                    context.error( f'failed to get image {image_url}' )
                     return tag_match[0]
                 img = req.content
                 print(f'Downloaded image of {len(img)} bytes.')
 
                 os.makedirs( image_dir, exist_ok=True )
-                with open(out_image, "wb") as f:
-                    f.write(img)
+                context.write( out_image, img )
+
+                context.count( 'bytes', len(img) )
 
             props['src'] = os.path.join( "images", file_name )
             props = {k: v for k, v in props.items() if 'data-fullres-src' not in k}
@@ -476,16 +574,19 @@ def _download_attachments(content, out_dir):
             if os.path.exists( out_attachment ): 
                 print(f'Attachment {out_attachment} already downloaded; skipping.')
             else:
-                req = _get(data_url)
+                with context.span( 'onenote.attachment', file=file_name ):
+                    req = _get(data_url, context)
 
                 if req is None:
+                    context.error( f'failed to get attachment {file_name}' )
                     return tag_match[0]
                 data = req.content
                 print(f'Downloaded attachment {file_name} of {len(data)} bytes.')
 
                 os.makedirs( attachment_dir, exist_ok=True )
-                with open(out_attachment, "wb") as f:
-                    f.write(data)
+                context.write( out_attachment, data )
+
+                context.count( 'bytes', len(data) )
 
             props['data'] = os.path.join( "attachments", file_name )
 
@@ -517,23 +618,33 @@ def _filter_items(items, select, name='items'):
 # #####################################################################################################################################################################################################
 # DOWNLOAD_NOTEBOOKS
 # #####################################################################################################################################################################################################
+# the crawl is done in two steps:
+#   - list notebooks, section groups, sections and pages to build the work list (page, folder)
+#   - download the pages in the order given by _schedule_pages so the freshest content lands first
+
+def _download_notebooks(context, select=None, priority=None, order='recent', job=None, force=None):
+
+    if job: context.job = job
 
-def _download_notebooks(path, select=None):
+    path = context.folder('onenote')
 
-    notebooks = _get_json(f'{MICROSOFT_GRAPH_URL}/me/onenote/notebooks')
+    notebooks = _get_catalog(f'{MICROSOFT_GRAPH_URL}/me/onenote/notebooks', context)
 
-    force = True if select else False
+    # selected notebooks are downloaded again unless told otherwise
+    if force is None: force = True if select else False
 
     print(f'Got {len(notebooks)} notebooks : {", ".join( [ nb["displayName"] for nb in notebooks ] )}.')
 
     notebooks, select = _filter_items(notebooks, select, 'notebooks')
 
+    work = []
+
     for obj in notebooks:
 
         obj_name = obj["displayName"]
         print('- NOTEBOOK: {} {}'.format( obj_name, '-'*(80-5-len('NOTEBOOK')-len(obj_name)) ) )
 
-        obj_dir = os.path.join( path, unidecode(obj_name.lower()) )
+        obj_dir = os.path.join( path, folder_name(obj_name) )
         if force: shutil.rmtree( obj_dir, ignore_errors=True )
 
         obj_time = _get_file_date( obj_dir )
@@ -541,21 +652,63 @@ def _download_notebooks(path, select=None):
             print('Skipping notebook {} [{} > {}]'.format( obj_name, obj_time.strftime("%Y-%m-%d %H:%M:%S"), _get_object_date( obj ).strftime("%Y-%m-%d %H:%M:%S")))
             continue
 
-        sections = _get_json(obj['sectionsUrl'])
-        section_groups = _get_json(obj['sectionGroupsUrl'])
+        sections = _get_catalog(obj['sectionsUrl'], context)
+        section_groups = _get_catalog(obj['sectionGroupsUrl'], context)
 
         print(f'Got {len(sections)} sections and {len(section_groups)} section groups.')
 
         os.makedirs( obj_dir, exist_ok=True )
 
-        _download_sections(sections, obj_dir, select, force=force)
-        _download_section_groups(section_groups, obj_dir, select, force=force)
+        work += _list_sections(context, sections, obj_dir, obj_name, select, force=force)
+        work += _list_section_groups(context, section_groups, obj_dir, obj_name, select, force=force)
+
+    work = _schedule_pages( work, priority=priority, order=order )
+
+    print(f'Scheduled {len(work)} pages [{order}{" / " + ", ".join(priority) if priority else ""}].')
+
+    context.add_total( len(work) )
+
+    for item in work:
+        _download_page( context, item['page'], item['folder'], force=force )
+
+    context.save_manifest()
+    context.close()
+
+    context.report( 'ONENOTE TIMINGS' )
+
+    # the sync may have changed what the catalog shows
+    invalidate_catalog()
 
 # #####################################################################################################################################################################################################
-# DOWNLOAD_SECTION_GROUPS
+# SCHEDULE_PAGES
 # #####################################################################################################################################################################################################
+# order:    'recent' = lastModifiedDateTime descending across all notebooks
+#           'order'  = notebook, section and page order as returned by OneNote
+# priority: list of notebook names (fnmatch patterns) processed first, in that order
+
+def _schedule_pages(work, priority=None, order='recent'):
+
+    priority = [ p.lower() for p in priority ] if priority else []
 
-def _download_section_groups(section_groups, path, select=None, force=False):
+    def rank( item ):
+        notebook = item['notebook'].lower()
+        return next( (index for index, pattern in enumerate(priority) if fnmatch(notebook, pattern)), len(priority) )
+
+    if order in ['recent']:
+        key = lambda item: ( rank(item), -_get_object_date( item['page'] ).timestamp() )
+    else:
+        key = lambda item: rank(item)
+
+    # sorted is stable: ties keep the listing order
+    return sorted( work, key=key )
+
+# #####################################################################################################################################################################################################
+# LIST_SECTION_GROUPS
+# #####################################################################################################################################################################################################
+
+def _list_section_groups(context, section_groups, path, notebook, select=None, force=False):
+
+    work = []
 
     section_groups, select = _filter_items(section_groups, select, 'section groups')
 
@@ -564,7 +717,7 @@ def _download_section_groups(section_groups, path, select=None, force=False):
         obj_name = obj["displayName"]
         print('- SECTION GROUP: {} {}'.format( obj_name, '-'*(80-5-len('SECTION GROUP')-len(obj_name)) ) )
 
-        obj_dir = os.path.join( path, unidecode(obj_name.lower()) )
+        obj_dir = os.path.join( path, folder_name(obj_name) )
         if force: shutil.rmtree( obj_dir, ignore_errors=True )
 
         obj_time = _get_file_date( obj_dir )
@@ -572,19 +725,23 @@ def _download_section_groups(section_groups, path, select=None, force=False):
             print( 'Skipping group {} [{} > {}]'.format( obj_name, obj_time.strftime("%Y-%m-%d %H:%M:%S"), _get_object_date( obj ).strftime("%Y-%m-%d %H:%M:%S")))
             continue
 
-        sections = _get_json(obj['sectionsUrl'])
+        sections = _get_catalog(obj['sectionsUrl'], context)
 
         print(f'Got {len(sections)} sections.')
 
         os.makedirs( obj_dir, exist_ok=True )
 
-        _download_sections(sections, obj_dir, select, force=force)
+        work += _list_sections(context, sections, obj_dir, notebook, select, force=force)
+
+    return work
 
 # #####################################################################################################################################################################################################
-# DOWNLOAD_SECTIONS
+# LIST_SECTIONS
 # #####################################################################################################################################################################################################
 
-def _download_sections(sections, path, select=None, force=False):
+def _list_sections(context, sections, path, notebook, select=None, force=False):
+
+    work = []
 
     sections, select = _filter_items(sections, select, 'sections')
 
@@ -593,7 +750,7 @@ def _download_sections(sections, path, select=None, force=False):
         obj_name = obj["displayName"]
         print('- SECTION: {} {}'.format( obj_name, '-'*(80-5-len('SECTION')-len(obj_name)) ) )
 
-        obj_dir = os.path.join( path, unidecode(obj_name.lower()) )
+        obj_dir = os.path.join( path, folder_name(obj_name) )
         if force: shutil.rmtree( obj_dir, ignore_errors=True )
 
         obj_time = _get_file_date( obj_dir )
@@ -601,62 +758,75 @@ def _download_sections(sections, path, select=None, force=False):
             print( 'Skipping section {} [{} > {}]'.format( obj_name,obj_time.strftime("%Y-%m-%d %H:%M:%S"), _get_object_date( obj ).strftime("%Y-%m-%d %H:%M:%S")))
             continue
 
-        pages = _get_json( obj['pagesUrl'] + '?pagelevel=true')
+        pages = _get_json( obj['pagesUrl'] + '?pagelevel=true', context)
 
         print(f'Got {len(pages)} pages.')
 
         os.makedirs( obj_dir, exist_ok=True )
 
-        _download_pages( pages, obj_dir, select, force=force )
+        work += _list_pages( pages, obj_dir, notebook, select )
+
+    return work
 
 # #####################################################################################################################################################################################################
-# DOWNLOAD_PAGES
+# LIST_PAGES
 # #####################################################################################################################################################################################################
+# page folders depend on the page order and level within the section, so they are computed here before any scheduling
+
+def _list_pages(pages, path, notebook, select=None):
 
-def _download_pages(pages, path, select=None, force=False):
+    work = []
 
     pages, select = _filter_items(pages, select, 'pages')
 
-    pages = sorted([(page['order'], page) for page in pages])
+    pages = sorted([(page['order'], page) for page in pages], key=lambda x: x[0])
     level_dirs = [None] * 4
 
-    for order, page in pages:
-        level = page['level']
-        page_title = sanitize_filename(f'{order} {page["title"]}', platform='auto')
+    page_titles = page_name_batch( [ f'{order} {page["title"]}' for order, page in pages ] )
 
-        print('- PAGE: {} {}'.format( page_title, '-'*(80-5-len('PAGE')-len(page_title)) ) )
+    for ( order, page ), page_title in zip( pages, page_titles ):
+        level = page['level']
 
         if level == 0:
-            page_dir = os.path.join( path, unidecode(page_title.lower()) )
+            page_dir = os.path.join( path, page_title )
         else:
             try:
                 level_dir = next((dop for dop in reversed(level_dirs[:level-1]) if dop is not None), level_dirs[level - 1])
-                page_dir = os.path.join( level_dir, unidecode(page_title.lower()) )
+                page_dir = os.path.join( level_dir, page_title )
             except:
                 print(f'level: {level}, dir: {level_dir}, join: {level_dirs[level - 1]}, level_dirs: {level_dirs}')
                 raise
         level_dirs[level] = page_dir
 
-        _download_page( page, page_dir, force=force )
+        work += [ { 'notebook': notebook, 'page': page, 'folder': page_dir } ]
+
+    return work
 
 # #####################################################################################################################################################################################################
 # DOWNLOAD_PAGE
 # #####################################################################################################################################################################################################
 
-def _download_page(page, path, force=False):
+def _download_page(context, page, path, force=False):
 
     obj_name = page["title"]
 
-    if force: shutil.rmtree( path, ignore_errors=True )
+    print('- PAGE: {} {}'.format( obj_name, '-'*(80-5-len('PAGE')-len(obj_name)) ) )
+
+    # no rmtree here: sub pages live inside their parent page folder and may be scheduled first
+    # forced runs already cleared the notebook / section folders when listing them
 
     out_html = os.path.join( path, 'main.html')
 
     obj_time = _get_file_date( out_html )
-    if not force and obj_time and obj_time > _get_object_date( obj ):
+    if not force and obj_time and obj_time > _get_object_date( page ):
         print('Skipping page {} [{} > {}]'.format( obj_name, obj_time.strftime("%Y-%m-%d %H:%M:%S"), _get_object_date( page ).strftime("%Y-%m-%d %H:%M:%S")))
+        context.count( 'pages_skipped' )
+        context.progress( obj_name )
+        metrics.PAGES.inc( status='skipped' )
         return
 
-    response = _get(page['contentUrl'])
+    with context.span( 'onenote.fetch', page=obj_name ):
+        response = _get(page['contentUrl'], context)
 
     if response is not None:
         content = response.text
@@ -664,37 +834,45 @@ def _download_page(page, path, force=False):
 
         os.makedirs( path, exist_ok=True )
 
-        content = _download_attachments( content, path )
+        with context.span( 'onenote.resources', page=obj_name ):
+            content = _download_attachments( context, content, path )
 
-        soup = BeautifulSoup( content, features="html.parser" )
+        with context.span( 'onenote.clean' ):
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup( content, features="html.parser" )
         
-        # add meta tag related to mind: 
-        # <meta mind="[source, object, id, folder, createdDateTime, lastModifiedDateTime, url]" content="">
+            # add meta tag related to mind: 
+            # <meta mind="[source, object, id, folder, createdDateTime, lastModifiedDateTime, url]" content="">
 
-        meta_list = [{ 'tag': 'source', 'content': 'onenote'}]
-        page_tag = ['id', 'self', 'title', 'contentUrl', 'level', 'order', 'createdDateTime', 'lastModifiedDateTime']
-        for tag in page_tag:
-            if tag in page: meta_list += [{ 'tag': tag, 'content':page[tag]}]
-        meta_list += [{ 'tag': 'folder', 'content': path}]
+            meta_list = [{ 'tag': 'source', 'content': 'onenote'}]
+            page_tag = ['id', 'self', 'title', 'contentUrl', 'level', 'order', 'createdDateTime', 'lastModifiedDateTime']
+            for tag in page_tag:
+                if tag in page: meta_list += [{ 'tag': tag, 'content':page[tag]}]
+            meta_list += [{ 'tag': 'folder', 'content': path}]
 
-        for meta in meta_list:
-            metatag = soup.new_tag('meta')
-            metatag.attrs['content'] = meta['content']
-            metatag.attrs['mind'] = meta['tag']
-            soup.head.append(metatag)
+            for meta in meta_list:
+                metatag = soup.new_tag('meta')
+                metatag.attrs['content'] = meta['content']
+                metatag.attrs['mind'] = meta['tag']
+                soup.head.append(metatag)
 
-        # clean tags
+            # clean tags
 
-        blacklist=['style', 'lang', 'data-absolute-enabled', 'span', 'p',  'data-src-type', 'data-render-original-src', 'data-index', 'data-options', 'data-attachment', 'data-id', 'height', 'width']
-        whitelist=['href', 'alt']
+            sanitize( soup, 'onenote' )
 
-        for tag in soup.findAll(True):
-            for attr in [attr for attr in tag.attrs if( attr in blacklist and attr not in whitelist)]:
-                del tag[attr]
-            if tag.name in blacklist and tag.name not in whitelist:
-                tag.unwrap()
+            add_census( soup )
 
-        content = str(soup)
+            content = str(soup)
+
+        with context.span( 'onenote.write', page=obj_name ):
+            size = context.write( out_html, content )
+
+        context.count( 'pages' )
+        context.count( 'bytes', size )
+        metrics.PAGES.inc( status='synced' )
+
+    else:
+        context.error( f'failed to get page {obj_name} [{page.get("contentUrl")}]' )
+        metrics.PAGES.inc( status='failed' )
 
-        with open(out_html, "w", encoding='utf-8') as f:
-            f.write(content)
+    context.progress( obj_name )
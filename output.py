@@ -0,0 +1,199 @@
+# #####################################################################################################################################################################################################
+# Filename:     output.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Output folder
+# -------------
+#   write_file      converters write main.html, images and attachments through it so the content hash
+#                   is recorded in output/.manifest.json at conversion time
+#
+#   send_output     serves output/[filename] with a strong ETag from that hash, Last-Modified,
+#                   conditional GET (If-None-Match, If-Modified-Since) and Range requests
+#                   the file itself is handed to the WSGI server file wrapper (sendfile when the server has it)
+#                   or to the front end with USE_X_SENDFILE
+#
+#   list_directory  one level of output/ at a time, paged, from a cached os.scandir snapshot
+#                   a snapshot is dropped when write_file writes below it or when the folder mtime changes
+#
+#   note_index      metadata of the converted notes (list_notes body=False) kept between requests, sorted once per column
+#                   dropped when write_file writes a main.html or when the manifest changes (conversion by another process)
+#
+# #####################################################################################################################################################################################################
+
+import os
+import threading
+
+from manifest import get_manifest, hash_bytes, MANIFEST
+from cache import LRUCache
+
+import metrics
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+OUTPUT_ROOT = os.path.join( os.path.dirname(os.path.abspath(__file__)), 'output' )
+
+OUTPUT_MAX_AGE = 0      # seconds browsers may reuse a file without revalidating it
+
+LISTING_CACHE_BYTES = 32 * 1024 * 1024
+LISTING_PAGE_SIZE = 200
+LISTING_PAGE_MAX = 1000
+
+# a snapshot is a list of (name, is_dir, size, mtime), about 200 bytes per entry
+listing_cache = LRUCache( max_bytes=LISTING_CACHE_BYTES, name='listing', sizeof=lambda entries: 200 * (len(entries) + 1) )
+
+# #####################################################################################################################################################################################################
+# WRITE_FILE
+# #####################################################################################################################################################################################################
+# data: bytes or str (utf-8)
+# root: output folder holding the manifest, OUTPUT_ROOT by default (see context.Context.write)
+# return the number of bytes written
+
+def write_file( path, data, root=None ):
+    if isinstance( data, str ): data = data.encode('utf-8')
+
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    get_manifest( root or OUTPUT_ROOT ).record( os.path.abspath(path), hash_bytes(data) )
+
+    metrics.BYTES_WRITTEN.inc( len(data) )
+
+    invalidate_listing( os.path.dirname(os.path.abspath(path)) )
+    if os.path.basename( path ) == 'main.html': invalidate_notes()
+
+    return len(data)
+
+def save_manifest( root=None ):
+    get_manifest( root or OUTPUT_ROOT ).save()
+
+# #####################################################################################################################################################################################################
+# SEND_OUTPUT
+# #####################################################################################################################################################################################################
+
+def send_output( filename ):
+    from flask import send_file, abort
+    from werkzeug.security import safe_join
+
+    path = safe_join( OUTPUT_ROOT, filename )
+    if not path or not os.path.isfile( path ): abort(404)
+
+    return send_file( path,
+                      etag=get_manifest( OUTPUT_ROOT ).digest( path ),
+                      last_modified=os.path.getmtime( path ),
+                      conditional=True,
+                      max_age=OUTPUT_MAX_AGE )
+
+# #####################################################################################################################################################################################################
+# LIST_DIRECTORY
+# #####################################################################################################################################################################################################
+# folder: relative to output/
+# return { path, parent, page, size, total, entries: [ { name, path, dir, size, mtime } ] } or None when folder is not a directory
+
+def list_directory( folder='', page=0, size=LISTING_PAGE_SIZE ):
+    from werkzeug.security import safe_join
+
+    path = safe_join( OUTPUT_ROOT, folder ) if folder else OUTPUT_ROOT
+    if not path or not os.path.isdir( path ): return None
+
+    snapshot = _snapshot( path )
+
+    size = max( 1, min( size, LISTING_PAGE_MAX ) )
+    page = max( 0, page )
+    rel = os.path.relpath( path, start=OUTPUT_ROOT )
+    rel = '' if rel == '.' else rel
+
+    return {
+        'path': rel,
+        'parent': os.path.dirname( rel ) if rel else None,
+        'page': page,
+        'size': size,
+        'total': len(snapshot),
+        'entries': [ { 'name': name, 'path': os.path.join( rel, name ), 'dir': is_dir, 'size': entry_size, 'mtime': mtime } 
+                     for name, is_dir, entry_size, mtime in snapshot[page*size:(page+1)*size] ],
+    }
+
+def _snapshot( path ):
+    validator = os.stat( path ).st_mtime_ns
+
+    snapshot = listing_cache.get( path, validator )
+    if snapshot is None:
+        snapshot = []
+        with os.scandir( path ) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                    snapshot += [ ( entry.name, entry.is_dir(), 0 if entry.is_dir() else stat.st_size, stat.st_mtime ) ]
+                except OSError:
+                    continue
+        # folders first, then by name
+        snapshot.sort( key=lambda entry: ( not entry[1], entry[0].lower() ) )
+        listing_cache.set( path, snapshot, validator )
+
+    return snapshot
+
+def invalidate_listing( folder ):
+    # the folder and its parents up to output/ (sizes, new sub folders)
+    folder = os.path.abspath( folder )
+    while True:
+        listing_cache.invalidate( folder )
+        if folder == OUTPUT_ROOT or not folder.startswith( OUTPUT_ROOT ): break
+        folder = os.path.dirname( folder )
+
+# #####################################################################################################################################################################################################
+# NOTE_INDEX
+# #####################################################################################################################################################################################################
+# key: name of the index (ex: 'content')
+# load: function returning the elements of the index (dicts with at least source, id and the sorted columns)
+# root: output folder of the notes, its manifest tells when another process converted notes
+
+class NoteIndex:
+
+    __slots__ = ( 'elements', 'by_id', '_orders', '_lock' )
+
+    def __init__( self, elements ):
+        self.elements = elements
+        self.by_id = { ( element['source'], element['id'] ): element for element in elements }
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def get( self, source, id ):
+        return self.by_id.get( ( source, id ) )
+
+    def ordered( self, column, reverse=False ):
+        with self._lock:
+            if column not in self._orders:
+                self._orders[column] = sorted( self.elements, key=lambda element: str( element.get(column) or '' ).lower() )
+        return self._orders[column][::-1] if reverse else self._orders[column]
+
+_notes_written = 0
+_note_indexes = {}
+_note_lock = threading.Lock()
+
+def note_index( key, load, root=None ):
+    root = os.path.abspath( root or OUTPUT_ROOT )
+
+    try:
+        manifest = os.stat( os.path.join( root, MANIFEST ) ).st_mtime_ns
+    except OSError:
+        manifest = None
+    validator = ( _notes_written, manifest )
+
+    with _note_lock:
+        cached = _note_indexes.get( ( key, root ) )
+    if cached and cached[0] == validator: return cached[1]
+
+    index = NoteIndex( load() )
+    with _note_lock:
+        _note_indexes[( key, root )] = ( validator, index )
+    return index
+
+def invalidate_notes():
+    global _notes_written
+    with _note_lock:
+        _notes_written += 1
@@ -47,12 +47,16 @@ import os
 import sys
 import shutil
 
-from bs4 import BeautifulSoup
-
 # pip3 install pandas
 import pandas as pd
 
-from mytools import *
+from mypandas import *
+
+import metrics
+
+from slug import slug_column
+from ir import head, relink
+from sync import SiteSync
 
 MAPPING = {
     'title': None,
@@ -114,87 +118,75 @@ def get_file( element ):
     pass
 
 # ###################################################################################################################################################
-# WRITE
+# HEADS
 # ###################################################################################################################################################
+# ir.head for every row: the same <head> as the notes published from the IR (see ir.py)
 
-def write( directory, elements=empty_elements() ):
-
-    elements['pelican'] = nan
-
-    folder_site = os.path.join(directory, 'pelican')
-
-    def _write_element( element ):
-        nonlocal folder_site
+def heads( elements ):
+    columns = elements.columns
+    return pd.Series( [ head( element, MAPPING, columns ) for element in elements.to_dict('records') ], index=elements.index, dtype=object )
 
-        try:
-
-            # -------------------------------------------------------------------------------------------------------------------------------------------
-            # header
-            # -------------------------------------------------------------------------------------------------------------------------------------------
-
-            text = '<head>\n'
+# ###################################################################################################################################################
+# WRITE
+# ###################################################################################################################################################
+# published posts and pages -> content/[type]s/[id parts reversed]/[slug].html
+# headers, bodies and paths are computed over the whole frame, each folder is created once and the files are written by a thread pool
+# workers: threads writing the files (None = ThreadPoolExecutor default)
+# incremental: only the files whose content changed are written, the files of elements gone or not published anymore are deleted (see sync.py)
 
-            if 'title' in element: text += '\t<title>{}</title>\n'.format(element['title'])
+def write( directory, elements=empty_elements(), workers=None, incremental=True ):
+    from concurrent.futures import ThreadPoolExecutor
 
-            # metadata
-            for key, val in MAPPING.items():
-                if val:
-                    if val in elements: text += '\t<meta name="{}" content="{}" />\n'.format(key, element[val])
-                    else: text += '\t<meta name="{}" content="{}" />\n'.format(key, val)
+    elements['pelican'] = nan
 
-            text += '</head>\n'
+    # slugs name the html files: only the missing ones are made from the title, so the file names of existing slugs do not change
+    slug_column( elements )
 
-            # -------------------------------------------------------------------------------------------------------------------------------------------
-            # body
-            # -------------------------------------------------------------------------------------------------------------------------------------------
+    folder_site = os.path.join(directory, 'pelican')
 
-            soup = BeautifulSoup(element['body'] if element['body'] == element['body'] else '<body></body>', features="html.parser")
+    myprint( '', line=True, title='PELICAN')
 
-            text += str( soup )
+    try:
 
-            # -------------------------------------------------------------------------------------------------------------------------------------------
-            # resources
-            # -------------------------------------------------------------------------------------------------------------------------------------------
+        cond = elements['publish'].fillna(False).astype(bool)
+        cond &= elements['type'].isin(['post', 'page'])
+        # cond &= ~elements['body'].isna()
+        rows = elements[cond]
+        myprint( 'Processing {} elements to Pelican'.format(len(rows)))
 
-            # if 'onenote_id' in elements and 'onenote_resources' in elements and 'onenote_self' in elements and 'onenote_file_name' in elements:
-            #     resources = elements[ elements['onenote_id'].isin(row['onenote_resources'].split(',')) ]
-            #     resources = dict(zip(resources['onenote_self'].str.replace('/content','/$value'), resources['onenote_file_name']))
-            #     for url, name in resources.items():
-            #         body = body.replace( url, name )
+        # ---------------------------------------------------------------------------------------------------------------------------------------------------
+        # header + body (the body is written as it is, not re-parsed)
+        # ---------------------------------------------------------------------------------------------------------------------------------------------------
 
-            # -------------------------------------------------------------------------------------------------------------------------------------------
-            # write html
-            # -------------------------------------------------------------------------------------------------------------------------------------------
+        texts = heads( rows ) + rows['body'].where( rows['body'].notna(), '<body></body>' ).map( '{}'.format )
 
-            element['pelican'] = element['id'].split('!')
-            element['pelican'].reverse()
-            element['pelican'] = os.path.join( folder_site, 'content', element['type']+'s', os.path.sep.join(element['pelican']), element['slug'] + '.html' )
-            out_dir = os.path.dirname(element['pelican'])
+        # ---------------------------------------------------------------------------------------------------------------------------------------------------
+        # paths and folders
+        # ---------------------------------------------------------------------------------------------------------------------------------------------------
 
-            myprint('> ' + element['pelican'])
+        hierarchies = rows['id'].str.split('!').map( lambda parts: os.path.sep.join( reversed(parts) ) )
+        paths = pd.Series( [ os.path.join( folder_site, 'content', type + 's', hierarchy, slug + '.html' ) 
+                             for type, hierarchy, slug in zip( rows['type'], hierarchies, rows['slug'] ) ], index=rows.index )
 
-            if not os.path.isdir(out_dir):
-                os.makedirs(out_dir)
+        sync = SiteSync( folder_site, incremental, owner='pelican.write' )
+        sync.makedirs( paths )
 
-            with open(element['pelican'], 'w', encoding='utf-8') as fs:
-                fs.write(text) 
+        # ---------------------------------------------------------------------------------------------------------------------------------------------------
+        # write html
+        # ---------------------------------------------------------------------------------------------------------------------------------------------------
 
-        except:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-            myprint("write error [{} - {}] at line {} in {}.".format(exc_type, exc_obj, exc_tb.tb_lineno, fname), prefix='...') 
+        with ThreadPoolExecutor( max_workers=workers ) as pool:
+            written = pd.Series( list( pool.map( sync.write, paths, texts ) ), index=rows.index, dtype=bool )
 
-        return element
+        elements['pelican'] = elements['pelican'].astype(object)
+        elements.loc[written[written].index, 'pelican'] = paths[written]
 
-    myprint( '', line=True, title='PELICAN')
+        sync.prune()
+        stats = sync.save()
 
-    try:
+        metrics.EXPORTED.inc( stats['written'], exporter='pelican' )
 
-        cond = elements['publish']
-        cond &= elements['type'].isin(['post', 'page'])
-        # cond &= ~elements['body'].isna()
-        myprint( 'Processing {} elements to Pelican'.format(len(elements[cond])))
-        elements[cond] = elements[cond].apply(_write_element, axis='columns')
+        myprint( '{} files written, {} unchanged, {} deleted in {}'.format( stats['written'], stats['unchanged'], stats['deleted'], os.path.join( folder_site, 'content' ) ), prefix='>' )
 
     except:
         exc_type, exc_obj, exc_tb = sys.exc_info()
@@ -203,16 +195,38 @@ def write( directory, elements=empty_elements() ):
 
     return elements   
 
+# ###################################################################################################################################################
+# EMIT
+# ###################################################################################################################################################
+# note IR (see ir.py) -> content/[type]s/[hierarchy]/[slug].html, the note resources in content/[type]s/[hierarchy]/[slug]/
+
+def emit( note ):
+    element = note.element()
+    folder = os.path.join( 'content', element['type']+'s', *note.hierarchy )
+
+    resources = note.resource_files()
+    links = { ref: element['slug'] + '/' + ref for ref in resources }
+
+    text = head( element, MAPPING ) + '<body>' + relink( note.body, links ) + '</body>'
+
+    return { os.path.join( folder, element['slug'] + '.html' ): text }, { os.path.join( folder, links[ref] ): path for ref, path in resources.items() }
+
 # ###################################################################################################################################################
 # CLEAR
 # ###################################################################################################################################################
 
-def clear( directory ): 
+# write keeps the site folder in sync (see sync.py), full=True still removes the whole folder
+
+def clear( directory, full=False ): 
 
     myprint( '', line=True, title='CLEAR PELICAN FILES')
 
     _directory = os.path.join( directory, 'pelican' )
 
+    if not full:
+        myprint( 'Keeping {}: unchanged files are not rewritten and orphans are deleted by write()'.format(_directory), prefix='>' )
+        return
+
     if os.path.isdir(_directory):
         myprint( 'Removing {}...'.format(_directory), prefix='>' )
         shutil.rmtree(_directory)
@@ -0,0 +1,109 @@
+# #####################################################################################################################################################################################################
+# Filename:     slug.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Slugs and folder names
+# ----------------------
+#   slugify( value, isDir )     slug for a file name (or a folder name with isDir)
+#   folder_name( value )        onenote folder for a notebook, section group or section: ascii, lower case
+#   page_name( value )          onenote folder for a page: valid file name, ascii, lower case
+#
+#   patterns are compiled once and the results memoized (the same titles come back on every sync and export)
+#
+#   slugify_batch( values, isDir )      list or pandas Series in, same type out, each distinct value computed once
+#   slug_column( elements )             element table slugs for the exporters (pelican, nikola): from the title when missing or empty
+#   folder_name_batch / page_name_batch
+#
+# #####################################################################################################################################################################################################
+
+import re
+
+from functools import lru_cache
+
+# #####################################################################################################################################################################################################
+# INTERNALS
+# #####################################################################################################################################################################################################
+
+SLUG_CACHE = 65536
+
+_INVALID = re.compile( r'[<>:"/\\|?*^%]' )
+_NOT_WORD = re.compile( r'[^\w\s-]' )
+_SPACES = re.compile( r'[\s]+' )
+_DASHES = re.compile( r'[-]+' )
+
+# #####################################################################################################################################################################################################
+# SLUGIFY
+# #####################################################################################################################################################################################################
+
+@lru_cache( maxsize=SLUG_CACHE )
+def slugify( value, isDir=False ):
+
+    # remove invalid chars (replaced by '-' or space)
+    value = _INVALID.sub( ' ' if isDir else '-', value )
+
+    if not isDir:
+        # remove non-alphabetical/whitespace/'-' chars
+        value = _NOT_WORD.sub( '', value )
+
+        # replace whitespace by '-', lower case
+        value = _SPACES.sub( '-', value ).lower()
+
+    # reduce multiple whitespace to single whitespace
+    value = _SPACES.sub( ' ', value )
+
+    # reduce multiple '-' to single '-'
+    value = _DASHES.sub( '-', value )
+
+    return value.strip()
+
+# #####################################################################################################################################################################################################
+# FOLDER_NAME / PAGE_NAME
+# #####################################################################################################################################################################################################
+
+@lru_cache( maxsize=SLUG_CACHE )
+def folder_name( value ):
+    from unidecode import unidecode
+    return unidecode( value.lower() )
+
+@lru_cache( maxsize=SLUG_CACHE )
+def page_name( value ):
+    from pathvalidate import sanitize_filename
+    return folder_name( sanitize_filename( value, platform='auto' ) )
+
+# #####################################################################################################################################################################################################
+# BATCH
+# #####################################################################################################################################################################################################
+# pandas Series: unique() + map(), list: dict of the distinct values
+# values that are not strings (None, NaN) are not computed: missing in a Series, None in a list
+
+def _batch( fn, values ):
+    if hasattr( values, 'unique' ) and hasattr( values, 'map' ):
+        mapping = { value: fn( value ) for value in values.unique() if isinstance( value, str ) }
+        return values.map( mapping )
+
+    mapping = {}
+    for value in values:
+        if isinstance( value, str ) and value not in mapping: mapping[value] = fn( value )
+    return [ mapping.get( value ) if isinstance( value, str ) else None for value in values ]
+
+def slugify_batch( values, isDir=False ):
+    return _batch( lambda value: slugify( value, isDir ), values )
+
+def slug_column( elements, slug='slug', title='title' ):
+    # slugs naming the exported html files: a missing or empty slug is the slug of the title, the others are kept as they are
+    if slug in elements and title in elements:
+        missing = elements[slug].isna() | ( elements[slug].astype(str).str.strip() == '' )
+        if missing.any():
+            elements[slug] = elements[slug].astype(object)
+            elements.loc[missing, slug] = slugify_batch( elements.loc[missing, title] )
+    return elements
+
+def folder_name_batch( values ):
+    return _batch( folder_name, values )
+
+def page_name_batch( values ):
+    return _batch( page_name, values )
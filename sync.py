@@ -0,0 +1,176 @@
+# #####################################################################################################################################################################################################
+# Filename:     sync.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# Site folder sync
+# ----------------
+#   the exporters (pelican, nikola, ir.publish) keep their site folder in sync instead of removing it before each export
+#
+#       write( path, text )         written only when its content hash differs from the one in [folder]/.manifest.json
+#       copy( path, resource )      copied only when the copy has not the size and mtime of the resource
+#       prune()                     files of the owner that the run did not produce (orphans) are deleted
+#
+#   owner: the entry point writing the folder (ex: 'nikola.write', 'nikola.export', 'ir.publish')
+#   each file is recorded with the owner that last produced it, an owner only prunes its own files
+#
+#   unchanged files keep their mtime, so the static site generators only rebuild what changed
+#
+# #####################################################################################################################################################################################################
+
+import os
+import sys
+import shutil
+import threading
+
+from manifest import get_manifest, hash_bytes, hash_file, MANIFEST
+
+# #####################################################################################################################################################################################################
+# SITESYNC
+# #####################################################################################################################################################################################################
+# incremental=False writes and copies everything (the manifest is still updated)
+
+class SiteSync:
+
+    def __init__( self, folder, incremental=True, owner=None ):
+        self.folder = os.path.abspath( folder )
+        self.incremental = incremental
+        self.owner = owner
+        self.manifest = get_manifest( self.folder )
+        self.stats = { 'written': 0, 'unchanged': 0, 'copied': 0, 'deleted': 0, 'errors': 0, 'collisions': 0 }
+        self._seen = set()
+        self._folders = set()
+        self._lock = threading.Lock()
+
+    def _count( self, key, n=1 ):
+        with self._lock:
+            self.stats[key] += n
+
+    def error( self ):
+        # an error of the caller (a note that failed to emit): the run is incomplete, prune() will not delete anything
+        self._count( 'errors' )
+
+    def _prepare( self, path ):
+        path = os.path.abspath( path )
+        folder = os.path.dirname( path )
+        with self._lock:
+            if path in self._seen:
+                # two notes given the same file in one run: the last one wins
+                print( "Collision: {} produced twice in this run.".format(path) )
+                self.stats['collisions'] += 1
+            self._seen.add( path )
+            known = folder in self._folders
+        # a folder is known once it exists: another thread may be creating it, makedirs again rather than write into nothing
+        if not known:
+            os.makedirs( folder, exist_ok=True )
+            with self._lock:
+                self._folders.add( folder )
+        return path
+
+    def makedirs( self, paths ):
+        # folders of a batch of files created up front, once each
+        for folder in set( os.path.dirname( os.path.abspath(path) ) for path in paths ) - self._folders:
+            os.makedirs( folder, exist_ok=True )
+            with self._lock:
+                self._folders.add( folder )
+
+    def _adopt( self, path, digest, stat=None ):
+        # an unchanged file produced by this owner now, last produced by another one
+        if self.manifest.owner( path ) != self.owner: self.manifest.record( path, digest, stat, owner=self.owner )
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # WRITE / COPY
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # return True when the file is in place with that content (written or unchanged), False on error
+
+    def write( self, path, data ):
+        try:
+            path = self._prepare( path )
+            if isinstance( data, str ): data = data.encode('utf-8')
+            digest = hash_bytes( data )
+
+            if self.incremental and os.path.isfile( path ) and self.manifest.lookup( path ) == digest:
+                self._adopt( path, digest )
+                self._count( 'unchanged' )
+                return True
+
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.manifest.record( path, digest, owner=self.owner )
+
+            self._count( 'written' )
+            return True
+
+        except:
+            exc_type, exc_obj, exc_tb = sys.exc_info()
+            print( "Something went wrong [{} - {}] writing {}.".format(exc_type, exc_obj, path) )
+            self._count( 'errors' )
+            return False
+
+    def copy( self, path, resource ):
+        try:
+            path = self._prepare( path )
+
+            if self.incremental and os.path.isfile( path ):
+                source, copy = os.stat( resource ), os.stat( path )
+                digest = self.manifest.lookup( path, copy )
+                if source.st_size == copy.st_size and int(source.st_mtime) == int(copy.st_mtime) and digest:
+                    self._adopt( path, digest, copy )
+                    self._count( 'unchanged' )
+                    return True
+
+            shutil.copy2( resource, path )
+            self.manifest.record( path, hash_file( path ), owner=self.owner )
+
+            self._count( 'copied' )
+            return True
+
+        except:
+            exc_type, exc_obj, exc_tb = sys.exc_info()
+            print( "Something went wrong [{} - {}] copying {}.".format(exc_type, exc_obj, path) )
+            self._count( 'errors' )
+            return False
+
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # PRUNE
+    # -------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+    # only after a complete run: a partial one (one source, a filter) would see the rest of the site as orphans
+    # not after a run with errors: a note that failed to load or to emit would see its files deleted
+    # files the exporters never wrote (not in the manifest, ex: the generator configuration) and files of other owners are left alone
+
+    def prune( self ):
+        if self.stats['errors']:
+            print( "Not pruning {}: {} errors in this run.".format(self.folder, self.stats['errors']) )
+            return
+
+        keys = self.manifest.owned( self.owner )
+
+        folders = set()
+
+        for key in keys:
+            path = os.path.join( self.folder, key )
+            if path in self._seen or key == MANIFEST: continue
+            try:
+                if os.path.isfile( path ):
+                    os.remove( path )
+                    folders.add( os.path.dirname( path ) )
+                    self._count( 'deleted' )
+            except OSError:
+                self._count( 'errors' )
+            self.manifest.forget( path )
+
+        # folders left empty by the deletions, up to the site folder
+        for folder in sorted( folders, key=len, reverse=True ):
+            while folder != self.folder and folder.startswith( self.folder + os.sep ):
+                try:
+                    os.rmdir( folder )
+                except OSError:
+                    break
+                folder = os.path.dirname( folder )
+
+    def save( self ):
+        self.manifest.save()
+        return self.stats
@@ -0,0 +1,25 @@
+# #####################################################################################################################################################################################################
+# census.rebuild: the rewritten notes keep a valid manifest entry
+# #####################################################################################################################################################################################################
+
+import os
+
+import census
+import output
+
+from manifest import get_manifest, hash_file
+
+def test_rebuild_updates_the_manifest( tmp_path ):
+    root = str(tmp_path)
+    folder = os.path.join( root, 'itmz', 'map', 'note' )
+    os.makedirs( folder )
+    file = os.path.join( folder, 'main.html' )
+    output.write_file( file, '<html><head><meta content="Note" mind="title"/></head><body><p class="x">text</p></body></html>', root=root )
+    output.save_manifest( root )
+    before = get_manifest( root ).lookup( file )
+
+    result = census.rebuild( root, processes=1 )
+
+    assert result['files'] == 1 and result['errors'] == []
+    digest = get_manifest( root ).lookup( file )
+    assert digest and digest != before and digest == hash_file( file )
@@ -0,0 +1,70 @@
+# #####################################################################################################################################################################################################
+# convert.py: stdout only carries the json summary, the exit code tells whether something failed
+# #####################################################################################################################################################################################################
+
+import os
+import sys
+import json
+import zipfile
+import argparse
+import subprocess
+
+import context
+import convert
+
+FOLDER = os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) )
+
+MAPDATA = ( '<iThoughts><topics>'
+            '<topic uuid="A1" text="Root" created="2023-01-01T00:00:00" modified="2023-06-01T00:00:00">'
+            '<topic uuid="B2" text="Child" created="2023-01-01T00:00:00" modified="2023-06-01T00:00:00"/>'
+            '</topic></topics></iThoughts>' )
+
+def _map( folder, name='map', mapdata=MAPDATA ):
+    os.makedirs( folder, exist_ok=True )
+    with zipfile.ZipFile( os.path.join( folder, name + '.itmz' ), 'w' ) as itmz:
+        itmz.writestr( 'mapdata.xml', mapdata )
+
+def _args( *argv ):
+    parser = argparse.ArgumentParser()
+    convert.add_arguments( parser )
+    return parser.parse_args( list(argv) )
+
+def test_itmz_summary_is_the_only_stdout( tmp_path, monkeypatch, capsys ):
+    _map( str(tmp_path / 'maps') )
+    monkeypatch.setattr( context, 'ITMZ_SOURCE', str(tmp_path / 'maps') )
+
+    code = convert.run( _args( 'itmz', '--output', str(tmp_path / 'output') ) )
+    out, err = capsys.readouterr()
+
+    summary = json.loads( out )
+    assert code == 0
+    assert summary['source'] == 'itmz' and summary['converted'] == 1 and summary['errors'] == []
+    assert 'PARSE' in err
+
+def test_itmz_failed_map_exit_code( tmp_path, monkeypatch, capsys ):
+    _map( str(tmp_path / 'maps'), mapdata='<iThoughts><topics>' )
+    monkeypatch.setattr( context, 'ITMZ_SOURCE', str(tmp_path / 'maps') )
+
+    code = convert.run( _args( 'itmz', '--output', str(tmp_path / 'output') ) )
+    summary = json.loads( capsys.readouterr().out )
+
+    assert code == 1 and summary['errors']
+
+def test_parquet_summary_is_the_only_stdout( tmp_path, monkeypatch, capsys ):
+    _map( str(tmp_path / 'maps') )
+    monkeypatch.setattr( context, 'ITMZ_SOURCE', str(tmp_path / 'maps') )
+
+    code = convert.run( _args( 'itmz', '--output', str(tmp_path / 'output'), '--parquet' ) )
+    summary = json.loads( capsys.readouterr().out )
+
+    assert code == 0 and os.path.isfile( summary['table'] )
+
+def test_onenote_without_token_fails( tmp_path ):
+    env = dict( os.environ, MIND_TOKEN_CACHE=str(tmp_path / 'no_token.json') )
+
+    result = subprocess.run( [ sys.executable, '-m', 'mind', 'convert', 'onenote', '--output', str(tmp_path / 'output') ],
+                             cwd=FOLDER, env=env, capture_output=True, text=True, timeout=120 )
+
+    summary = json.loads( result.stdout )
+    assert result.returncode == 1
+    assert any( 'Not logged in' in error for error in summary['errors'] )
@@ -0,0 +1,39 @@
+# #####################################################################################################################################################################################################
+# ir.head and pelican.heads: missing values give no tag, values are escaped, both build the same <head>
+# #####################################################################################################################################################################################################
+
+import pandas as pd
+
+from ir import head
+
+import pelican
+import nikola
+
+ELEMENTS = pd.DataFrame( {
+    'title': [ 'Topic "3" & <more>', None, 'plain' ],
+    'slug': [ 'topic-3', 'a"b', None ],
+    'created': [ '2023-01-01', float('nan'), '2023-02-01' ],
+    'modified': [ None, '2023-03-01', '2023-04-01' ],
+    'authors': [ None, 'Ana "A" & Bob', float('nan') ],
+} )
+
+def test_missing_values_give_no_tag():
+    text = head( ELEMENTS.iloc[0].to_dict(), nikola.MAPPING )
+    assert 'None' not in text and 'nan' not in text
+    assert 'name="author"' not in text and 'name="updated"' not in text
+
+def test_values_are_escaped():
+    text = head( ELEMENTS.iloc[0].to_dict(), nikola.MAPPING )
+    assert '<title>Topic "3" &amp; &lt;more&gt;</title>' in text
+    text = head( ELEMENTS.iloc[1].to_dict(), nikola.MAPPING )
+    assert '<meta name="slug" content="a&quot;b" />' in text
+    assert '<meta name="author" content="Ana &quot;A&quot; &amp; Bob" />' in text
+    assert '<title>' not in text
+
+def test_column_missing_from_element_gives_its_name():
+    assert '<meta name="status" content="published" />' in head( ELEMENTS.iloc[2].to_dict(), nikola.MAPPING )
+
+def test_pelican_heads_same_as_head():
+    texts = pelican.heads( ELEMENTS )
+    for index, element in ELEMENTS.iterrows():
+        assert texts[index] == head( element.to_dict(), pelican.MAPPING, ELEMENTS.columns )
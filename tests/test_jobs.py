@@ -0,0 +1,74 @@
+# #####################################################################################################################################################################################################
+# jobs.JobManager: jobs with the same key are coalesced while one is active
+# #####################################################################################################################################################################################################
+
+import threading
+
+from jobs import JobManager, DONE, FAILED
+
+def _blocked():
+    release = threading.Event()
+    calls = []
+    def fn( *args, job=None, **kwargs ):
+        calls.append( ( args, kwargs, job ) )
+        release.wait( 10 )
+    return fn, release, calls
+
+def _wait( job ):
+    for event in job.events( timeout=0.1 ):
+        pass
+
+def test_same_key_is_coalesced():
+    manager = JobManager( workers=2 )
+    fn, release, calls = _blocked()
+
+    first, created = manager.submit( 'itmz', fn, 'a', name='itmz a' )
+    second, coalesced = manager.submit( 'itmz', fn, 'b', name='itmz b' )
+
+    assert created and not coalesced
+    assert second is first
+
+    release.set()
+    _wait( first )
+    assert first.status == DONE and len(calls) == 1
+    assert calls[0][0] == ( 'a', ) and calls[0][2] is first
+
+def test_other_key_runs_alongside():
+    manager = JobManager( workers=2 )
+    fn, release, calls = _blocked()
+
+    first, created = manager.submit( 'itmz', fn )
+    other, other_created = manager.submit( 'onenote:user', fn )
+
+    assert created and other_created and other is not first
+
+    release.set()
+    _wait( first )
+    _wait( other )
+    assert len(calls) == 2
+
+def test_new_job_once_the_first_is_over():
+    manager = JobManager( workers=1 )
+    fn, release, calls = _blocked()
+    release.set()
+
+    first, created = manager.submit( 'itmz', fn )
+    _wait( first )
+    second, created_again = manager.submit( 'itmz', fn )
+    _wait( second )
+
+    assert created_again and second is not first
+    assert [ job.status for job in ( first, second ) ] == [ DONE, DONE ]
+    assert { job.id for job in manager.list() } >= { first.id, second.id }
+
+def test_failed_job_reports_its_error():
+    manager = JobManager( workers=1 )
+
+    def fail( job=None ):
+        raise ValueError( 'broken map' )
+
+    job, created = manager.submit( 'itmz', fail )
+    _wait( job )
+
+    assert job.status == FAILED and 'broken map' in job.errors[0]
+    assert manager.submit( 'itmz', fail )[1]
@@ -0,0 +1,52 @@
+# #####################################################################################################################################################################################################
+# metrics.exposition: counters and the cache.py hit / miss / entry counts in the Prometheus text format
+# #####################################################################################################################################################################################################
+
+import metrics
+
+from cache import LRUCache, TTLCache
+
+def _samples():
+    samples = {}
+    for line in metrics.exposition().splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit( ' ', 1 )
+            samples[name] = float( value )
+    return samples
+
+def test_lru_cache_stats():
+    cache = LRUCache( max_bytes=1024, name='test_lru' )
+    cache.set( 'a', 'value' )
+    cache.get( 'a' )
+    cache.get( 'a' )
+    cache.get( 'missing' )
+
+    samples = _samples()
+    assert samples['mind_cache_hits_total{cache="test_lru"}'] == 2
+    assert samples['mind_cache_misses_total{cache="test_lru"}'] == 1
+    assert samples['mind_cache_entries{cache="test_lru"}'] == 1
+
+def test_ttl_cache_stats():
+    cache = TTLCache( ttl=60, name='test_ttl' )
+    cache.get( 'a' )
+    cache.set( 'a', 1 )
+    cache.set( 'b', 2 )
+    cache.get( 'a' )
+
+    samples = _samples()
+    assert samples['mind_cache_hits_total{cache="test_ttl"}'] == 1
+    assert samples['mind_cache_misses_total{cache="test_ttl"}'] == 1
+    assert samples['mind_cache_entries{cache="test_ttl"}'] == 2
+
+def test_cache_types_declared():
+    text = metrics.exposition()
+    assert '# TYPE mind_cache_hits_total counter' in text
+    assert '# TYPE mind_cache_entries gauge' in text
+
+def test_counter_labels():
+    counter = metrics.Counter( 'mind_test_total', 'test counter', ['exporter'] )
+    counter.inc( 3, exporter='nikola' )
+    counter.inc( exporter='nikola' )
+
+    assert counter.value( exporter='nikola' ) == 4
+    assert _samples()['mind_test_total{exporter="nikola"}'] == 4
@@ -0,0 +1,75 @@
+# #####################################################################################################################################################################################################
+# nikola.py: notes with the same title under different parents get their own file, reruns leave them alone
+# #####################################################################################################################################################################################################
+
+import os
+
+import pandas as pd
+
+import ir
+import nikola
+
+def _note( root, path, title, uuid ):
+    folder = os.path.join( root, *path )
+    os.makedirs( folder, exist_ok=True )
+    with open( os.path.join( folder, 'main.html' ), 'w', encoding='utf-8' ) as f:
+        f.write( f'<html><head><meta content="{title}" mind="title"/><meta content="{uuid}" mind="uuid"/></head><body><p>{uuid}</p></body></html>' )
+
+def _output( root ):
+    _note( root, [ 'itmz', 'map', 'Projects' ], 'Projects', 'p' )
+    _note( root, [ 'itmz', 'map', 'Projects', 'Ideas' ], 'Ideas', 'i1' )
+    _note( root, [ 'itmz', 'map', 'Home' ], 'Home', 'h' )
+    _note( root, [ 'itmz', 'map', 'Home', 'Ideas' ], 'Ideas', 'i2' )
+
+def _pages( folder ):
+    pages = {}
+    for root, subdirs, names in os.walk( os.path.join( folder, 'pages' ) ):
+        for name in names:
+            with open( os.path.join( root, name ), encoding='utf-8' ) as f:
+                pages[ os.path.relpath( os.path.join( root, name ), folder ) ] = f.read()
+    return pages
+
+def test_export_same_title_under_different_parents( tmp_path ):
+    _output( str(tmp_path / 'output') )
+
+    stats = nikola.export( str(tmp_path / 'output'), str(tmp_path / 'site') )
+    pages = _pages( str(tmp_path / 'site' / 'nikola') )
+
+    assert stats['written'] == 4 and stats['collisions'] == 0
+    assert len(pages) == 4
+    assert len( [ text for text in pages.values() if '<p>i1</p>' in text ] ) == 1
+    assert len( [ text for text in pages.values() if '<p>i2</p>' in text ] ) == 1
+
+    stats = nikola.export( str(tmp_path / 'output'), str(tmp_path / 'site') )
+    assert stats['written'] == 0 and stats['unchanged'] == 4
+
+def test_publish_same_title_under_different_parents( tmp_path ):
+    _output( str(tmp_path / 'output') )
+
+    stats = ir.publish( str(tmp_path / 'output'), str(tmp_path / 'site'), [ 'nikola' ] )['nikola']
+    assert stats['written'] == 4 and stats['collisions'] == 0
+    assert len( _pages( str(tmp_path / 'site' / 'nikola') ) ) == 4
+
+    stats = ir.publish( str(tmp_path / 'output'), str(tmp_path / 'site'), [ 'nikola' ] )['nikola']
+    assert stats['written'] == 0 and stats['unchanged'] == 4
+
+def test_same_slug_in_the_same_folder_is_suffixed():
+    used = set()
+    element = { 'type': 'page', 'slug': 'ideas', 'title': 'Ideas' }
+    first, _ = nikola.files( element, '<body></body>', hierarchy=[ 'itmz', 'map' ], used=used )
+    second, _ = nikola.files( element, '<body></body>', hierarchy=[ 'itmz', 'map' ], used=used )
+    assert list(first) == [ os.path.join( 'pages', 'itmz', 'map', 'ideas.html' ) ]
+    assert list(second) == [ os.path.join( 'pages', 'itmz', 'map', 'ideas-2.html' ) ]
+
+def test_write_element_table( tmp_path ):
+    elements = pd.DataFrame( {
+        'id': [ 'a!section 1!notebook', 'b!section 2!notebook' ],
+        'type': 'page',
+        'title': [ 'Ideas', 'Ideas' ],
+        'slug': [ None, None ],
+        'publish': True,
+        'body': [ '<body>one</body>', '<body>two</body>' ],
+    } )
+    elements = nikola.write( str(tmp_path), elements )
+    assert elements['nikola'].nunique() == 2
+    assert all( os.path.isfile( path ) for path in elements['nikola'] )
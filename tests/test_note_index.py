@@ -0,0 +1,59 @@
+# #####################################################################################################################################################################################################
+# output.note_index: the notes are listed once, until a main.html is written or the manifest changes
+# #####################################################################################################################################################################################################
+
+import os
+
+import output
+import itmz
+
+from manifest import get_manifest
+
+def _note( root, path, title, uuid ):
+    folder = os.path.join( root, 'itmz', *path )
+    os.makedirs( folder, exist_ok=True )
+    return output.write_file( os.path.join( folder, 'main.html' ),
+                              f'<html><head><meta content="{title}" mind="title"/><meta content="{uuid}" mind="uuid"/></head><body><p>{uuid}</p></body></html>', root=root )
+
+def _index( root, loads ):
+    def load():
+        loads.append( 1 )
+        return itmz.list_notes( os.path.join( root, 'itmz' ), None, body=False )
+    return output.note_index( 'test', load, root )
+
+def test_listed_once( tmp_path ):
+    root, loads = str(tmp_path), []
+    _note( root, [ 'map', 'b' ], 'Beta', 'B' )
+    _note( root, [ 'map', 'a' ], 'alpha', 'A' )
+
+    index = _index( root, loads )
+    assert _index( root, loads ) is index and len(loads) == 1
+
+    assert [ element['name'] for element in index.ordered( 'name' ) ] == [ 'alpha', 'Beta' ]
+    assert [ element['name'] for element in index.ordered( 'name', reverse=True ) ] == [ 'Beta', 'alpha' ]
+    assert index.get( 'itmz', 'B' )['file'] == os.path.join( root, 'itmz', 'map', 'b', 'main.html' )
+    assert index.get( 'itmz', 'missing' ) is None
+
+def test_written_note_drops_the_index( tmp_path ):
+    root, loads = str(tmp_path), []
+    _note( root, [ 'map', 'a' ], 'alpha', 'A' )
+    _index( root, loads )
+
+    _note( root, [ 'map', 'c' ], 'gamma', 'C' )
+    index = _index( root, loads )
+
+    assert len(loads) == 2 and index.get( 'itmz', 'C' )
+
+def test_saved_manifest_drops_the_index( tmp_path ):
+    # another process converted notes: only the manifest file tells
+    root, loads = str(tmp_path), []
+    _note( root, [ 'map', 'a' ], 'alpha', 'A' )
+    _index( root, loads )
+
+    manifest = get_manifest( root )
+    manifest.changed = True
+    manifest.save()
+    os.utime( manifest.file, ns=( 1, 1 ) )
+    _index( root, loads )
+
+    assert len(loads) == 2
@@ -0,0 +1,62 @@
+# #####################################################################################################################################################################################################
+# output.send_output: strong ETag from the manifest, conditional GET and Range
+# #####################################################################################################################################################################################################
+
+import os
+
+import pytest
+
+from flask import Flask
+
+import output
+
+from manifest import hash_bytes
+
+DATA = b'<html><body>' + b'x' * 1000 + b'</body></html>'
+
+app = Flask( __name__ )
+app.add_url_rule( '/files/<path:filename>', 'files', output.send_output )
+
+@pytest.fixture
+def root( tmp_path, monkeypatch ):
+    monkeypatch.setattr( output, 'OUTPUT_ROOT', str(tmp_path) )
+    os.makedirs( str(tmp_path / 'itmz' / 'note') )
+    output.write_file( str(tmp_path / 'itmz' / 'note' / 'main.html'), DATA, root=str(tmp_path) )
+    return str(tmp_path)
+
+def _get( filename, **headers ):
+    with app.test_client() as client:
+        response = client.get( '/files/' + filename, headers=headers )
+        return response.status_code, response.headers, response.get_data()
+
+def test_etag_is_the_content_hash( root ):
+    status, headers, data = _get( 'itmz/note/main.html' )
+    assert status == 200 and data == DATA
+    assert headers['ETag'] == '"{}"'.format( hash_bytes( DATA ) )
+    assert 'Last-Modified' in headers
+
+def test_if_none_match( root ):
+    status, headers, data = _get( 'itmz/note/main.html', **{ 'If-None-Match': '"{}"'.format( hash_bytes( DATA ) ) } )
+    assert status == 304 and data == b''
+
+    status, headers, data = _get( 'itmz/note/main.html', **{ 'If-None-Match': '"other"' } )
+    assert status == 200 and data == DATA
+
+def test_if_modified_since( root ):
+    status, headers, data = _get( 'itmz/note/main.html' )
+    status, headers, data = _get( 'itmz/note/main.html', **{ 'If-Modified-Since': headers['Last-Modified'] } )
+    assert status == 304
+
+def test_range( root ):
+    status, headers, data = _get( 'itmz/note/main.html', Range='bytes=0-11' )
+    assert status == 206 and data == DATA[:12]
+    assert headers['Content-Range'] == 'bytes 0-11/{}'.format( len(DATA) )
+
+def test_changed_file_gets_a_new_etag( root ):
+    output.write_file( os.path.join( root, 'itmz', 'note', 'main.html' ), DATA + b'!', root=root )
+    status, headers, data = _get( 'itmz/note/main.html', **{ 'If-None-Match': '"{}"'.format( hash_bytes( DATA ) ) } )
+    assert status == 200 and headers['ETag'] == '"{}"'.format( hash_bytes( DATA + b'!' ) )
+
+@pytest.mark.parametrize( 'filename', [ 'itmz/missing.html', '../outside.html', 'itmz' ] )
+def test_not_found( root, filename ):
+    assert _get( filename )[0] == 404
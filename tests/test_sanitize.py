@@ -0,0 +1,101 @@
+# #####################################################################################################################################################################################################
+# sanitize.py against the former clean loop (benchmark._legacy_clean): same html and a sound document order chain
+# #####################################################################################################################################################################################################
+
+import pytest
+
+from bs4 import BeautifulSoup
+
+from sanitize import sanitize, sanitize_html, PROFILES
+from benchmark import _legacy_clean, onenote_page, LEGACY
+
+CASES = [
+    '<p>x</p><p>y</p><span>z</span>',
+    '<p></p><b>y</b>',
+    '<span><p>nested</p> tail</span><i>after</i>',
+    '<div><p style="a">one</p><p lang="en">two</p></div><p>three</p>',
+    '<p><span><span>deep</span></span></p>',
+    '<style>p {}</style><p>x<span>y</span>z</p>',
+    '<ul><li><p><span lang="en-US">item</span></p></li></ul><p>last</p>',
+    '<nav><header>h</header></nav><footer><script>s</script></footer><meta content="c" mind="m"/>',
+    '<table><tr><td style="padding:2pt"><p lang="en-US">cell</p></td><td><span class="x">value</span></td></tr></table>',
+    'text only',
+    '',
+]
+
+def _walk( node ):
+    # document order from the contents, the reference the next_element chain must follow
+    for child in getattr( node, 'contents', [] ):
+        yield child
+        yield from _walk( child )
+
+def _check_chain( soup ):
+    expected = list( _walk( soup ) )
+
+    # html.parser leaves the root out of the chain until a top level node is moved, then the root leads it
+    first = soup.next_element if soup.next_element is not None else ( expected[0] if expected else None )
+    if first is not None:
+        assert first.previous_element in ( None, soup ) and ( first.previous_element is soup ) == ( soup.next_element is first )
+
+    chain, node = [], first
+    while node is not None:
+        chain += [ node ]
+        node = node.next_element
+    assert [ id(node) for node in chain ] == [ id(node) for node in expected ]
+
+    for before, after in zip( chain, chain[1:] ):
+        assert after.previous_element is before
+
+    for node in [ soup ] + expected:
+        siblings = getattr( node, 'contents', [] )
+        for before, after in zip( siblings, siblings[1:] ):
+            assert before.next_sibling is after and after.previous_sibling is before
+        if siblings:
+            assert siblings[0].previous_sibling is None and siblings[-1].next_sibling is None
+            assert all( child.parent is node for child in siblings )
+
+def _legacy( html, profile ):
+    return _legacy_clean( BeautifulSoup( html, features="html.parser" ), *LEGACY[profile] )
+
+@pytest.mark.parametrize( 'profile', list(PROFILES) )
+@pytest.mark.parametrize( 'html', CASES )
+def test_same_html_as_legacy( html, profile ):
+    assert sanitize_html( html, profile ) == str( _legacy( html, profile ) )
+
+def _chain( soup ):
+    chain, node = [], soup.next_element if soup.next_element is not None or not soup.contents else soup.contents[0]
+    while node is not None:
+        chain += [ ( type(node).__name__, getattr( node, 'name', None ), str(node) ) ]
+        node = node.next_element
+    return chain
+
+@pytest.mark.parametrize( 'profile', list(PROFILES) )
+@pytest.mark.parametrize( 'html', CASES )
+def test_same_chain_as_legacy( html, profile ):
+    # walked from the first node, as soup.descendants or find_all do
+    assert _chain( sanitize( BeautifulSoup( html, features="html.parser" ), profile ) ) == _chain( _legacy( html, profile ) )
+
+@pytest.mark.parametrize( 'profile', list(PROFILES) )
+@pytest.mark.parametrize( 'html', CASES )
+def test_element_chain( html, profile ):
+    soup = sanitize( BeautifulSoup( html, features="html.parser" ), profile )
+    _check_chain( soup )
+
+@pytest.mark.parametrize( 'profile', list(PROFILES) )
+@pytest.mark.parametrize( 'html', CASES )
+def test_legacy_element_chain( html, profile ):
+    # the reference itself passes the chain check
+    _check_chain( _legacy( html, profile ) )
+
+def test_first_node_unwrapped():
+    soup = sanitize( BeautifulSoup( '<p>x</p><p>y</p><span>z</span>', features="html.parser" ), 'onenote' )
+    assert soup.next_element == 'x'
+    assert soup.next_element.previous_element is soup
+    assert [ str(node) for node in soup.descendants ] == [ 'x', 'y', 'z' ]
+
+@pytest.mark.parametrize( 'profile', list(PROFILES) )
+def test_onenote_page( profile ):
+    html = onenote_page( 50 )
+    soup = sanitize( BeautifulSoup( html, features="html.parser" ), profile )
+    assert str( soup ) == str( _legacy( html, profile ) )
+    _check_chain( soup )
@@ -0,0 +1,27 @@
+# #####################################################################################################################################################################################################
+# slug.py batch API: lists and Series handle missing values the same way
+# #####################################################################################################################################################################################################
+
+import pandas as pd
+
+from slug import slugify, slugify_batch, slug_column
+
+def test_list_skips_missing():
+    assert slugify_batch( [ 'a b', None, float('nan'), 'a b' ] ) == [ 'a-b', None, None, 'a-b' ]
+
+def test_series_skips_missing():
+    result = slugify_batch( pd.Series( [ 'a b', None, 'C d' ] ) )
+    assert result[0] == 'a-b' and pd.isna( result[1] ) and result[2] == 'c-d'
+
+def test_batch_same_as_slugify():
+    values = [ 'Hello World', 'été / hiver', 'a--b  c', 'x?y*z' ]
+    assert slugify_batch( values ) == [ slugify( value ) for value in values ]
+    assert slugify_batch( values, isDir=True ) == [ slugify( value, True ) for value in values ]
+
+def test_slug_column_from_title():
+    elements = pd.DataFrame( { 'slug': [ None, '', 'Given_Slug' ], 'title': [ 'From Title', 'Empty Slug', 'ignored' ] } )
+    assert slug_column( elements )['slug'].tolist() == [ 'from-title', 'empty-slug', 'Given_Slug' ]
+
+def test_slug_column_keeps_existing_slugs():
+    elements = pd.DataFrame( { 'slug': [ 'Kept As Is', 'page-1' ], 'title': [ 'a', 'b' ] } )
+    assert slug_column( elements )['slug'].tolist() == [ 'Kept As Is', 'page-1' ]
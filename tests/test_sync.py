@@ -0,0 +1,96 @@
+# #####################################################################################################################################################################################################
+# sync.py: each entry point only prunes its own files, never after a run with errors or notes that failed to load
+# #####################################################################################################################################################################################################
+
+import os
+
+import pandas as pd
+
+import ir
+import nikola
+
+from sync import SiteSync
+
+def _note( root, path, title ):
+    folder = os.path.join( root, *path )
+    os.makedirs( folder, exist_ok=True )
+    with open( os.path.join( folder, 'main.html' ), 'w', encoding='utf-8' ) as f:
+        f.write( f'<html><head><meta content="{title}" mind="title"/></head><body><p>{title}</p></body></html>' )
+
+def _output( root ):
+    for title in [ 'One', 'Two', 'Three' ]:
+        _note( root, [ 'itmz', 'map', title ], title )
+
+def _pages( folder ):
+    return sorted( os.path.relpath( os.path.join( root, name ), folder ) for root, subdirs, names in os.walk( os.path.join( folder, 'pages' ) ) for name in names )
+
+def test_write_keeps_the_exported_pages( tmp_path ):
+    _output( str(tmp_path / 'output') )
+    nikola.export( str(tmp_path / 'output'), str(tmp_path / 'site') )
+    exported = _pages( str(tmp_path / 'site' / 'nikola') )
+    assert len(exported) == 3
+
+    elements = pd.DataFrame( { 'id': [ 'a!section!notebook' ], 'type': 'page', 'title': [ 'Row' ], 'slug': [ None ], 'publish': True, 'body': [ '<body>row</body>' ] } )
+    nikola.write( str(tmp_path / 'site'), elements )
+
+    pages = _pages( str(tmp_path / 'site' / 'nikola') )
+    assert set(exported) < set(pages) and len(pages) == 4
+
+    # and the other way round
+    stats = nikola.export( str(tmp_path / 'output'), str(tmp_path / 'site') )
+    assert stats['deleted'] == 0 and len( _pages( str(tmp_path / 'site' / 'nikola') ) ) == 4
+
+def test_publish_keeps_the_exported_pages( tmp_path ):
+    _output( str(tmp_path / 'output') )
+    _note( str(tmp_path / 'output'), [ 'notes', 'Other' ], 'Other' )
+    nikola.export( str(tmp_path / 'output'), str(tmp_path / 'site'), source='notes' )
+
+    stats = ir.publish( str(tmp_path / 'output'), str(tmp_path / 'site'), [ 'nikola' ] )['nikola']
+    assert stats['deleted'] == 0
+
+    os.remove( str(tmp_path / 'output' / 'itmz' / 'map' / 'Three' / 'main.html') )
+    stats = ir.publish( str(tmp_path / 'output'), str(tmp_path / 'site'), [ 'nikola' ] )['nikola']
+    assert stats['deleted'] == 1 and len( _pages( str(tmp_path / 'site' / 'nikola') ) ) == 3
+
+def test_no_prune_when_a_note_fails_to_load( tmp_path, monkeypatch ):
+    _output( str(tmp_path / 'output') )
+    nikola.export( str(tmp_path / 'output'), str(tmp_path / 'site') )
+    ir.publish( str(tmp_path / 'output'), str(tmp_path / 'site'), [ 'nikola' ] )
+
+    load = ir.load
+    def failing( file, root ):
+        if 'Two' in file: raise ValueError( 'broken note' )
+        return load( file, root )
+    monkeypatch.setattr( ir, 'load', failing )
+
+    assert nikola.export( str(tmp_path / 'output'), str(tmp_path / 'site') )['deleted'] == 0
+    assert ir.publish( str(tmp_path / 'output'), str(tmp_path / 'site'), [ 'nikola' ] )['nikola']['deleted'] == 0
+    assert len( _pages( str(tmp_path / 'site' / 'nikola') ) ) == 3
+
+def test_no_prune_when_an_emitter_fails( tmp_path, monkeypatch ):
+    _output( str(tmp_path / 'output') )
+    nikola.export( str(tmp_path / 'output'), str(tmp_path / 'site') )
+
+    emit = nikola.emit
+    def failing( note, used=None ):
+        if note.title == 'Two': raise ValueError( 'broken emitter' )
+        return emit( note, used )
+    monkeypatch.setattr( nikola, 'emit', failing )
+
+    stats = nikola.export( str(tmp_path / 'output'), str(tmp_path / 'site') )
+    assert stats['errors'] == 1 and stats['deleted'] == 0
+    assert len( _pages( str(tmp_path / 'site' / 'nikola') ) ) == 3
+
+def test_prune_own_files_only( tmp_path ):
+    folder = str(tmp_path)
+
+    first = SiteSync( folder, owner='first' )
+    first.write( os.path.join( folder, 'a.html' ), 'a' )
+    first.save()
+
+    second = SiteSync( folder, owner='second' )
+    second.write( os.path.join( folder, 'b.html' ), 'b' )
+    second.prune()
+    second.save()
+
+    assert os.path.isfile( os.path.join( folder, 'a.html' ) ) and os.path.isfile( os.path.join( folder, 'b.html' ) )
@@ -0,0 +1,79 @@
+# #####################################################################################################################################################################################################
+# Filename:     topics.py
+#
+# - Author:     [Laurent Burais](mailto:lburais@cisco.com)
+# - Release:
+# - Date:
+#
+# #####################################################################################################################################################################################################
+# iThoughts topics
+# ----------------
+#   Topic           what a map conversion keeps of a topic once its html is rendered: __slots__ record, no per topic dict
+#                   strings repeated over a map (source, file, parent uuid) are interned
+#
+#   parent_index( root )
+#                   { topic uuid: parent topic uuid | None } in one walk of the mapdata.xml tree
+#                   the tree can be released once the index and the topics are built
+#
+#   hierarchies( parents, titles )
+#                   { topic uuid: [ titles of the parent topics from the top ] }, each parent computed once
+#
+#   python3 benchmark.py topics     memory kept per topic and hierarchy time against the former attrib dicts
+#
+# #####################################################################################################################################################################################################
+
+import sys
+
+# #####################################################################################################################################################################################################
+# TOPIC
+# #####################################################################################################################################################################################################
+
+class Topic:
+
+    __slots__ = ( 'source', 'file', 'uuid', 'parent', 'title', 'html', 'att_asset', 'att_relative', 'hierarchy', 'folder' )
+
+    def __init__( self, file, uuid, parent=None, title=None, html=None, att_asset=None, att_relative=None ):
+        self.source = 'itmz'
+        self.file = sys.intern( file )
+        self.uuid = uuid
+        self.parent = sys.intern( parent ) if parent else None
+        self.title = title or uuid
+        self.html = html
+        self.att_asset = att_asset
+        self.att_relative = att_relative
+        self.hierarchy = []
+        self.folder = ''
+
+    def __repr__( self ):
+        return f'Topic({self.uuid!r}, {self.title!r})'
+
+# #####################################################################################################################################################################################################
+# PARENT_INDEX
+# #####################################################################################################################################################################################################
+# same parent as root.findall( './/topic[@uuid="[uuid]"]/..' )[0]: the first topic with the uuid wins, a parent that is not a topic gives None
+
+def parent_index( root ):
+    parents = {}
+    for parent in root.iter():
+        parent_uuid = parent.attrib.get('uuid') if parent.tag == 'topic' else None
+        for child in parent:
+            if child.tag == 'topic' and 'uuid' in child.attrib:
+                parents.setdefault( child.attrib['uuid'], parent_uuid )
+    return parents
+
+# #####################################################################################################################################################################################################
+# HIERARCHIES
+# #####################################################################################################################################################################################################
+# titles: { uuid: title } of the topics with a text, the other topics are named by their uuid
+
+def hierarchies( parents, titles ):
+    cache = {}
+
+    def _hierarchy( uuid ):
+        if uuid in cache: return cache[uuid]
+        parent = parents.get( uuid )
+        hierarchy = _hierarchy( parent ) + [ titles.get( parent, parent ) ] if parent else []
+        cache[uuid] = hierarchy
+        return hierarchy
+
+    return { uuid: list( _hierarchy( uuid ) ) for uuid in parents }